@@ -0,0 +1,85 @@
+"""
+compares deepcopy against the structure aware clones on game data of growing size
+
+run from the project root:
+    python -m benchmarks.clone_benchmark
+"""
+import random
+import sys
+import time
+from copy import deepcopy
+
+from src.engine.structs.dungeon import *
+from src.engine.structs.adventurer import *
+from src.engine.structs.dragon import *
+from src.engine.structs.treasure import *
+from src.engine.entity_system import *
+from src.game.game_definitions import *
+
+
+SIZES = (10, 50, 100, 200)
+CLONES_PER_SIZE = 10
+DRAGONS_PER_ROOM = 0.05 # dragon count is this times the room count
+TREASURES_PER_ROOM = 0.02
+
+def _create_random_game_data(rng: random.Random, size: int) -> GameDataT:
+    game_data = game_data_init()
+
+    dungeon = dungeon_create(size, size)
+    for row in range(size):
+        for col in range(size):
+            dungeon_set_room(dungeon, col, row, dungeon_room_create(rng.randrange(BLOCK_COUNT), rng.randrange(DOOR_COUNT)))
+    game_data[T_DUNGEON_DATA_DUNGEON] = dungeon
+
+    # records are built directly, the create functions log every entity
+    def random_room_pos():
+        return room_pos_create(col=rng.randrange(size), row=rng.randrange(size))
+
+    entities = [Adventurer(E_ENTITY_ADVENTURER, random_room_pos(), 1, [random_room_pos() for _ in range(size)], [])]
+    entities += [Dragon(E_ENTITY_DRAGON, random_room_pos(), rng.randint(1, 5)) for _ in range(int(size * size * DRAGONS_PER_ROOM))]
+    entities += [Treasure(E_ENTITY_TREASURE, random_room_pos(), 0) for _ in range(int(size * size * TREASURES_PER_ROOM))]
+    game_data[T_DUNGEON_DATA_ENTITY_SYSTEM] = EntitySystem(entities)
+
+    return game_data
+
+def _time_ms(clone_function, value) -> tuple[float, object]:
+    begin_time = time.perf_counter()
+    for _ in range(CLONES_PER_SIZE):
+        clone = clone_function(value)
+    return (time.perf_counter() - begin_time) * 1000 / CLONES_PER_SIZE, clone
+
+def _same_game_data(a: GameDataT, b: GameDataT) -> bool:
+    dungeon_a, dungeon_b = a[T_DUNGEON_DATA_DUNGEON], b[T_DUNGEON_DATA_DUNGEON]
+    same_rooms = all(dungeon_get_room(dungeon_a, col, row) == dungeon_get_room(dungeon_b, col, row)
+                     for row in range(dungeon_get_height(dungeon_a)) for col in range(dungeon_get_width(dungeon_a)))
+    same_entities = [list(entity) for entity in a[T_DUNGEON_DATA_ENTITY_SYSTEM]] == [list(entity) for entity in b[T_DUNGEON_DATA_ENTITY_SYSTEM]]
+    return same_rooms and same_entities
+
+def _benchmark_size(rng: random.Random, size: int):
+    game_data = _create_random_game_data(rng, size)
+
+    cases = (
+        ("game data", game_data, deepcopy, game_data_clone),
+        ("dungeon", game_data[T_DUNGEON_DATA_DUNGEON], deepcopy, dungeon_clone),
+        ("entities", game_data[T_DUNGEON_DATA_ENTITY_SYSTEM], deepcopy, entity_system_clone),
+    )
+    for name, value, reference_function, clone_function in cases:
+        deepcopy_ms, reference = _time_ms(reference_function, value)
+        clone_ms, clone = _time_ms(clone_function, value)
+        speedup = deepcopy_ms / clone_ms if clone_ms > 0 else 0
+        same = ""
+        if name == "game data":
+            same = "yes" if _same_game_data(reference, clone) else "NO"
+        print(f"{size:>5} {name:>10} {deepcopy_ms:>12.2f} {clone_ms:>10.2f} {speedup:>8.1f}x {same:>6}")
+
+def main():
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    rng = random.Random(seed)
+
+    print(f"{'size':>5} {'what':>10} {'deepcopy ms':>12} {'clone ms':>10} {'speedup':>9} {'same':>6}")
+    for size in SIZES:
+        _benchmark_size(rng, size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+moves the dragons of a generated dungeon like extreme mode does (every frame) and reports how many frames run per second,
+with the dragon batch kept between frames (what _move_dragons does) and rebuilt every frame
+
+run from the project root:
+    python -m benchmarks.dragon_benchmark [seed]
+"""
+import sys
+import time
+
+import src.utils.logging as logging_mod
+import src.engine.dungeon_generator as dungeon_generator
+from src.engine.dungeon_generator import DungeonSettingsT, SettingT
+from src.engine.dragon_system import *
+from src.engine.ui_framework.ui import SizeT
+
+from src.game.game_definitions import *
+
+
+DRAGON_COUNTS = (200, 2000)
+DUNGEON_SIZE = 100
+FRAMES = 200
+
+def _generate_dungeon(rng: GameRngT, dragon_count: int) -> GameDataT:
+    settings = DungeonSettingsT(
+            SettingT("Dungeon dimensions", SizeT(DUNGEON_SIZE, DUNGEON_SIZE), SizeT(0, 0), SizeT(DUNGEON_SIZE, DUNGEON_SIZE)),
+            SettingT("Number of dragons", dragon_count, 0, dragon_count),
+            SettingT("Number of treasures", 2, 0, 10),
+            SettingT("Number of strong swords", 1, 0, 10),
+            SettingT("Number of chaos seals", 1, 0, 10)
+    )
+
+    return dungeon_generator.generate_dungeon_data(settings, rng)
+
+def _benchmark_frames(rng: GameRngT, game_data: GameDataT, keep_batch: bool) -> float:
+    """
+    returns: frames per second
+    """
+    dungeon: DungeonT = game_data[T_DUNGEON_DATA_DUNGEON]
+    entity_system: EntitySystemT = game_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
+    batch: DragonBatchT = dragon_batch_create(dungeon, entity_system)
+
+    start_time = time.perf_counter()
+    for _ in range(FRAMES):
+        if not keep_batch:
+            batch = dragon_batch_create(dungeon, entity_system)
+        dragon_batch_move(batch, dungeon, [], rng)
+
+    return FRAMES / (time.perf_counter() - start_time)
+
+def main():
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    rng = game_rng_create(seed)
+
+    logging_mod.LOG_LEVEL = logging_mod.LOG_LEVEL_ERROR
+
+    for dragon_count in DRAGON_COUNTS:
+        game_data = _generate_dungeon(rng, dragon_count)
+        kept = _benchmark_frames(rng, game_data_clone(game_data), keep_batch=True)
+        rebuilt = _benchmark_frames(rng, game_data_clone(game_data), keep_batch=False)
+        print(f"{dragon_count:>6} dragons {DUNGEON_SIZE}x{DUNGEON_SIZE}  kept batch {kept:8.1f} frames/s  rebuilt every frame {rebuilt:8.1f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
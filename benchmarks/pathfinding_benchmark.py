@@ -0,0 +1,73 @@
+"""
+compares the find_path strategies on random dungeons of growing size
+
+run from the project root:
+    python -m benchmarks.pathfinding_benchmark
+"""
+import random
+import sys
+import time
+
+from src.engine.structs.dungeon import *
+from src.engine.pathfinding import *
+
+
+SIZES = (10, 50, 100, 200)
+QUERIES_PER_SIZE = 20
+OPEN_ROOM_CHANCE = 0.85 # chance of a quad room, the rest is random blocks
+
+STRATEGY_NAMES = (
+    "bfs",           # E_PATH_STRATEGY_BFS
+    "astar",         # E_PATH_STRATEGY_ASTAR
+    "bidirectional", # E_PATH_STRATEGY_BIDIRECTIONAL
+    "hierarchical",  # E_PATH_STRATEGY_HIERARCHICAL
+)
+
+def _create_random_dungeon(rng: random.Random, size: int) -> DungeonT:
+    dungeon = dungeon_create(size, size)
+    for row in range(size):
+        for col in range(size):
+            if rng.random() < OPEN_ROOM_CHANCE:
+                room = dungeon_room_create(BLOCK_QUAD, 0)
+            else:
+                room = dungeon_room_create(rng.randrange(BLOCK_QUAD), rng.randrange(DOOR_COUNT))
+            dungeon_set_room(dungeon, col, row, room)
+    return dungeon
+
+def _benchmark_size(rng: random.Random, size: int):
+    dungeon = _create_random_dungeon(rng, size)
+
+    # far apart rooms, the case the strategies are for
+    queries = []
+    for _ in range(QUERIES_PER_SIZE):
+        start_room = room_pos_create(col=rng.randrange(size // 4 + 1), row=rng.randrange(size // 4 + 1))
+        target_room = room_pos_create(col=size - 1 - rng.randrange(size // 4 + 1), row=size - 1 - rng.randrange(size // 4 + 1))
+        queries.append((start_room, target_room))
+
+    reference_paths = [find_path(dungeon, start_room, target_room, E_PATH_STRATEGY_BFS) for start_room, target_room in queries]
+
+    for strategy in range(E_PATH_STRATEGY_COUNT):
+        # every strategy searches again, not the paths cached by the reference or an earlier run
+        path_cache_clear()
+        stats = path_stats_create()
+        begin_time = time.perf_counter()
+        paths = [find_path(dungeon, start_room, target_room, strategy, stats) for start_room, target_room in queries]
+        elapsed_ms = (time.perf_counter() - begin_time) * 1000 / len(queries)
+
+        same_paths = "yes" if paths == reference_paths else "NO"
+        extra_moves = sum(len(path) for path in paths) - sum(len(path) for path in reference_paths)
+        expanded = stats[T_PATH_STATS_EXPANDED] // len(queries)
+        print(f"{size:>5} {STRATEGY_NAMES[strategy]:>14} {expanded:>10} {elapsed_ms:>10.2f} {same_paths:>10} {extra_moves:>12}")
+
+def main():
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    rng = random.Random(seed)
+
+    # hierarchical does not count expanded rooms and is near optimal (extra moves over BFS)
+    print(f"{'size':>5} {'strategy':>14} {'expanded':>10} {'ms/path':>10} {'same path':>10} {'extra moves':>12}")
+    for size in SIZES:
+        _benchmark_size(rng, size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+plays games headless (see src/game/simulation.py) and reports how many games run per second
+
+run from the project root:
+    python -m benchmarks.simulation_benchmark [seed]
+"""
+import os
+import sys
+
+import src.utils.logging as logging_mod
+from src.engine.parsing import game_data_parse_file
+import src.engine.dungeon_generator as dungeon_generator
+from src.engine.dungeon_generator import DungeonSettingsT, SettingT
+from src.engine.ui_framework.ui import SizeT
+
+from src.game.game_definitions import *
+from src.game.simulation import *
+
+
+DUNGEONS_DIR = "dungeons"
+GAMES_PER_DUNGEON = 20
+GENERATED_SIZES = (6, 12, 24)
+GENERATED_GAMES_PER_SIZE = 20
+ROTATIONS_PER_TURN = 2
+
+GAME_MODE_NAMES = (
+    "normal",      # E_GAME_MODE_NORMAL
+    "single turn", # E_GAME_MODE_SINGLE_TURN
+    "extreme",     # E_GAME_MODE_EXTREME
+)
+
+def _load_dungeon_file(file_path: str) -> GameDataT:
+    game_data = game_data_init()
+    game_data_parse_file(game_data, file_path)
+    return game_data
+
+def _generate_dungeon(rng: GameRngT, size: int) -> GameDataT:
+    settings = DungeonSettingsT(
+            SettingT("Dungeon dimensions", SizeT(size, size), SizeT(0, 0), SizeT(size, size)),
+            SettingT("Number of dragons", size // 2, 0, size),
+            SettingT("Number of treasures", 2, 0, 10),
+            SettingT("Number of strong swords", 1, 0, 10),
+            SettingT("Number of chaos seals", 1, 0, 10)
+    )
+
+    game_data = game_data_init()
+    game_data_set_dungeon_data(game_data, dungeon_generator.generate_dungeon_data(settings, rng))
+    return game_data
+
+def _random_rotations_script(game_context: GameContextT) -> list[SimulationActionT]:
+    """
+    rotates ROTATIONS_PER_TURN random rooms every dungeon turn
+    """
+    dungeon: DungeonT = game_context[T_GAME_CTX_GAME_DATA][T_DUNGEON_DATA_DUNGEON]
+    rng: GameRngT = game_context[T_GAME_CTX_RNG]
+    return [simulation_action_create(E_SIMULATION_ACTION_ROTATE_ROOM,
+                                     room_pos_create(col=rng.randrange(dungeon_get_width(dungeon)), row=rng.randrange(dungeon_get_height(dungeon))))
+            for _ in range(ROTATIONS_PER_TURN)]
+
+def _benchmark_games(rng: GameRngT, name: str, games: list[GameDataT]):
+    for game_mode in range(E_GAME_MODE_COUNT):
+        for game_data in games:
+            game_data[T_DUNGEON_DATA_GAME_MODE] = game_mode
+
+        for script_name, script in (("none", None), ("rotations", _random_rotations_script)):
+            stats = simulation_run_games(games, script, rng=rng)
+            print(f"{name:>20} {GAME_MODE_NAMES[game_mode]:>12} {script_name:>10}  {simulation_stats_to_str(stats)}")
+
+def main():
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    rng = game_rng_create(seed)
+
+    # logs of every move would be most of the time spent
+    logging_mod.LOG_LEVEL = logging_mod.LOG_LEVEL_ERROR
+
+    for file_name in sorted(os.listdir(DUNGEONS_DIR)):
+        # files starting with $ are the save and the replay, not dungeons
+        if file_name.startswith("$"):
+            continue
+        game_data = _load_dungeon_file(os.path.join(DUNGEONS_DIR, file_name))
+        _benchmark_games(rng, file_name, [game_data] * GAMES_PER_DUNGEON)
+
+    for size in GENERATED_SIZES:
+        games = [_generate_dungeon(rng, size) for _ in range(GENERATED_GAMES_PER_SIZE)]
+        _benchmark_games(rng, f"generated {size}x{size}", games)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,3 +11,4 @@ from pathlib import Path
 
 DUNGEON_FILES_DIR = os.path.join(Path(__file__).parent, "..", "dungeons")
 GAME_SAVE_FILE_PATH = os.path.join(Path(__file__).parent, "..", "dungeons", "$saved")
+REPLAY_FILE_PATH = os.path.join(Path(__file__).parent, "..", "dungeons", "$replay") # replay of the last game played
@@ -0,0 +1,180 @@
+import random
+from array import array
+
+from src.engine.structs.dungeon import *
+from src.engine.structs.entity import *
+from src.engine.structs.dragon import *
+from src.engine.entity_system import *
+import src.engine.pathfinding as pathfinding
+
+
+# the dragons of an entity system in parallel arrays, indexed the same way as its dragon list
+# positions are flat room indices (row * width + col) so picking moves never builds RoomPosT tuples
+# kept between frames (see T_GAME_DATA_DRAGON_BATCH): moves go through dragon_batch_move and removals through dragon_batch_remove_dragon
+DragonBatchT = list
+
+T_DRAGON_BATCH_ENTITY_SYSTEM = 0 # EntitySystemT the batch mirrors, rebuild it (dragon_batch_is_valid) when this changes
+T_DRAGON_BATCH_DRAGONS = 1       # list[DragonT], same order as the dragons of the entity system
+T_DRAGON_BATCH_WIDTH = 2
+T_DRAGON_BATCH_POSITIONS = 3     # array('i') flat room index of each dragon
+T_DRAGON_BATCH_LEVELS = 4        # array('i') level of each dragon
+T_DRAGON_BATCH_OCCUPIED = 5      # bytearray dragon count of each room index
+T_DRAGON_BATCH_MASK_DELTAS = 6   # neighbor index deltas of each neighbor mask, see _MASK_DIRECTIONS
+T_DRAGON_BATCH_ROOM_POSITIONS = 7 # RoomPosT of each room index, so moves dont build them
+T_DRAGON_BATCH_SIZE = 8
+
+# neighbor directions of each neighbor mask, in the same order as dungeon_get_valid_neighbor_rooms
+_MASK_DIRECTIONS = tuple(tuple(direction for direction in range(DOOR_COUNT) if neighbor_mask & (1 << direction)) for neighbor_mask in range(1 << DOOR_COUNT))
+
+
+def dragon_batch_create(dungeon: DungeonT, entity_system: EntitySystemT) -> DragonBatchT:
+    """
+    reads every dragon of entity_system into a batch, in entity_system order
+
+    >>> d = dungeon_create(2, 3)
+    >>> batch = dragon_batch_create(d, EntitySystem([Dragon(E_ENTITY_DRAGON, (2, 1), 4), Dragon(E_ENTITY_DRAGON, (0, 0), 1)]))
+    >>> list(batch[T_DRAGON_BATCH_POSITIONS]), list(batch[T_DRAGON_BATCH_LEVELS])
+    ([5, 0], [4, 1])
+    """
+    width = dungeon_get_width(dungeon)
+    dragons = entity_system_get_all(entity_system, E_ENTITY_DRAGON)
+
+    batch = [None] * T_DRAGON_BATCH_SIZE
+    batch[T_DRAGON_BATCH_ENTITY_SYSTEM] = entity_system
+    batch[T_DRAGON_BATCH_DRAGONS] = dragons
+    batch[T_DRAGON_BATCH_WIDTH] = width
+    batch[T_DRAGON_BATCH_POSITIONS] = array('i', (dragon.room_pos[ROOM_POS_ROW] * width + dragon.room_pos[ROOM_POS_COL] for dragon in dragons))
+    batch[T_DRAGON_BATCH_LEVELS] = array('i', (dragon.level for dragon in dragons))
+
+    occupied = bytearray(width * dungeon_get_height(dungeon))
+    for index in batch[T_DRAGON_BATCH_POSITIONS]:
+        occupied[index] += 1
+    batch[T_DRAGON_BATCH_OCCUPIED] = occupied
+
+    index_deltas = (-width, 1, width, -1)
+    batch[T_DRAGON_BATCH_MASK_DELTAS] = tuple(tuple(index_deltas[direction] for direction in directions) for directions in _MASK_DIRECTIONS)
+    batch[T_DRAGON_BATCH_ROOM_POSITIONS] = [room_pos_create(col=index % width, row=index // width) for index in range(len(occupied))]
+
+    return batch
+
+def dragon_batch_is_valid(batch: DragonBatchT | NoneType, dungeon: DungeonT, entity_system: EntitySystemT) -> bool:
+    """
+    returns: True if batch still mirrors the dragons of entity_system in dungeon,
+    False once the game was loaded or cloned, or dragons were added or removed without dragon_batch_remove_dragon
+    """
+    return (batch != None
+            and batch[T_DRAGON_BATCH_ENTITY_SYSTEM] is entity_system
+            and batch[T_DRAGON_BATCH_WIDTH] == dungeon_get_width(dungeon)
+            and len(batch[T_DRAGON_BATCH_OCCUPIED]) == dungeon_get_width(dungeon) * dungeon_get_height(dungeon)
+            and len(batch[T_DRAGON_BATCH_DRAGONS]) == len(entity_system.types.get(E_ENTITY_DRAGON, ())))
+
+def dragon_batch_remove_dragon(batch: DragonBatchT, dragon: DragonT):
+    """
+    removes dragon from the entity system of batch and from batch,
+    the last dragon takes its place in both so they keep the same order
+
+    >>> es = EntitySystem([Dragon(E_ENTITY_DRAGON, (0, 0), 1), Dragon(E_ENTITY_DRAGON, (1, 0), 2), Dragon(E_ENTITY_DRAGON, (2, 0), 3)])
+    >>> batch = dragon_batch_create(dungeon_create(1, 3), es)
+    >>> dragon_batch_remove_dragon(batch, es[0])
+    >>> list(batch[T_DRAGON_BATCH_POSITIONS]), list(batch[T_DRAGON_BATCH_OCCUPIED]), batch[T_DRAGON_BATCH_DRAGONS] == entity_system_get_all(es, E_ENTITY_DRAGON)
+    ([2, 1], [0, 1, 1], True)
+    """
+    entity_system: EntitySystemT = batch[T_DRAGON_BATCH_ENTITY_SYSTEM]
+    dragons = batch[T_DRAGON_BATCH_DRAGONS]
+    positions = batch[T_DRAGON_BATCH_POSITIONS]
+    levels = batch[T_DRAGON_BATCH_LEVELS]
+
+    dragon_slots = entity_system.slots.get(id(dragon))
+    if dragon_slots == None:
+        log_error(f"[dragon_batch_remove_dragon] dragon not in the entity system: {dragon}")
+        return
+
+    # index in the dragon list of the entity system, entity_system_remove_entity swaps the last dragon in the same way
+    i = dragon_slots[1]
+    batch[T_DRAGON_BATCH_OCCUPIED][positions[i]] -= 1
+
+    last = len(dragons) - 1
+    dragons[i] = dragons[last]
+    positions[i] = positions[last]
+    levels[i] = levels[last]
+    dragons.pop()
+    positions.pop()
+    levels.pop()
+
+    entity_system_remove_entity(entity_system, dragon)
+
+def dragon_batch_move(batch: DragonBatchT, dungeon: DungeonT, blocked: list[int], rng: random.Random, distance_field=None, chase_probability: float = 0.0):
+    """
+    moves every dragon one room in a single pass, then their entities in the entity system of batch (entity_system_move_entities)
+    blocked: room indices other entities are in, dragons dont move there (the adventurer room is not blocked, dragons can move towards it)
+    conflicts: dragons are resolved in batch order, so when 2 dragons want the same free room the lowest index gets it
+    and the other one picks among what is left, same as moving them one by one
+    rng: generator the moves are picked with
+    distance_field: field from the adventurer, each dragon chases with a chase_probability chance
+
+    >>> d = dungeon_create(1, 3)
+    >>> for col in range(3): dungeon_set_room(d, col, 0, dungeon_room_create(BLOCK_QUAD, 0))
+    >>> dragons = [Dragon(E_ENTITY_DRAGON, (0, 0), 1), Dragon(E_ENTITY_DRAGON, (2, 0), 1)]
+    >>> batch = dragon_batch_create(d, EntitySystem(dragons))
+    >>> dragon_batch_move(batch, d, [], random.Random(0))
+    >>> [dragon.room_pos for dragon in dragons] # the second dragon is blocked by the first
+    [(1, 0), (2, 0)]
+
+    >>> d = dungeon_create(1, 5)
+    >>> for col in range(5): dungeon_set_room(d, col, 0, dungeon_room_create(BLOCK_QUAD, 0))
+    >>> distance_field = pathfinding.distance_field_update(d, (0, 0))
+    >>> moves = set()
+    >>> for seed in range(20):
+    ...     dragon = Dragon(E_ENTITY_DRAGON, (3, 0), 1)
+    ...     dragon_batch_move(dragon_batch_create(d, EntitySystem([dragon])), d, [], random.Random(seed), distance_field, chase_probability=1.0)
+    ...     moves.add(dragon.room_pos)
+    >>> moves # always towards the adventurer in (0, 0), never to (4, 0)
+    {(2, 0)}
+    """
+    entity_system: EntitySystemT = batch[T_DRAGON_BATCH_ENTITY_SYSTEM]
+    dragons = batch[T_DRAGON_BATCH_DRAGONS]
+    positions = batch[T_DRAGON_BATCH_POSITIONS]
+    occupied = batch[T_DRAGON_BATCH_OCCUPIED]
+    mask_deltas = batch[T_DRAGON_BATCH_MASK_DELTAS]
+    room_positions = batch[T_DRAGON_BATCH_ROOM_POSITIONS]
+    adjacency = dungeon_get_adjacency(dungeon)
+
+    moved_dragons = []
+    moved_room_positions = []
+
+    if distance_field == None:
+        chase_probability = 0.0
+
+    # other entities count as occupied during the pass only, they move without the batch knowing
+    for index in blocked:
+        occupied[index] += 1
+
+    for i in range(len(positions)):
+        index = positions[i]
+        new_index = -1
+
+        # chase the adventurer if the room closer to them is free
+        if chase_probability > 0 and rng.random() < chase_probability:
+            chase_index = pathfinding.distance_field_get_next_index(distance_field, adjacency, index)
+            if chase_index != -1 and not occupied[chase_index]:
+                new_index = chase_index
+
+        if new_index == -1:
+            # free connected rooms
+            available_moves = [index + index_delta for index_delta in mask_deltas[adjacency[index]] if not occupied[index + index_delta]]
+
+            # pick a random move if any are available
+            if available_moves:
+                new_index = rng.choice(available_moves)
+
+        if new_index != -1:
+            occupied[index] -= 1
+            occupied[new_index] += 1
+            positions[i] = new_index
+            moved_dragons.append(dragons[i])
+            moved_room_positions.append(room_positions[new_index])
+
+    for index in blocked:
+        occupied[index] -= 1
+
+    entity_system_move_entities(entity_system, moved_dragons, moved_room_positions)
@@ -1,5 +1,4 @@
-from dataclasses import dataclass
-from random import choice
+from dataclasses import dataclass, field
 
 import src.engine.pathfinding as pathfinding
 from src.engine.structs.dungeon import *
@@ -10,6 +9,9 @@ from src.game.game_definitions import *
 import src.utils.entity_utils as entity_utils
 
 
+# highest seed the settings can be set to, 0 means a new dungeon each time
+DUNGEON_SEED_MAX = 9999
+
 class SettingT:
     def __init__(self, label, val, minVal, maxVal):
         self.label: str = label
@@ -24,8 +26,16 @@ class DungeonSettingsT:
     treasure_count: SettingT
     strong_sword_count: SettingT
     chaos_seal_count: SettingT
+    seed: SettingT = field(default_factory=lambda: SettingT("Seed (0 = random)", 0, 0, DUNGEON_SEED_MAX))
+
+def create_settings_rng(settings: DungeonSettingsT) -> GameRngT:
+    """
+    returns: generator seeded from the seed setting, a random seed when it is 0
+    """
+    seed = settings.seed.val
+    return game_rng_create(seed if seed != 0 else None)
 
-def _random_room_pos(max_room: int, entity_system) -> RoomPosT:
+def _random_room_pos(max_room: int, entity_system, rng: GameRngT) -> RoomPosT:
     used_rooms = entity_utils.get_all_entity_positions(entity_system)
     
     available_rooms = list()
@@ -36,25 +46,25 @@ def _random_room_pos(max_room: int, entity_system) -> RoomPosT:
                 available_rooms.append(room_pos)
 
     if len(available_rooms) > 0:
-        return choice(available_rooms)
+        return rng.choice(available_rooms)
     else:
         return INVALID_ROOM_POS
 
-def _generate_adventurer(dungeon_data, settings: DungeonSettingsT):
+def _generate_adventurer(dungeon_data, settings: DungeonSettingsT, rng: GameRngT):
     es = dungeon_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
 
-    random_room = _random_room_pos(settings.dungeon_size.val.width - 1, es)
+    random_room = _random_room_pos(settings.dungeon_size.val.width - 1, es, rng)
 
     entity_system_add_entity(es, adventurer_create(random_room))
 
-def _generate_dragons(dungeon_data, settings: DungeonSettingsT):
+def _generate_dragons(dungeon_data, settings: DungeonSettingsT, rng: GameRngT):
     es = dungeon_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
 
     max_room = settings.dungeon_size.val.width
 
     # generate dragons from level 1 -> dragon_count
     for i in range(settings.dragon_count.val):
-        random_room = _random_room_pos(max_room, es)
+        random_room = _random_room_pos(max_room, es, rng)
         if random_room != INVALID_ROOM_POS:
             entity_system_add_entity(es, dragon_create(random_room, i + 1))
 
@@ -84,20 +94,18 @@ def _get_neighbor_constraints(dungeon, r, c) -> set[int]:
     # Check room ABOVE (North)
     if r > 0:
         north_room = dungeon[r-1][c]
-        north_connections = dungeon_room_get_connections(north_room)
-        if north_connections[ROOM_CONNECTION_DOWN]: # If he has a door down
+        if dungeon_room_get_mask(north_room) & DOOR_MASK_DOWN: # If he has a door down
             constraints.add(ROOM_CONNECTION_UP)     # We should have a door up
             
     # Check room to the LEFT (West)
     if c > 0:
         west_room = dungeon[r][c-1]
-        west_connections = dungeon_room_get_connections(west_room)
-        if west_connections[ROOM_CONNECTION_RIGHT]: # If he has a door right
+        if dungeon_room_get_mask(west_room) & DOOR_MASK_RIGHT: # If he has a door right
             constraints.add(ROOM_CONNECTION_LEFT)    # We should have a door left
             
     return constraints
 
-def _generate_dungeon_layout(dungeon_data, settings: DungeonSettingsT):
+def _generate_dungeon_layout(dungeon_data, settings: DungeonSettingsT, rng: GameRngT):
     es = dungeon_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
 
     dungeon = dungeon_data[T_DUNGEON_DATA_DUNGEON]
@@ -108,8 +116,7 @@ def _generate_dungeon_layout(dungeon_data, settings: DungeonSettingsT):
     # for pathfinding to find any possible route
     width = dungeon_get_width(dungeon)
     height = dungeon_get_height(dungeon)
-    ghost_dungeon = []
-    dungeon_init(ghost_dungeon, height, width)
+    ghost_dungeon = dungeon_create(height, width)
     for r in range(height):
         for c in range(width):
             ghost_dungeon[r][c] = dungeon_room_create(BLOCK_QUAD, 0)
@@ -119,7 +126,7 @@ def _generate_dungeon_layout(dungeon_data, settings: DungeonSettingsT):
     required_connections = {}
 
     for dragon in dragons:
-        path = pathfinding.find_random_path_to_dragon(ghost_dungeon, adventurer, dragon)
+        path = pathfinding.find_random_path_to_dragon(ghost_dungeon, adventurer, dragon, rng)
         
         # Add the start position to the path logic
         full_path = [adventurer[T_BASE_ENTITY_ROOM_POS]] + path
@@ -141,16 +148,29 @@ def _generate_dungeon_layout(dungeon_data, settings: DungeonSettingsT):
             
             # Neighbor connection matching (Natural Flow)
             if r > 0:
-                n_conn = dungeon_room_get_connections(dungeon[r-1][c])
-                if n_conn[ROOM_CONNECTION_DOWN]: must_have.add(ROOM_CONNECTION_UP)
+                if dungeon_room_get_mask(dungeon[r-1][c]) & DOOR_MASK_DOWN: must_have.add(ROOM_CONNECTION_UP)
             if c > 0:
-                w_conn = dungeon_room_get_connections(dungeon[r][c-1])
-                if w_conn[ROOM_CONNECTION_RIGHT]: must_have.add(ROOM_CONNECTION_LEFT)
+                if dungeon_room_get_mask(dungeon[r][c-1]) & DOOR_MASK_RIGHT: must_have.add(ROOM_CONNECTION_LEFT)
             
             # Apply your playability rules
-            dungeon[r][c] = dungeon_pick_refined_room(dungeon, r, c, must_have)
+            dungeon[r][c] = dungeon_pick_refined_room(dungeon, r, c, must_have, rng)
 
-def _generate_items(dungeon_data, settings: DungeonSettingsT):
+def _dungeon_layout_is_connected(dungeon_data) -> bool:
+    """
+    returns: True if the adventurer can reach every dragon (one bitboard flood fill)
+    """
+    es = dungeon_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
+    dungeon = dungeon_data[T_DUNGEON_DATA_DUNGEON]
+    adventurer = entity_system_get_first_and_only(es, E_ENTITY_ADVENTURER)
+
+    reachable = pathfinding.reachable_set(dungeon, adventurer[T_BASE_ENTITY_ROOM_POS])
+    for dragon in entity_system_get_all(es, E_ENTITY_DRAGON):
+        if not pathfinding.reachable_set_contains(dungeon, reachable, dragon[T_BASE_ENTITY_ROOM_POS]):
+            return False
+
+    return True
+
+def _generate_items(dungeon_data, settings: DungeonSettingsT, rng: GameRngT):
     es = dungeon_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
 
     entity_create_callback_table = [
@@ -161,20 +181,31 @@ def _generate_items(dungeon_data, settings: DungeonSettingsT):
     max_room = settings.dungeon_size.val.width
     for count, creation_callback in entity_create_callback_table:
         for i in range(count):
-            room_pos = _random_room_pos(max_room, es)
+            room_pos = _random_room_pos(max_room, es, rng)
             if room_pos != INVALID_ROOM_POS:
                 entity_system_add_entity(es, creation_callback(room_pos))
 
-def generate_dungeon_data(settings: DungeonSettingsT):
+def generate_dungeon_data(settings: DungeonSettingsT, rng: GameRngT | NoneType = None):
+    """
+    rng: generator every random choice is made with, None to create one from the seed setting
+    """
+    if rng == None:
+        rng = create_settings_rng(settings)
+
     dungeon_data = dungeon_data_init()
 
     dungeon: DungeonT = dungeon_data[T_DUNGEON_DATA_DUNGEON]
     dungeon_init(dungeon, settings.dungeon_size.val.width, settings.dungeon_size.val.height)
 
-    _generate_adventurer(dungeon_data, settings)
-    _generate_dragons(dungeon_data, settings)
-    _generate_dungeon_layout(dungeon_data, settings)
-    _generate_items(dungeon_data, settings)
+    _generate_adventurer(dungeon_data, settings, rng)
+    _generate_dragons(dungeon_data, settings, rng)
+    _generate_dungeon_layout(dungeon_data, settings, rng)
+
+    # the layout is kept as is (same dungeon for a seed), the player can still rotate rooms to open a way
+    if not _dungeon_layout_is_connected(dungeon_data):
+        log_error(f"[generate_dungeon_data] generated layout leaves a dragon unreachable from the adventurer")
+
+    _generate_items(dungeon_data, settings, rng)
 
     dungeon_data[T_DUNGEON_DATA_TREASURE_COUNT] = settings.treasure_count.val
 
@@ -3,3 +3,24 @@ TARGET_FRAME_TIME_S = 1.0 / TARGET_FPS
 
 INTERVAL_BETWEEN_PATH_STEPS = 100 * 0.001
 INTERVAL_BETWEEN_ROUNDS = 1000 * 0.001 # single turn mode, interval between each round since its on autoplay
+
+# single turn mode autoplay speed multipliers (intervals above divided by it), cycled in game
+AUTOPLAY_SPEEDS = (1, 2, 4, 8)
+# real time a frame spends resolving the game until its end in single turn mode (see simulation_resolve_game)
+AUTOPLAY_RESOLVE_BUDGET_S = TARGET_FRAME_TIME_S
+
+# dungeons with at least this many rooms are searched with hierarchical pathfinding (near optimal paths)
+HIERARCHICAL_PATHFINDING_MIN_ROOMS = 250_000
+HIERARCHICAL_PATHFINDING_CLUSTER_SIZE = 16 # rooms per cluster side
+
+PATH_CACHE_MAX_ENTRIES = 1024 # paths remembered by pathfinding, least recently used dropped first
+
+# all pairs next hop table (2 bytes per room pair) is only used while it fits in this budget
+ALL_PAIRS_MAX_BYTES = 8 * 1024 * 1024
+
+# record every game played to REPLAY_FILE_PATH (see src/game/replay.py)
+REPLAY_RECORDING = False
+
+# headless simulations (see src/game/simulation.py) give up on a game after this many rounds / frames
+SIMULATION_MAX_ROUNDS = 1000
+SIMULATION_MAX_FRAMES = 200_000
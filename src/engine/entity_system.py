@@ -10,8 +10,53 @@ from src.engine.structs.chaos_seal import *
 
 from src.game.entity_definitions import *
 
+class EntitySystem:
+    """
+    entities split by type, plus an index of the entities in each room (see entity_system_get_in_room)
+
+    iterating, ``len(entity_system)`` and ``entity_system[i]`` still work like the old plain list,
+    but entities must be added, removed and moved with the entity_system_* functions so the indices stay right
+
+    entities: every entity, in the order they were added (until one is removed, removing swaps the last one in its place)
+    types: entity type -> entities of that type, same order rules as entities
+           for single entities like the adventurer or treasure this is a direct handle: types[entity_type][0]
+    rooms: room_pos -> entities in that room
+    slots: id(entity) -> [index in entities, index in its types list], so removing is O(1)
+    """
+    __slots__ = ("entities", "types", "rooms", "slots")
+
+    def __init__(self, entities: list[BaseEntityT] = ()):
+        self.entities: list[BaseEntityT] = []
+        self.types: dict[EntityE, list[BaseEntityT]] = {}
+        self.rooms: dict[RoomPosT, list[BaseEntityT]] = {}
+        self.slots: dict[int, list[int]] = {}
+
+        for base_entity in entities:
+            entity_system_add_entity(self, base_entity)
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __getitem__(self, i: int) -> BaseEntityT:
+        return self.entities[i]
+
+    def __iter__(self):
+        return iter(self.entities)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, EntitySystem):
+            return NotImplemented
+        return self.entities == other.entities
+
+    def __repr__(self) -> str:
+        return f"EntitySystem({self.entities})"
+
+    def __reduce__(self):
+        # slots is keyed by id() so copies (deepcopy, pickle) rebuild every index from the entities
+        return (EntitySystem, (self.entities,))
+
 # entity list
-EntitySystemT = list[BaseEntityT]
+EntitySystemT = EntitySystem
 
 # T_entity_system_ADVENTURER = 0
 # T_entity_system_DRAGONS = 1 # list of dragons
@@ -25,22 +70,124 @@ EntitySystemT = list[BaseEntityT]
 def entity_system_create() -> EntitySystemT:
     return EntitySystemT()
 
+def entity_system_clone(entity_system: EntitySystemT) -> EntitySystemT:
+    """
+    copies every entity record (in the same order), shares the position tuples
+
+    >>> es = EntitySystem([Adventurer(E_ENTITY_ADVENTURER, (0, 0), 1, [(1, 0)], []), Dragon(E_ENTITY_DRAGON, (1, 0), 2)])
+    >>> clone = entity_system_clone(es)
+    >>> clone[0].path.append((2, 0))
+    >>> entity_system_move_entity(clone, clone[1], (2, 0))
+    >>> es[0].path, entity_system_get_in_room(es, (1, 0)), entity_system_get_in_room(clone, (1, 0))
+    ([(1, 0)], [Dragon(type=1, room_pos=(1, 0), level=2)], [])
+    """
+    clone: EntitySystemT = entity_system_create()
+
+    for base_entity in entity_system.entities:
+        if base_entity.type == E_ENTITY_ADVENTURER:
+            entity_system_add_entity(clone, adventurer_clone(base_entity))
+        else:
+            entity_system_add_entity(clone, base_entity_clone(base_entity))
+
+    return clone
+
 def entity_system_add_entity(entity_system: EntitySystemT, base_entity: BaseEntityT):
-    entity_system.append(base_entity)
+    type_entities = entity_system.types.get(base_entity.type)
+    if type_entities == None:
+        type_entities = []
+        entity_system.types[base_entity.type] = type_entities
 
-def entity_system_get(entity_system: EntitySystemT, entity_type: EntityE, target_occurence: int = 0) -> BaseEntityT | None:
+    entity_system.slots[id(base_entity)] = [len(entity_system.entities), len(type_entities)]
+    entity_system.entities.append(base_entity)
+    type_entities.append(base_entity)
+    _entity_system_index_add(entity_system, base_entity)
+
+def entity_system_move_entity(entity_system: EntitySystemT, base_entity: BaseEntityT, room_pos: RoomPosT):
     """
-    returns i occurence of specified entity type
+    same as base_entity.room_pos = room_pos but keeps the room index up to date
+
+    >>> es = entity_system_create()
+    >>> dragon = Dragon(E_ENTITY_DRAGON, (0, 0), 1)
+    >>> entity_system_add_entity(es, dragon)
+    >>> entity_system_move_entity(es, dragon, (1, 0))
+    >>> entity_system_get_in_room(es, (0, 0)), entity_system_get_in_room(es, (1, 0))
+    ([], [Dragon(type=1, room_pos=(1, 0), level=1)])
     """
-    count = 0
+    _entity_system_index_remove(entity_system, base_entity)
+    base_entity.room_pos = room_pos
+    _entity_system_index_add(entity_system, base_entity)
 
-    for entity in entity_system:
-        if entity[T_BASE_ENTITY_TYPE] == entity_type:
-            count += 1
-            if count >= target_occurence:
-                return entity
+def entity_system_move_entities(entity_system: EntitySystemT, entities: list[BaseEntityT], room_positions: list[RoomPosT]):
+    """
+    same as entity_system_move_entity for each entity of entities to the room_pos at the same index, in one pass
+
+    >>> dragons = [Dragon(E_ENTITY_DRAGON, (0, 0), 1), Dragon(E_ENTITY_DRAGON, (1, 0), 2)]
+    >>> es = EntitySystem(dragons)
+    >>> entity_system_move_entities(es, dragons, [(1, 0), (2, 0)])
+    >>> entity_system_get_in_room(es, (0, 0)), entity_system_get_in_room(es, (1, 0))
+    ([], [Dragon(type=1, room_pos=(1, 0), level=1)])
+    """
+    rooms = entity_system.rooms
 
-    return None
+    for base_entity, room_pos in zip(entities, room_positions):
+        # _entity_system_index_add inlined and _entity_system_index_remove for rooms with one entity, most rooms
+        room_entities = rooms.get(base_entity.room_pos)
+        if room_entities != None and len(room_entities) == 1 and room_entities[0] is base_entity:
+            del rooms[base_entity.room_pos]
+        else:
+            _entity_system_index_remove(entity_system, base_entity)
+
+        base_entity.room_pos = room_pos
+        room_entities = rooms.get(room_pos)
+        if room_entities == None:
+            rooms[room_pos] = [base_entity]
+        else:
+            room_entities.append(base_entity)
+
+def entity_system_get_in_room(entity_system: EntitySystemT, room_pos: RoomPosT) -> list[BaseEntityT]:
+    """
+    returns: entities in room_pos, in the order they got there (without scanning every entity)
+    """
+    return list(entity_system.rooms.get(room_pos, ()))
+
+def entity_system_get_positions(entity_system: EntitySystemT) -> set[RoomPosT]:
+    """
+    returns: every room that has at least one entity in it
+    """
+    return set(entity_system.rooms)
+
+def _entity_system_index_add(entity_system: EntitySystemT, base_entity: BaseEntityT):
+    room_pos: RoomPosT = base_entity.room_pos
+    room_entities = entity_system.rooms.get(room_pos)
+    if room_entities == None:
+        entity_system.rooms[room_pos] = [base_entity]
+    else:
+        room_entities.append(base_entity)
+
+def _entity_system_index_remove(entity_system: EntitySystemT, base_entity: BaseEntityT):
+    room_pos: RoomPosT = base_entity.room_pos
+    room_entities = entity_system.rooms.get(room_pos, ())
+    for i in range(len(room_entities)):
+        if room_entities[i] is base_entity:
+            room_entities.pop(i)
+            break
+    else:
+        log_error(f"[_entity_system_index_remove] entity not found in room {room_pos}: {base_entity}")
+        return
+
+    if not room_entities:
+        del entity_system.rooms[room_pos]
+
+def entity_system_get(entity_system: EntitySystemT, entity_type: EntityE, target_occurence: int = 0) -> BaseEntityT | None:
+    """
+    returns i occurence of specified entity type (0 and 1 are both the first one)
+    """
+    type_entities = entity_system.types.get(entity_type, ())
+    i = max(target_occurence - 1, 0)
+    if i >= len(type_entities):
+        return None
+
+    return type_entities[i]
 
 def entity_system_get_first(entity_system: EntitySystemT, entity_type: EntityE) -> BaseEntityT | None:
     """
@@ -52,7 +199,7 @@ def entity_system_get_first_and_only(entity_system: EntitySystemT, entity_type:
     """
     same as entity_system_get_first but logs error if there is more than one
     """
-    if len(entity_system_get_all(entity_system, entity_type)) > 1:
+    if len(entity_system.types.get(entity_type, ())) > 1:
         log_error(f"[entity_system_get_first_and_only] more than 1 {entity_type} entity found")
 
     return entity_system_get_first(entity_system, entity_type)
@@ -61,25 +208,13 @@ def entity_system_get_all(entity_system: EntitySystemT, entity_type: EntityE) ->
     """
     get all occurences of a specific type of entity
     """
-    ents = []
-
-    for entity in entity_system:
-        if entity[T_BASE_ENTITY_TYPE] == entity_type:
-            ents.append(entity)
-
-    return ents
+    return list(entity_system.types.get(entity_type, ()))
 
 def entity_system_get_all_where(entity_system: EntitySystemT, entity_type: EntityE, filter_fn) -> list[BaseEntityT]:
     """
     get all occurences of a specific type of entity where filter_fn(entity) is true
     """
-    ents = []
-
-    for entity in entity_system:
-        if entity[T_BASE_ENTITY_TYPE] == entity_type and filter_fn(entity):
-            ents.append(entity)
-
-    return ents
+    return [entity for entity in entity_system.types.get(entity_type, ()) if filter_fn(entity)]
 
 def entity_system_get_all_types(entity_system: EntitySystemT, entity_types: set[EntityE]) -> list[BaseEntityT]:
     """
@@ -88,22 +223,17 @@ def entity_system_get_all_types(entity_system: EntitySystemT, entity_types: set[
     ents = []
 
     for entity_type in entity_types:
-        ents += entity_system_get_all(entity_system, entity_type)
+        ents += entity_system.types.get(entity_type, ())
 
     return ents
 
 def entity_system_remove(entity_system: EntitySystemT, entity_type: EntityE, target_occurence: int = 0):
     """
-    removes i occurence of specified entity type
+    removes i occurence of specified entity type (0 and 1 are both the first one)
     """
-    count = 0
-
-    for i in range(len(entity_system)):
-        entity = entity_system[i]
-        if entity[T_BASE_ENTITY_TYPE] == entity_type:
-            count += 1
-            if count >= target_occurence:
-                entity_system.pop(i)
+    base_entity = entity_system_get(entity_system, entity_type, target_occurence)
+    if base_entity != None:
+        entity_system_remove_entity(entity_system, base_entity)
 
 def entity_system_remove_first(entity_system: EntitySystemT, entity_type: EntityE):
     """
@@ -115,7 +245,7 @@ def entity_system_remove_first_and_only(entity_system: EntitySystemT, entity_typ
     """
     same as entity_system_remove_first but logs error if there is more than one
     """
-    if len(entity_system_get_all(entity_system, entity_type)) > 1:
+    if len(entity_system.types.get(entity_type, ())) > 1:
         log_error(f"[entity_system_remove_first_and_only] more than 1 {entity_type} entity found")
 
     return entity_system_remove_first(entity_system, entity_type)
@@ -124,43 +254,47 @@ def entity_system_remove_all(entity_system: EntitySystemT, entity_type: EntityE)
     """
     removes all occurences of a specific type of entity_system
     """
-    count = len(entity_system)
-
-    i = 0
-    while i < count:
-        base_entity = entity_system[i]
-        if base_entity[T_BASE_ENTITY_TYPE] == entity_type:
-            entity_system.pop(i)
-            count -= 1
-        else: # increment iterator index only if didnt remove item from list
-            i += 1
+    for base_entity in entity_system_get_all(entity_system, entity_type):
+        entity_system_remove_entity(entity_system, base_entity)
 
 def entity_system_remove_all_where(entity_system: EntitySystemT, entity_type: EntityE, filter_fn):
-    count = len(entity_system)
-
-    i = 0
-    while i < count:
-        base_entity = entity_system[i]
-        # entity is correct type and filter_fn returned true
-        if base_entity_is(base_entity, entity_type) and filter_fn(base_entity):
-            log_debug(f"removing {base_entity[T_BASE_ENTITY_TYPE]} in room: {base_entity[T_BASE_ENTITY_ROOM_POS]}")
-            entity_system.pop(i)
-            count -= 1
-        else: # increment iterator index only if didnt remove item from list
-            i += 1
+    for base_entity in entity_system_get_all_where(entity_system, entity_type, filter_fn):
+        log_debug(f"removing {base_entity.type} in room: {base_entity.room_pos}")
+        entity_system_remove_entity(entity_system, base_entity)
 
 def entity_system_remove_entity(entity_system: EntitySystemT, target):
-    for i in range(len(entity_system)):
-        entity = entity_system[i]
-        if entity == target:
-            entity_system.pop(i)
-            return
+    """
+    removes target (the same object, not an equal one) in O(1):
+    the last entity takes its place in the entity list and in its type list
+
+    >>> es = EntitySystem([Dragon(E_ENTITY_DRAGON, (0, 0), 1), Adventurer(E_ENTITY_ADVENTURER, (1, 0), 1), Dragon(E_ENTITY_DRAGON, (2, 0), 2)])
+    >>> entity_system_remove_entity(es, es[0])
+    >>> [entity.room_pos for entity in es], [dragon.room_pos for dragon in entity_system_get_all(es, E_ENTITY_DRAGON)]
+    ([(2, 0), (1, 0)], [(2, 0)])
+    """
+    target_slots = entity_system.slots.pop(id(target), None)
+    if target_slots == None:
+        return
+
+    entities_index, type_index = target_slots
+
+    last_entity = entity_system.entities.pop()
+    if last_entity is not target:
+        entity_system.entities[entities_index] = last_entity
+        entity_system.slots[id(last_entity)][0] = entities_index
+
+    type_entities = entity_system.types[target.type]
+    last_entity = type_entities.pop()
+    if last_entity is not target:
+        type_entities[type_index] = last_entity
+        entity_system.slots[id(last_entity)][1] = type_index
+
+    _entity_system_index_remove(entity_system, target)
 
 def entity_system_remove_in_room(entity_system: EntitySystemT, entity_type: EntityE, room_pos: RoomPosT):
-    for i in range(len(entity_system)):
-        entity = entity_system[i]
-        if entity[T_BASE_ENTITY_TYPE] == entity_type and entity[T_BASE_ENTITY_ROOM_POS] == room_pos:
-            entity_system.pop(i)
+    for base_entity in entity_system_get_in_room(entity_system, room_pos):
+        if base_entity.type == entity_type:
+            entity_system_remove_entity(entity_system, base_entity)
 
 def entity_system_render(dungeon, entity_system: EntitySystemT, assets: AssetsT):
     for base_entity in entity_system:
@@ -31,6 +31,21 @@ def fps_manager_create(current_frame_time: float = 0):
 def fps_manager_is_sleeping(fps_manager: FpsManagerT) -> bool:
     return fps_manager[T_FPS_MANAGER_SLEEPING]
 
+def fps_manager_sleep_is_over(fps_manager: FpsManagerT) -> bool:
+    """
+    returns: True if the sleep target is past, without waking up like fps_manager_slept_enough
+
+    >>> fps_manager = fps_manager_create(current_frame_time=1.0)
+    >>> fps_manager_game_sleep(fps_manager, 0.5)
+    >>> fps_manager_sleep_is_over(fps_manager)
+    False
+    >>> fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME] = 1.6
+    >>> fps_manager_sleep_is_over(fps_manager)
+    True
+    """
+    dt = calculate_delta_time(fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME], fps_manager[T_FPS_MANAGER_LAST_HANDLED_FRAME])
+    return (dt - fps_manager[T_FPS_MANAGER_SLEEP_TARGET]) > 0
+
 def fps_manager_slept_enough(fps_manager: FpsManagerT) -> bool:
     """
     if finished sleeping then set sleeping back to False
@@ -39,21 +54,30 @@ def fps_manager_slept_enough(fps_manager: FpsManagerT) -> bool:
     if not fps_manager[T_FPS_MANAGER_SLEEPING]:
         return False
 
-    dt = calculate_delta_time(fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME], fps_manager[T_FPS_MANAGER_LAST_HANDLED_FRAME])
-    target_dt = fps_manager[T_FPS_MANAGER_SLEEP_TARGET]
-
-    slept_enough = (dt - target_dt) > 0
+    slept_enough = fps_manager_sleep_is_over(fps_manager)
 
-    # reset sleeping bool and sleep target to originals before sleep
     if slept_enough: 
-        fps_manager[T_FPS_MANAGER_SLEEPING] = False
-        fps_manager[T_FPS_MANAGER_SLEEP_TARGET] = 0.0
-
-        # reset handled frame so next sleep starts now
-        fps_manager_handled_frame(fps_manager)
+        fps_manager_wake_up(fps_manager)
 
     return slept_enough
 
+def fps_manager_wake_up(fps_manager: FpsManagerT):
+    """
+    stops sleeping now, even if the sleep target isnt past
+
+    >>> fps_manager = fps_manager_create(current_frame_time=1.0)
+    >>> fps_manager_game_sleep(fps_manager, 0.5)
+    >>> fps_manager_wake_up(fps_manager)
+    >>> fps_manager_is_sleeping(fps_manager)
+    False
+    """
+    # reset sleeping bool and sleep target to originals before sleep
+    fps_manager[T_FPS_MANAGER_SLEEPING] = False
+    fps_manager[T_FPS_MANAGER_SLEEP_TARGET] = 0.0
+
+    # reset handled frame so next sleep starts now
+    fps_manager_handled_frame(fps_manager)
+
 def fps_manager_game_sleep(fps_manager: FpsManagerT, time_to_sleep: float):
     """
     sleeps asynchronously by not doing game logic if sleeping. but can still handle events
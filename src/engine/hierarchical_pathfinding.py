@@ -0,0 +1,394 @@
+"""
+hierarchical pathfinding (HPA*) for very large dungeons
+
+the dungeon is split in square clusters, rooms on both sides of an open border between 2 clusters
+are entrances (abstract nodes), linked across the border (cost 1) and to the other entrances of
+their cluster (BFS distance inside the cluster)
+
+a query searches the small abstract graph then refines each abstract step with a BFS inside
+one cluster, so paths are near optimal and not always the BFS path
+
+rooms changes only rebuild the clusters they touch (and the neighbor cluster for border rooms)
+"""
+import heapq
+
+from src.engine.structs.dungeon import *
+
+import src.engine.engine_config as engine_config
+
+
+HierarchicalGraphT = list
+T_HIERARCHICAL_GRAPH_CLUSTER_SIZE    = 0 # int rooms per cluster side
+T_HIERARCHICAL_GRAPH_WIDTH           = 1 # int dungeon cols
+T_HIERARCHICAL_GRAPH_HEIGHT          = 2 # int dungeon rows
+T_HIERARCHICAL_GRAPH_CLUSTER_COLS    = 3 # int
+T_HIERARCHICAL_GRAPH_CLUSTER_ROWS    = 4 # int
+T_HIERARCHICAL_GRAPH_EDIT_CURSOR     = 5 # dungeon edit log position the graph is up to date with
+T_HIERARCHICAL_GRAPH_BORDERS         = 6 # dict (cluster, ROOM_CONNECTION_RIGHT / DOWN) -> list of (room index, room index across)
+T_HIERARCHICAL_GRAPH_CROSSINGS       = 7 # dict room index -> set of room indices across a border
+T_HIERARCHICAL_GRAPH_CLUSTER_EDGES   = 8 # list per cluster: dict entrance -> list of (entrance, distance), None if dirty
+T_HIERARCHICAL_GRAPH_DIRTY_BORDERS   = 9 # set of border keys to rebuild
+T_HIERARCHICAL_GRAPH_SIZE            = 10
+
+HIERARCHICAL_GRAPH_CACHE_KEY = "hierarchical_graph"
+
+# open border runs at least this long get an entrance at each end instead of one in the middle
+LONG_ENTRANCE_LENGTH = 6
+
+def _cluster_of(graph: HierarchicalGraphT, index: int) -> int:
+    cluster_size = graph[T_HIERARCHICAL_GRAPH_CLUSTER_SIZE]
+    width = graph[T_HIERARCHICAL_GRAPH_WIDTH]
+    return (index // width // cluster_size) * graph[T_HIERARCHICAL_GRAPH_CLUSTER_COLS] + (index % width) // cluster_size
+
+def _cluster_get_bounds(graph: HierarchicalGraphT, cluster: int) -> tuple[int, int, int, int]:
+    """
+    returns: (first col, first row, end col, end row) of the cluster, ends excluded
+    """
+    cluster_size = graph[T_HIERARCHICAL_GRAPH_CLUSTER_SIZE]
+    cluster_cols = graph[T_HIERARCHICAL_GRAPH_CLUSTER_COLS]
+    first_col = (cluster % cluster_cols) * cluster_size
+    first_row = (cluster // cluster_cols) * cluster_size
+    end_col = min(first_col + cluster_size, graph[T_HIERARCHICAL_GRAPH_WIDTH])
+    end_row = min(first_row + cluster_size, graph[T_HIERARCHICAL_GRAPH_HEIGHT])
+    return first_col, first_row, end_col, end_row
+
+def _cluster_search(graph: HierarchicalGraphT, adjacency: bytearray, cluster: int, start_index: int, target_index: int = -1) -> dict:
+    """
+    BFS that never leaves the cluster, in NEIGHBOR_DELTAS order
+    returns: dict room index -> parent index (-1 for start), stops early once target_index is found
+    """
+    width = graph[T_HIERARCHICAL_GRAPH_WIDTH]
+    first_col, first_row, end_col, end_row = _cluster_get_bounds(graph, cluster)
+    index_deltas = (-width, 1, width, -1)
+
+    parents = {start_index: -1}
+    queue = [start_index]
+    head = 0
+    while head < len(queue):
+        index = queue[head]
+        head += 1
+        if index == target_index:
+            break
+
+        neighbor_mask = adjacency[index]
+        for direction in range(DOOR_COUNT):
+            if not neighbor_mask & (1 << direction):
+                continue
+
+            neighbor_index = index + index_deltas[direction]
+            if neighbor_index in parents:
+                continue
+
+            col = neighbor_index % width
+            row = neighbor_index // width
+            if first_col <= col < end_col and first_row <= row < end_row:
+                parents[neighbor_index] = index
+                queue.append(neighbor_index)
+
+    return parents
+
+def _cluster_get_distances(graph: HierarchicalGraphT, adjacency: bytearray, cluster: int, start_index: int) -> dict:
+    """
+    returns: dict room index -> distance from start_index inside the cluster
+    """
+    parents = _cluster_search(graph, adjacency, cluster, start_index)
+
+    # BFS discovers parents before children, so dict order gives distances in one pass
+    distances = {}
+    for index, parent_index in parents.items():
+        distances[index] = 0 if parent_index == -1 else distances[parent_index] + 1
+    return distances
+
+def _cluster_get_path(graph: HierarchicalGraphT, adjacency: bytearray, start_index: int, target_index: int) -> list[int]:
+    """
+    returns: room indices from start_index (excluded) to target_index inside their cluster,
+             empty if not connected inside it
+    """
+    parents = _cluster_search(graph, adjacency, _cluster_of(graph, start_index), start_index, target_index)
+    if target_index not in parents:
+        return []
+
+    path = []
+    index = target_index
+    while index != start_index:
+        path.append(index)
+        index = parents[index]
+    path.reverse()
+    return path
+
+def _border_get_rooms(graph: HierarchicalGraphT, cluster: int, direction: int) -> list[tuple[int, int]]:
+    """
+    returns: (room index, room index across) pairs along the RIGHT or DOWN border of the cluster
+    """
+    width = graph[T_HIERARCHICAL_GRAPH_WIDTH]
+    first_col, first_row, end_col, end_row = _cluster_get_bounds(graph, cluster)
+
+    if direction == ROOM_CONNECTION_RIGHT:
+        col = end_col - 1
+        return [(row * width + col, row * width + col + 1) for row in range(first_row, end_row)]
+
+    row = end_row - 1
+    return [(row * width + col, (row + 1) * width + col) for col in range(first_col, end_col)]
+
+def _border_build(graph: HierarchicalGraphT, adjacency: bytearray, border_key: tuple[int, int]):
+    """
+    groups consecutive open crossings of a border and turns each group into entrances
+    """
+    cluster, direction = border_key
+    crossings = graph[T_HIERARCHICAL_GRAPH_CROSSINGS]
+
+    # forget previous entrances of this border
+    for index, index_across in graph[T_HIERARCHICAL_GRAPH_BORDERS].get(border_key, []):
+        crossings[index].discard(index_across)
+        crossings[index_across].discard(index)
+
+    # rooms along the border follow each other DOWN (right border) or RIGHT (down border)
+    along_bit = 1 << (ROOM_CONNECTION_DOWN if direction == ROOM_CONNECTION_RIGHT else ROOM_CONNECTION_RIGHT)
+
+    # a run only goes on while both sides are also connected along the border,
+    # so every crossing of a run reaches its entrances without leaving the 2 clusters
+    transitions = []
+    run = []
+    for index, index_across in _border_get_rooms(graph, cluster, direction) + [(-1, -1)]:
+        is_open = index != -1 and adjacency[index] & (1 << direction)
+        if is_open and run:
+            previous_index, previous_index_across = run[-1]
+            if adjacency[previous_index] & along_bit and adjacency[previous_index_across] & along_bit:
+                run.append((index, index_across))
+                continue
+
+        if len(run) >= LONG_ENTRANCE_LENGTH:
+            transitions.append(run[0])
+            transitions.append(run[-1])
+        elif len(run) > 0:
+            transitions.append(run[len(run) // 2])
+        run = [(index, index_across)] if is_open else []
+
+    for index, index_across in transitions:
+        crossings.setdefault(index, set()).add(index_across)
+        crossings.setdefault(index_across, set()).add(index)
+    graph[T_HIERARCHICAL_GRAPH_BORDERS][border_key] = transitions
+
+def _cluster_get_entrances(graph: HierarchicalGraphT, cluster: int) -> list[int]:
+    """
+    returns: rooms of the cluster with a crossing to another cluster
+    """
+    cluster_cols = graph[T_HIERARCHICAL_GRAPH_CLUSTER_COLS]
+    borders = graph[T_HIERARCHICAL_GRAPH_BORDERS]
+
+    entrances = set()
+    for index, _ in borders.get((cluster, ROOM_CONNECTION_RIGHT), []) + borders.get((cluster, ROOM_CONNECTION_DOWN), []):
+        entrances.add(index)
+
+    # borders owned by the left and up clusters
+    if cluster % cluster_cols > 0:
+        for _, index_across in borders.get((cluster - 1, ROOM_CONNECTION_RIGHT), []):
+            entrances.add(index_across)
+    if cluster >= cluster_cols:
+        for _, index_across in borders.get((cluster - cluster_cols, ROOM_CONNECTION_DOWN), []):
+            entrances.add(index_across)
+
+    return sorted(entrances)
+
+def _cluster_build(graph: HierarchicalGraphT, adjacency: bytearray, cluster: int) -> dict:
+    """
+    returns: intra cluster edges, dict entrance -> list of (entrance, distance)
+    """
+    entrances = _cluster_get_entrances(graph, cluster)
+
+    edges = {}
+    for entrance in entrances:
+        distances = _cluster_get_distances(graph, adjacency, cluster, entrance)
+        edges[entrance] = [(other, distances[other]) for other in entrances if other != entrance and other in distances]
+    return edges
+
+def _hierarchical_graph_create(dungeon: DungeonT, cluster_size: int) -> HierarchicalGraphT:
+    width = dungeon_get_width(dungeon)
+    height = dungeon_get_height(dungeon)
+    cluster_cols = (width + cluster_size - 1) // cluster_size
+    cluster_rows = (height + cluster_size - 1) // cluster_size
+
+    graph = [None] * T_HIERARCHICAL_GRAPH_SIZE
+    graph[T_HIERARCHICAL_GRAPH_CLUSTER_SIZE] = cluster_size
+    graph[T_HIERARCHICAL_GRAPH_WIDTH] = width
+    graph[T_HIERARCHICAL_GRAPH_HEIGHT] = height
+    graph[T_HIERARCHICAL_GRAPH_CLUSTER_COLS] = cluster_cols
+    graph[T_HIERARCHICAL_GRAPH_CLUSTER_ROWS] = cluster_rows
+    graph[T_HIERARCHICAL_GRAPH_EDIT_CURSOR] = dungeon_get_edit_cursor(dungeon)
+    graph[T_HIERARCHICAL_GRAPH_BORDERS] = {}
+    graph[T_HIERARCHICAL_GRAPH_CROSSINGS] = {}
+    graph[T_HIERARCHICAL_GRAPH_CLUSTER_EDGES] = [None] * (cluster_cols * cluster_rows)
+
+    # every border between 2 clusters, built on the first query
+    dirty_borders = set()
+    for cluster in range(cluster_cols * cluster_rows):
+        if cluster % cluster_cols < cluster_cols - 1:
+            dirty_borders.add((cluster, ROOM_CONNECTION_RIGHT))
+        if cluster // cluster_cols < cluster_rows - 1:
+            dirty_borders.add((cluster, ROOM_CONNECTION_DOWN))
+    graph[T_HIERARCHICAL_GRAPH_DIRTY_BORDERS] = dirty_borders
+
+    return graph
+
+def _hierarchical_graph_invalidate_room(graph: HierarchicalGraphT, index: int):
+    """
+    the connections of room ``index`` changed: its cluster is dirty, and if the room
+    is on a cluster border that border and the cluster across are dirty too
+    """
+    cluster_size = graph[T_HIERARCHICAL_GRAPH_CLUSTER_SIZE]
+    cluster_cols = graph[T_HIERARCHICAL_GRAPH_CLUSTER_COLS]
+    width = graph[T_HIERARCHICAL_GRAPH_WIDTH]
+    cluster_edges = graph[T_HIERARCHICAL_GRAPH_CLUSTER_EDGES]
+    dirty_borders = graph[T_HIERARCHICAL_GRAPH_DIRTY_BORDERS]
+
+    col = index % width
+    row = index // width
+    cluster = _cluster_of(graph, index)
+    cluster_edges[cluster] = None
+
+    if col % cluster_size == 0 and col > 0:
+        dirty_borders.add((cluster - 1, ROOM_CONNECTION_RIGHT))
+    if col % cluster_size == cluster_size - 1 and col < width - 1:
+        dirty_borders.add((cluster, ROOM_CONNECTION_RIGHT))
+    if row % cluster_size == 0 and row > 0:
+        dirty_borders.add((cluster - cluster_cols, ROOM_CONNECTION_DOWN))
+    if row % cluster_size == cluster_size - 1 and row < graph[T_HIERARCHICAL_GRAPH_HEIGHT] - 1:
+        dirty_borders.add((cluster, ROOM_CONNECTION_DOWN))
+
+def hierarchical_graph_update(dungeon: DungeonT) -> HierarchicalGraphT:
+    """
+    returns: the abstract graph of the dungeon kept in its caches,
+             after invalidating the clusters touched by the room changes since last call
+    """
+    cluster_size = engine_config.HIERARCHICAL_PATHFINDING_CLUSTER_SIZE
+    graph = dungeon.caches.get(HIERARCHICAL_GRAPH_CACHE_KEY)
+
+    edits = None
+    if graph != None and graph[T_HIERARCHICAL_GRAPH_CLUSTER_SIZE] == cluster_size:
+        edits = dungeon_get_edits(dungeon, graph[T_HIERARCHICAL_GRAPH_EDIT_CURSOR])
+
+    # no graph yet, or rooms replaced as a whole
+    if edits == None:
+        graph = _hierarchical_graph_create(dungeon, cluster_size)
+        dungeon.caches[HIERARCHICAL_GRAPH_CACHE_KEY] = graph
+        return graph
+
+    for index in set(edits):
+        _hierarchical_graph_invalidate_room(graph, index)
+    graph[T_HIERARCHICAL_GRAPH_EDIT_CURSOR] = dungeon_get_edit_cursor(dungeon)
+    return graph
+
+def _hierarchical_graph_rebuild_dirty(graph: HierarchicalGraphT, adjacency: bytearray):
+    """
+    rebuilds dirty borders, then the clusters whose entrances they changed
+    """
+    cluster_cols = graph[T_HIERARCHICAL_GRAPH_CLUSTER_COLS]
+    cluster_edges = graph[T_HIERARCHICAL_GRAPH_CLUSTER_EDGES]
+    dirty_borders = graph[T_HIERARCHICAL_GRAPH_DIRTY_BORDERS]
+
+    for border_key in dirty_borders:
+        _border_build(graph, adjacency, border_key)
+
+        # both clusters sharing the border get new entrances
+        cluster, direction = border_key
+        cluster_edges[cluster] = None
+        cluster_edges[cluster + 1 if direction == ROOM_CONNECTION_RIGHT else cluster + cluster_cols] = None
+    dirty_borders.clear()
+
+def _hierarchical_graph_get_cluster_edges(graph: HierarchicalGraphT, adjacency: bytearray, cluster: int) -> dict:
+    cluster_edges = graph[T_HIERARCHICAL_GRAPH_CLUSTER_EDGES]
+    if cluster_edges[cluster] == None:
+        cluster_edges[cluster] = _cluster_build(graph, adjacency, cluster)
+    return cluster_edges[cluster]
+
+def hierarchical_find_path(dungeon: DungeonT, start_index: int, target_index: int) -> list[int]:
+    """
+    returns: room indices from start_index (excluded) to target_index (included),
+             empty if unreachable or start_index == target_index
+    near optimal: the path goes through cluster entrances, clusters are only built when a search needs them
+    """
+    if start_index == target_index:
+        return []
+
+    graph = hierarchical_graph_update(dungeon)
+    adjacency = dungeon_get_adjacency(dungeon)
+    _hierarchical_graph_rebuild_dirty(graph, adjacency)
+
+    width = graph[T_HIERARCHICAL_GRAPH_WIDTH]
+    crossings = graph[T_HIERARCHICAL_GRAPH_CROSSINGS]
+    start_cluster = _cluster_of(graph, start_index)
+    target_cluster = _cluster_of(graph, target_index)
+
+    # same cluster and connected inside it, no need for the abstract graph
+    if start_cluster == target_cluster:
+        path = _cluster_get_path(graph, adjacency, start_index, target_index)
+        if path:
+            return path
+
+    # temporary edges from start to its cluster entrances and from target cluster entrances to target
+    start_distances = _cluster_get_distances(graph, adjacency, start_cluster, start_index)
+    target_distances = _cluster_get_distances(graph, adjacency, target_cluster, target_index)
+    start_edges = [(entrance, start_distances[entrance]) for entrance in _hierarchical_graph_get_cluster_edges(graph, adjacency, start_cluster) if entrance in start_distances]
+    if start_index in crossings:
+        start_edges += [(index_across, 1) for index_across in crossings[start_index]]
+
+    target_col = target_index % width
+    target_row = target_index // width
+
+    # A* over entrances, manhattan distance heuristic
+    costs = {start_index: 0}
+    parents = {start_index: -1}
+    closed = set()
+    heap = [(abs(start_index % width - target_col) + abs(start_index // width - target_row), 0, start_index)]
+    found = False
+    while heap:
+        _, cost, index = heapq.heappop(heap)
+        if index in closed:
+            continue
+        closed.add(index)
+
+        if index == target_index:
+            found = True
+            break
+
+        if index == start_index:
+            edges = start_edges
+        else:
+            edges = _hierarchical_graph_get_cluster_edges(graph, adjacency, _cluster_of(graph, index)).get(index, [])
+            edges = edges + [(index_across, 1) for index_across in crossings.get(index, ())]
+
+        # entrances of the target cluster can finish the path
+        if index in target_distances and _cluster_of(graph, index) == target_cluster:
+            edges = edges + [(target_index, target_distances[index])]
+
+        for neighbor_index, distance in edges:
+            next_cost = cost + distance
+            if neighbor_index in closed or next_cost >= costs.get(neighbor_index, next_cost + 1):
+                continue
+
+            costs[neighbor_index] = next_cost
+            parents[neighbor_index] = index
+            heuristic = abs(neighbor_index % width - target_col) + abs(neighbor_index // width - target_row)
+            heapq.heappush(heap, (next_cost + heuristic, next_cost, neighbor_index))
+
+    if not found:
+        return []
+
+    abstract_path = []
+    index = target_index
+    while index != -1:
+        abstract_path.append(index)
+        index = parents[index]
+    abstract_path.reverse()
+
+    # refine every abstract step, crossings are a single move
+    path = []
+    for i in range(len(abstract_path) - 1):
+        from_index = abstract_path[i]
+        to_index = abstract_path[i + 1]
+        if _cluster_of(graph, from_index) != _cluster_of(graph, to_index):
+            path.append(to_index)
+        else:
+            path += _cluster_get_path(graph, adjacency, from_index, to_index)
+
+    return path
@@ -259,7 +259,16 @@ def game_data_parse_file(game_data: GameDataT, game_save_file_path: str) -> bool
     return True
 
 def _to_json_safe(obj) -> str:
-    if isinstance(obj, tuple):
+    if isinstance(obj, DungeonGrid):
+        # packed rooms as hex string, way smaller than a list of tuples
+        return {"__dungeon__": [dungeon_get_height(obj), dungeon_get_width(obj), obj.cells.hex()]}
+    elif isinstance(obj, EntitySystem):
+        # just the entities, the room index is rebuilt on load
+        return {"__entity_system__": [_to_json_safe(x) for x in obj]}
+    elif isinstance(obj, BaseEntity):
+        # field values in T_* order, like the old entity lists
+        return {"__entity__": [_to_json_safe(x) for x in obj]}
+    elif isinstance(obj, tuple):
         return {"__tuple__": [_to_json_safe(x) for x in obj]}
     elif isinstance(obj, list):
         return [_to_json_safe(x) for x in obj]
@@ -273,12 +282,35 @@ def _from_json_safe(obj):
     if isinstance(obj, dict):
         if "__tuple__" in obj:
             return tuple(_from_json_safe(x) for x in obj["__tuple__"])
+        if "__dungeon__" in obj:
+            rows, cols, cells = obj["__dungeon__"]
+            dungeon = dungeon_create(rows, cols)
+            dungeon.cells = bytearray.fromhex(cells)
+            return dungeon
+        if "__entity_system__" in obj:
+            return _entity_system_from_json_safe(obj["__entity_system__"])
+        if "__entity__" in obj:
+            return base_entity_from_values(_from_json_safe(obj["__entity__"]))
         return {k: _from_json_safe(v) for k, v in obj.items()}
     elif isinstance(obj, list):
         return [_from_json_safe(x) for x in obj]
     else:
         return obj
 
+def _entity_system_from_json_safe(entities: list) -> EntitySystemT:
+    """
+    older saves stored entities as plain lists, those become records too
+    """
+    entity_system: EntitySystemT = entity_system_create()
+
+    for entity in entities:
+        entity = _from_json_safe(entity)
+        if isinstance(entity, list):
+            entity = base_entity_from_values(entity)
+        entity_system_add_entity(entity_system, entity)
+
+    return entity_system
+
 def _copy_temp_events(event_system) -> GameEventSystemT:
     """
     copies temp events but doesnt copy T_GAME_EVENT_GAME_CTX
@@ -305,21 +337,47 @@ def serialize_game_context(game_context: GameContextT) -> str:
     event_system: GameEventSystemT = game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_EVENT_SYSTEM]
     saved_events = temporary_game_event_save_events(event_system)
 
-    # temporarily remove event_system before copying game data
+    # temporarily remove event_system while converting game data
     game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_EVENT_SYSTEM] = None
 
+    # same for the dragon batch, its rebuilt from the entities after loading
+    dragon_batch = game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_DRAGON_BATCH]
+    game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_DRAGON_BATCH] = None
+
+    # no copy needed, _to_json_safe builds new json lists and dicts without changing game data
     simple_game_context: list = [None] * _T_SIMPLE_GAME_CTX_COUNT
-    simple_game_context[_T_SIMPLE_GAME_CTX_GAME_FLAGS] = deepcopy(game_context[T_GAME_CTX_GAME_FLAGS])
-    simple_game_context[_T_SIMPLE_GAME_CTX_GAME_DATA] = deepcopy(game_context[T_GAME_CTX_GAME_DATA])
+    simple_game_context[_T_SIMPLE_GAME_CTX_GAME_FLAGS] = game_context[T_GAME_CTX_GAME_FLAGS]
+    simple_game_context[_T_SIMPLE_GAME_CTX_GAME_DATA] = game_context[T_GAME_CTX_GAME_DATA]
     simple_game_context[_T_SIMPLE_GAME_CTX_ORIGINAL_GAME_DATA] = game_context[T_GAME_CTX_ORIGINAL_GAME_DATA]
     simple_game_context[_T_SIMPLE_GAME_CTX_SAVED_EVENTS] = saved_events
 
-    game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_EVENT_SYSTEM] = event_system
-
     ret = _to_json_safe(simple_game_context)
 
+    game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_EVENT_SYSTEM] = event_system
+    game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_DRAGON_BATCH] = dragon_batch
+
     return json.dumps(ret)
 
+def serialize_game_data(game_data: GameDataT) -> str:
+    """
+    game data without its event system and dragon batch, on one line
+    """
+    simple_game_data = list(game_data)
+    simple_game_data[T_GAME_DATA_EVENT_SYSTEM] = None
+    simple_game_data[T_GAME_DATA_DRAGON_BATCH] = None
+
+    return json.dumps(_to_json_safe(simple_game_data))
+
+def deserialize_game_data(serialized_data: str) -> GameDataT:
+    """
+    game data from serialize_game_data, its event system is set up when the game is loaded (see load_game_data)
+    """
+    game_data = _from_json_safe(json.loads(serialized_data))
+
+    # older game data has less fields
+    game_data += [None] * (T_GAME_DATA_COUNT - len(game_data))
+    return game_data
+
 def deserialize_game_context(game_context: GameContextT, serialized_data: str):
     deserialized_simple_game_context = _from_json_safe(json.loads(serialized_data))
 
@@ -335,25 +393,39 @@ def deserialize_game_context(game_context: GameContextT, serialized_data: str):
     game_context[T_GAME_CTX_GAME_DATA][:] = deserialized_simple_game_context[_T_SIMPLE_GAME_CTX_GAME_DATA]
     game_context[T_GAME_CTX_ORIGINAL_GAME_DATA][:] = deserialized_simple_game_context[_T_SIMPLE_GAME_CTX_ORIGINAL_GAME_DATA]
 
+    # older saves stored the dungeon as a list of rows of rooms
+    for game_data in (game_context[T_GAME_CTX_GAME_DATA], game_context[T_GAME_CTX_ORIGINAL_GAME_DATA]):
+        # and had less game data fields
+        game_data += [None] * (T_GAME_DATA_COUNT - len(game_data))
+        if isinstance(game_data[T_DUNGEON_DATA_DUNGEON], list):
+            game_data[T_DUNGEON_DATA_DUNGEON] = dungeon_from_rooms(game_data[T_DUNGEON_DATA_DUNGEON])
+        # and the entities as a plain list
+        if isinstance(game_data[T_DUNGEON_DATA_ENTITY_SYSTEM], list):
+            game_data[T_DUNGEON_DATA_ENTITY_SYSTEM] = _entity_system_from_json_safe(game_data[T_DUNGEON_DATA_ENTITY_SYSTEM])
+
     # restore entity system
     game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_EVENT_SYSTEM] = entity_system
 
-def save_game(game_context: GameContextT):
+def save_game(game_context: GameContextT) -> str:
     """
     saves game context to a file
+    returns: the saved data
     """
     serialized_data: str = serialize_game_context(game_context)
 
     with open(GAME_SAVE_FILE_PATH, "w") as f:
         f.write(serialized_data)
 
-def load_saved_game(game_context):
+    return serialized_data
+
+def load_saved_game(game_context) -> str | NoneType:
     """
     reaload game context from file
+    returns: the loaded data, None if there is no save file
     """
     # if save file doesnt exist do nothing
     if not path_exists(GAME_SAVE_FILE_PATH):
-        return
+        return None
 
     serialized_data = ""
 
@@ -363,3 +435,5 @@ def load_saved_game(game_context):
     # reload game_context
     deserialize_game_context(game_context, serialized_data)
 
+    return serialized_data
+
@@ -1,10 +1,15 @@
+import heapq
 import random
+from array import array
+from collections import OrderedDict
 
 from src.engine.structs.entity import *
 from src.engine.structs.adventurer import *
 from src.engine.structs.dragon import *
 from src.engine.structs.dungeon import *
 from src.engine.structs.treasure import *
+from src.engine.hierarchical_pathfinding import hierarchical_find_path
+import src.engine.engine_config as engine_config
 
 from src.game.game_definitions import *
 
@@ -41,69 +46,938 @@ from src.utils.entity_utils import *
 #                 
 #     return closest_dragon
 
-def find_path(dungeon: DungeonT, start_room: RoomPosT, target_room: RoomPosT) -> MovementPathT:
+def _path_from_parents(parents: array, width: int, target_index: int) -> MovementPathT:
     """
-    Calculates the shortest path via Breadth-First Search (BFS)
+    walks the flat parent array back from target_index to the start room (parent -1)
+    returns: path without the start room, built once at the end of a search
+    """
+    path = []
+    index = target_index
+    while parents[index] != -1:
+        path.append(room_pos_create(col=index % width, row=index // width))
+        index = parents[index]
+
+    path.reverse()
+    return path
+
+# ---------- DISTANCE FIELD ----------
+
+# single source BFS result, every target query from the same start room is a lookup
+# it can be repaired after room rotations instead of recomputed (see distance_field_repair)
+DistanceFieldT = list
+T_DISTANCE_FIELD_START_ROOM  = 0 # RoomPosT
+T_DISTANCE_FIELD_WIDTH       = 1 # int
+T_DISTANCE_FIELD_HEIGHT      = 2 # int
+T_DISTANCE_FIELD_DISTANCES   = 3 # array('i') rooms from start, width * height if unreachable
+T_DISTANCE_FIELD_PARENTS     = 4 # array('i') index of previous room on the BFS path, -1 for start / unreachable
+                                 # None once repaired, paths are then rebuilt from the distances
+T_DISTANCE_FIELD_LOOKAHEADS  = 5 # array('i') | None, LPA* rhs: 1 + smallest neighbor distance, created on first repair
+T_DISTANCE_FIELD_EDIT_CURSOR = 6 # dungeon edit log position the field is up to date with
+T_DISTANCE_FIELD_SIZE        = 7
+
+DISTANCE_FIELD_CACHE_KEY = "distance_field"
+
+def distance_field_create(dungeon: DungeonT, start_room: RoomPosT) -> DistanceFieldT:
+    """
+    runs one BFS from start_room and keeps distance and parent of every room
+    neighbors are expanded in NEIGHBOR_DELTAS order, so paths are the same as find_path
+    """
+    width = dungeon_get_width(dungeon)
+    height = dungeon_get_height(dungeon)
+    room_count = width * height
+    unreachable = room_count # longer than any path
+
+    distances = array("i", [unreachable]) * room_count
+    parents = array("i", [-1]) * room_count
+
+    distance_field = [None] * T_DISTANCE_FIELD_SIZE
+    distance_field[T_DISTANCE_FIELD_START_ROOM] = start_room
+    distance_field[T_DISTANCE_FIELD_WIDTH] = width
+    distance_field[T_DISTANCE_FIELD_HEIGHT] = height
+    distance_field[T_DISTANCE_FIELD_DISTANCES] = distances
+    distance_field[T_DISTANCE_FIELD_PARENTS] = parents
+    distance_field[T_DISTANCE_FIELD_EDIT_CURSOR] = dungeon_get_edit_cursor(dungeon)
+
+    if not dungeon_room_pos_in_bounds(dungeon, start_room):
+        return distance_field
+
+    adjacency = dungeon_get_adjacency(dungeon)
+    index_deltas = (-width, 1, width, -1) # NEIGHBOR_DELTAS order
+
+    start_index = start_room[ROOM_POS_ROW] * width + start_room[ROOM_POS_COL]
+    distances[start_index] = 0
+
+    # index based queue, rooms are never queued twice
+    queue = [start_index]
+    head = 0
+    while head < len(queue):
+        index = queue[head]
+        head += 1
+
+        neighbor_mask = adjacency[index]
+        next_distance = distances[index] + 1
+        for direction in range(DOOR_COUNT):
+            if neighbor_mask & (1 << direction):
+                neighbor_index = index + index_deltas[direction]
+                if distances[neighbor_index] == unreachable:
+                    distances[neighbor_index] = next_distance
+                    parents[neighbor_index] = index
+                    queue.append(neighbor_index)
+
+    return distance_field
+
+def _distance_field_update_lookahead(distance_field: DistanceFieldT, adjacency: bytearray, heap: list, start_index: int, index: int):
+    """
+    LPA* UpdateVertex: recomputes the lookahead of room ``index`` and queues it if inconsistent
+    """
+    distances = distance_field[T_DISTANCE_FIELD_DISTANCES]
+    lookaheads = distance_field[T_DISTANCE_FIELD_LOOKAHEADS]
+    width = distance_field[T_DISTANCE_FIELD_WIDTH]
+
+    if index != start_index:
+        lookahead = width * distance_field[T_DISTANCE_FIELD_HEIGHT] # unreachable
+        neighbor_mask = adjacency[index]
+        for direction, index_delta in enumerate((-width, 1, width, -1)):
+            if neighbor_mask & (1 << direction):
+                lookahead = min(lookahead, distances[index + index_delta] + 1)
+        lookaheads[index] = lookahead
+
+    if distances[index] != lookaheads[index]:
+        heapq.heappush(heap, (min(distances[index], lookaheads[index]), index))
+
+def distance_field_repair(distance_field: DistanceFieldT, dungeon: DungeonT) -> bool:
+    """
+    brings the field up to date with the room changes logged since it was computed,
+    only the rooms whose distance changed are visited (LPA* without goal, run until consistent)
+    returns: False if the rooms were replaced as a whole, the field has to be recreated
+    """
+    edits = dungeon_get_edits(dungeon, distance_field[T_DISTANCE_FIELD_EDIT_CURSOR])
+    if edits == None:
+        return False
+
+    distance_field[T_DISTANCE_FIELD_EDIT_CURSOR] = dungeon_get_edit_cursor(dungeon)
+    if len(edits) == 0:
+        return True
+
+    width = distance_field[T_DISTANCE_FIELD_WIDTH]
+    height = distance_field[T_DISTANCE_FIELD_HEIGHT]
+    unreachable = width * height
+    start_room = distance_field[T_DISTANCE_FIELD_START_ROOM]
+    if not dungeon_room_pos_in_bounds(dungeon, start_room):
+        return True # nothing is reachable whatever the rooms
+    start_index = start_room[ROOM_POS_ROW] * width + start_room[ROOM_POS_COL]
+
+    distances = distance_field[T_DISTANCE_FIELD_DISTANCES]
+    if distance_field[T_DISTANCE_FIELD_LOOKAHEADS] == None:
+        # field is consistent, so lookaheads are the distances
+        distance_field[T_DISTANCE_FIELD_LOOKAHEADS] = array("i", distances)
+    lookaheads = distance_field[T_DISTANCE_FIELD_LOOKAHEADS]
+
+    # parents can be wrong now, paths come from the distances
+    distance_field[T_DISTANCE_FIELD_PARENTS] = None
+
+    adjacency = dungeon_get_adjacency(dungeon)
+    index_deltas = (-width, 1, width, -1)
+    heap = []
+
+    # a changed room also changed the doors its neighbors see
+    for index in set(edits):
+        _distance_field_update_lookahead(distance_field, adjacency, heap, start_index, index)
+        col = index % width
+        row = index // width
+        for d_col, d_row, direction in NEIGHBOR_DELTAS:
+            if 0 <= col + d_col < width and 0 <= row + d_row < height:
+                _distance_field_update_lookahead(distance_field, adjacency, heap, start_index, index + index_deltas[direction])
+
+    while heap:
+        key, index = heapq.heappop(heap)
+        distance = distances[index]
+        lookahead = lookaheads[index]
+
+        # stale entry, the room was fixed or queued again with another key
+        if distance == lookahead or key != min(distance, lookahead):
+            continue
+
+        if distance > lookahead:
+            # got closer
+            distances[index] = lookahead
+        else:
+            # got further, forget the distance and let the neighbors tell the new one
+            distances[index] = unreachable
+            _distance_field_update_lookahead(distance_field, adjacency, heap, start_index, index)
+
+        neighbor_mask = adjacency[index]
+        for direction in range(DOOR_COUNT):
+            if neighbor_mask & (1 << direction):
+                _distance_field_update_lookahead(distance_field, adjacency, heap, start_index, index + index_deltas[direction])
+
+    return True
+
+def distance_field_update(dungeon: DungeonT, start_room: RoomPosT) -> DistanceFieldT:
+    """
+    returns: the distance field from start_room kept in the dungeon caches between frames,
+             repaired after room rotations, recomputed only when start_room or the whole layout changed
+    """
+    distance_field = dungeon.caches.get(DISTANCE_FIELD_CACHE_KEY)
+
+    if distance_field == None or distance_field[T_DISTANCE_FIELD_START_ROOM] != start_room or not distance_field_repair(distance_field, dungeon):
+        distance_field = distance_field_create(dungeon, start_room)
+        dungeon.caches[DISTANCE_FIELD_CACHE_KEY] = distance_field
+
+    return distance_field
+
+def _distance_field_get_index(distance_field: DistanceFieldT, room_pos: RoomPosT) -> int:
+    """
+    returns: index of room_pos in the field arrays, -1 if out of bounds
+    """
+    col = room_pos[ROOM_POS_COL]
+    row = room_pos[ROOM_POS_ROW]
+    width = distance_field[T_DISTANCE_FIELD_WIDTH]
+    if col < 0 or row < 0 or col >= width or row >= distance_field[T_DISTANCE_FIELD_HEIGHT]:
+        return -1
+
+    return row * width + col
+
+def distance_field_get_distance(distance_field: DistanceFieldT, room_pos: RoomPosT) -> int:
+    """
+    returns: number of moves from the start room to room_pos, -1 if unreachable
+    """
+    index = _distance_field_get_index(distance_field, room_pos)
+    if index == -1:
+        return -1
+
+    distance = distance_field[T_DISTANCE_FIELD_DISTANCES][index]
+    if distance == distance_field[T_DISTANCE_FIELD_WIDTH] * distance_field[T_DISTANCE_FIELD_HEIGHT]:
+        return -1
+
+    return distance
+
+def distance_field_is_accessible(distance_field: DistanceFieldT, room_pos: RoomPosT) -> bool:
+    """
+    returns: True if there is a non empty path from the start room to room_pos
+    """
+    return distance_field_get_distance(distance_field, room_pos) > 0
+
+def distance_field_get_next_index(distance_field: DistanceFieldT, adjacency: bytearray, index: int) -> int:
+    """
+    same as distance_field_get_next_room but on flat room indices (row * width + col)
+    returns: -1 if index is the start room or cant reach it
+    """
+    distances = distance_field[T_DISTANCE_FIELD_DISTANCES]
+    distance = distances[index]
+    width = distance_field[T_DISTANCE_FIELD_WIDTH]
+    if distance == 0 or distance == width * distance_field[T_DISTANCE_FIELD_HEIGHT]:
+        return -1
+
+    neighbor_mask = adjacency[index]
+    for direction, index_delta in enumerate((-width, 1, width, -1)):
+        if neighbor_mask & (1 << direction) and distances[index + index_delta] == distance - 1:
+            return index + index_delta
+
+    return -1
+
+def distance_field_get_next_room(distance_field: DistanceFieldT, dungeon: DungeonT, room_pos: RoomPosT) -> RoomPosT | NoneType:
+    """
+    flow field lookup: the neighbor of room_pos one room closer to the start room,
+    first in BFS order (UP, RIGHT, DOWN, LEFT) when several are
+    returns: None if room_pos is the start room or cant reach it
+    """
+    if distance_field_get_distance(distance_field, room_pos) <= 0:
+        return None
+
+    width = distance_field[T_DISTANCE_FIELD_WIDTH]
+    next_index = distance_field_get_next_index(distance_field, dungeon_get_adjacency(dungeon), room_pos[ROOM_POS_ROW] * width + room_pos[ROOM_POS_COL])
+    if next_index == -1:
+        return None
+
+    return room_pos_create(col=next_index % width, row=next_index // width)
+
+def _distance_field_get_path_from_distances(distance_field: DistanceFieldT, adjacency: bytearray, target_index: int) -> MovementPathT:
+    """
+    rebuilds the BFS path without parents:
+        - marks every room on a shortest path to the target, walking distances down from it
+        - goes forward from the start taking the first direction (BFS order) that stays on a marked room
+    only visits rooms between start and target, not the whole dungeon
+    """
+    width = distance_field[T_DISTANCE_FIELD_WIDTH]
+    distances = distance_field[T_DISTANCE_FIELD_DISTANCES]
+    index_deltas = (-width, 1, width, -1)
+
+    on_shortest_path = {target_index}
+    stack = [target_index]
+    while stack:
+        index = stack.pop()
+        neighbor_mask = adjacency[index]
+        previous_distance = distances[index] - 1
+        for direction in range(DOOR_COUNT):
+            if neighbor_mask & (1 << direction):
+                neighbor_index = index + index_deltas[direction]
+                if distances[neighbor_index] == previous_distance and neighbor_index not in on_shortest_path:
+                    on_shortest_path.add(neighbor_index)
+                    stack.append(neighbor_index)
+
+    start_room = distance_field[T_DISTANCE_FIELD_START_ROOM]
+    index = start_room[ROOM_POS_ROW] * width + start_room[ROOM_POS_COL]
+    path = []
+    while index != target_index:
+        neighbor_mask = adjacency[index]
+        next_distance = distances[index] + 1
+        for direction in range(DOOR_COUNT):
+            if neighbor_mask & (1 << direction):
+                neighbor_index = index + index_deltas[direction]
+                if distances[neighbor_index] == next_distance and neighbor_index in on_shortest_path:
+                    index = neighbor_index
+                    break
+        path.append(room_pos_create(col=index % width, row=index // width))
+
+    return path
+
+def distance_field_get_path(distance_field: DistanceFieldT, target_room: RoomPosT, dungeon: DungeonT | NoneType = None) -> MovementPathT:
+    """
+    returns: path from the start room (excluded) to target_room (included),
+             empty if unreachable or target_room is the start room
+    dungeon: needed once the field was repaired, to walk its doors
+    """
+    distance = distance_field_get_distance(distance_field, target_room)
+    if distance <= 0:
+        return []
+
+    width = distance_field[T_DISTANCE_FIELD_WIDTH]
+    target_index = target_room[ROOM_POS_ROW] * width + target_room[ROOM_POS_COL]
+
+    parents = distance_field[T_DISTANCE_FIELD_PARENTS]
+    if parents != None:
+        return _path_from_parents(parents, width, target_index)
+
+    if dungeon == None:
+        log_error("[distance_field_get_path] repaired distance field needs the dungeon to rebuild paths")
+        return []
+
+    return _distance_field_get_path_from_distances(distance_field, dungeon_get_adjacency(dungeon), target_index)
+
+def _search_begin(dungeon: DungeonT, start_room: RoomPosT, target_room: RoomPosT) -> tuple[int, int] | NoneType:
+    """
+    shared checks of the searches below
+    returns: (start_index, target_index) or None if there is nothing to search
     """
     if start_room == target_room:
+        return None
+
+    if not dungeon_room_pos_in_bounds(dungeon, start_room) or not dungeon_room_pos_in_bounds(dungeon, target_room):
+        return None
+
+    width = dungeon_get_width(dungeon)
+    start_index = start_room[ROOM_POS_ROW] * width + start_room[ROOM_POS_COL]
+    target_index = target_room[ROOM_POS_ROW] * width + target_room[ROOM_POS_COL]
+    return start_index, target_index
+
+# ---------- ALL PAIRS ----------
+
+# next hop table for small and medium dungeons: next_hops[target * room_count + source] is the
+# room after source on the BFS path to target, tables are per dungeon version and filled one
+# target column at a time (one BFS from the target answers every source), then paths are table walks
+AllPairsT = list
+T_ALL_PAIRS_VERSION       = 0 # int dungeon version the table is for
+T_ALL_PAIRS_WIDTH         = 1 # int
+T_ALL_PAIRS_ROOM_COUNT    = 2 # int
+T_ALL_PAIRS_NEXT_HOPS     = 3 # array('H'), ALL_PAIRS_NO_ROOM if unreachable or source == target
+T_ALL_PAIRS_BUILT_TARGETS = 4 # bytearray, 1 once the column of that target is filled
+T_ALL_PAIRS_SIZE          = 5
+
+ALL_PAIRS_NO_ROOM = 0xFFFF
+ALL_PAIRS_CACHE_KEY = "all_pairs"
+
+def all_pairs_fits(dungeon: DungeonT) -> bool:
+    """
+    returns: True if the next hop table of the dungeon fits in engine_config.ALL_PAIRS_MAX_BYTES
+    """
+    room_count = dungeon_get_width(dungeon) * dungeon_get_height(dungeon)
+    return room_count < ALL_PAIRS_NO_ROOM and room_count * room_count * 2 <= engine_config.ALL_PAIRS_MAX_BYTES
+
+def all_pairs_get(dungeon: DungeonT) -> AllPairsT | NoneType:
+    """
+    returns: the next hop table of the current dungeon version (kept in the dungeon caches),
+             None if the dungeon is too big for the memory budget
+    """
+    if not all_pairs_fits(dungeon):
+        return None
+
+    all_pairs = dungeon.caches.get(ALL_PAIRS_CACHE_KEY)
+    if all_pairs != None and all_pairs[T_ALL_PAIRS_VERSION] == dungeon_get_version(dungeon):
+        return all_pairs
+
+    room_count = dungeon_get_width(dungeon) * dungeon_get_height(dungeon)
+    if all_pairs != None and all_pairs[T_ALL_PAIRS_ROOM_COUNT] == room_count:
+        # same size, only the columns built for the old version are reset instead of a new table
+        next_hops = all_pairs[T_ALL_PAIRS_NEXT_HOPS]
+        built_targets = all_pairs[T_ALL_PAIRS_BUILT_TARGETS]
+        empty_column = array("H", [ALL_PAIRS_NO_ROOM]) * room_count
+        for target_index in range(room_count):
+            if built_targets[target_index]:
+                column = target_index * room_count
+                next_hops[column:column + room_count] = empty_column
+                built_targets[target_index] = 0
+    else:
+        all_pairs = [None] * T_ALL_PAIRS_SIZE
+        all_pairs[T_ALL_PAIRS_ROOM_COUNT] = room_count
+        all_pairs[T_ALL_PAIRS_NEXT_HOPS] = array("H", [ALL_PAIRS_NO_ROOM]) * (room_count * room_count)
+        all_pairs[T_ALL_PAIRS_BUILT_TARGETS] = bytearray(room_count)
+        dungeon.caches[ALL_PAIRS_CACHE_KEY] = all_pairs
+
+    all_pairs[T_ALL_PAIRS_VERSION] = dungeon_get_version(dungeon)
+    all_pairs[T_ALL_PAIRS_WIDTH] = dungeon_get_width(dungeon)
+    return all_pairs
+
+def _all_pairs_build_target(all_pairs: AllPairsT, adjacency: bytearray, target_index: int):
+    """
+    fills the column of target_index: BFS from the target, then each source goes to its
+    first neighbor (BFS order) one room closer, which is the first move of the BFS path
+    """
+    width = all_pairs[T_ALL_PAIRS_WIDTH]
+    room_count = all_pairs[T_ALL_PAIRS_ROOM_COUNT]
+    next_hops = all_pairs[T_ALL_PAIRS_NEXT_HOPS]
+    index_deltas = (-width, 1, width, -1)
+
+    distances = array("i", [-1]) * room_count
+    distances[target_index] = 0
+    queue = [target_index]
+    head = 0
+    while head < len(queue):
+        index = queue[head]
+        head += 1
+        neighbor_mask = adjacency[index]
+        for direction in range(DOOR_COUNT):
+            if neighbor_mask & (1 << direction):
+                neighbor_index = index + index_deltas[direction]
+                if distances[neighbor_index] == -1:
+                    distances[neighbor_index] = distances[index] + 1
+                    queue.append(neighbor_index)
+
+    column = target_index * room_count
+    for source_index in queue[1:]:
+        neighbor_mask = adjacency[source_index]
+        next_distance = distances[source_index] - 1
+        for direction in range(DOOR_COUNT):
+            if neighbor_mask & (1 << direction):
+                neighbor_index = source_index + index_deltas[direction]
+                if distances[neighbor_index] == next_distance:
+                    next_hops[column + source_index] = neighbor_index
+                    break
+
+    all_pairs[T_ALL_PAIRS_BUILT_TARGETS][target_index] = 1
+
+def all_pairs_get_next_hop(all_pairs: AllPairsT, dungeon: DungeonT, start_index: int, target_index: int) -> int:
+    """
+    returns: index of the room after start_index on the BFS path to target_index,
+             ALL_PAIRS_NO_ROOM if unreachable or start_index == target_index
+    """
+    if not all_pairs[T_ALL_PAIRS_BUILT_TARGETS][target_index]:
+        _all_pairs_build_target(all_pairs, dungeon_get_adjacency(dungeon), target_index)
+
+    return all_pairs[T_ALL_PAIRS_NEXT_HOPS][target_index * all_pairs[T_ALL_PAIRS_ROOM_COUNT] + start_index]
+
+def all_pairs_get_path(all_pairs: AllPairsT, dungeon: DungeonT, start_room: RoomPosT, target_room: RoomPosT) -> MovementPathT:
+    """
+    returns: same path as find_path with BFS, walked from the table
+    """
+    indices = _search_begin(dungeon, start_room, target_room)
+    if indices == None:
+        return []
+    start_index, target_index = indices
+
+    width = all_pairs[T_ALL_PAIRS_WIDTH]
+    index = all_pairs_get_next_hop(all_pairs, dungeon, start_index, target_index)
+    if index == ALL_PAIRS_NO_ROOM:
         return []
 
-    queue = [(start_room, [])]
-    
-    # Set of visited rooms to avoid going in circles
-    visited = {start_room}
+    next_hops = all_pairs[T_ALL_PAIRS_NEXT_HOPS]
+    column = target_index * all_pairs[T_ALL_PAIRS_ROOM_COUNT]
+    path = [room_pos_create(col=index % width, row=index // width)]
+    while index != target_index:
+        index = next_hops[column + index]
+        path.append(room_pos_create(col=index % width, row=index // width))
+
+    return path
+
+# ---------- BITBOARDS ----------
+
+# one big int per door direction, bit row * width + col is set if that room is connected
+# to its neighbor in the direction, flood fills then move a whole set of rooms per shift
+BitboardsT = tuple[int, int, int, int] # ROOM_CONNECTION_x order
+BITBOARDS_CACHE_KEY = "bitboards"
+
+# adjacency byte -> b'1' or b'0' for one direction, so planes are built by bytes.translate
+_BITBOARD_PLANE_TABLES = tuple(
+    bytes(ord("1") if neighbor_mask & (1 << direction) else ord("0") for neighbor_mask in range(PACKED_ROOM_COUNT))
+    for direction in range(DOOR_COUNT)
+)
+
+def _bitboards_build(dungeon: DungeonT) -> BitboardsT:
+    adjacency = dungeon_get_adjacency(dungeon)
+    if len(adjacency) == 0:
+        return (0, 0, 0, 0)
+
+    # reversed since the first room is the lowest bit
+    reversed_adjacency = adjacency[::-1]
+    return tuple(int(reversed_adjacency.translate(table), 2) for table in _BITBOARD_PLANE_TABLES)
+
+def dungeon_get_bitboards(dungeon: DungeonT) -> BitboardsT:
+    """
+    returns: the door planes of the dungeon, kept in its caches until a room changes
+    """
+    cursor = dungeon_get_edit_cursor(dungeon)
+    cached = dungeon.caches.get(BITBOARDS_CACHE_KEY)
+    if cached != None and cached[0] == cursor:
+        return cached[1]
+
+    bitboards = _bitboards_build(dungeon)
+    dungeon.caches[BITBOARDS_CACHE_KEY] = (cursor, bitboards)
+    return bitboards
+
+def reachable_set(dungeon: DungeonT, start_room: RoomPosT) -> int:
+    """
+    returns: bitset of the rooms reachable from start_room (start included),
+             bit row * width + col, 0 if start_room is out of bounds
+
+    each step grows the whole frontier by one room in every direction with a few shifts
+
+    Doctest :
+
+    >>> d = dungeon_from_rooms([[(BLOCK_DOUBLE_OPPOSITE, 1), (BLOCK_SINGLE, 3), (BLOCK_QUAD, 0)]])
+    >>> bin(reachable_set(d, (1, 0)))
+    '0b11'
+    >>> reachable_set_contains(d, reachable_set(d, (0, 0)), (2, 0))
+    False
+    """
+    if not dungeon_room_pos_in_bounds(dungeon, start_room):
+        return 0
+
+    width = dungeon_get_width(dungeon)
+    up_plane, right_plane, down_plane, left_plane = dungeon_get_bitboards(dungeon)
+
+    reachable = 1 << (start_room[ROOM_POS_ROW] * width + start_room[ROOM_POS_COL])
+    frontier = reachable
+    while frontier:
+        # connection planes already exclude the dungeon borders, no wrap around between rows
+        grown = ((frontier & up_plane) >> width) | ((frontier & down_plane) << width) \
+              | ((frontier & right_plane) << 1) | ((frontier & left_plane) >> 1)
+        frontier = grown & ~reachable
+        reachable |= frontier
+
+    return reachable
+
+def reachable_set_contains(dungeon: DungeonT, reachable: int, room_pos: RoomPosT) -> bool:
+    """
+    returns: True if room_pos is in the bitset returned by reachable_set
+    """
+    if not dungeon_room_pos_in_bounds(dungeon, room_pos):
+        return False
+
+    return bool(reachable >> (room_pos[ROOM_POS_ROW] * dungeon_get_width(dungeon) + room_pos[ROOM_POS_COL]) & 1)
+
+# ---------- SEARCH STRATEGIES ----------
+
+# not allowed to use real enums
+E_PATH_STRATEGY_BFS           = 0 # explores every room closer than the target
+E_PATH_STRATEGY_ASTAR         = 1 # manhattan distance guided, best when the target is far in open dungeons
+E_PATH_STRATEGY_BIDIRECTIONAL = 2 # BFS from both ends until they meet
+E_PATH_STRATEGY_HIERARCHICAL  = 3 # HPA* over dungeon clusters, near optimal, for very large dungeons
+E_PATH_STRATEGY_COUNT         = 4
+
+# optional counters filled by find_path, values are added so a stats can be shared across calls
+PathStatsT = list
+T_PATH_STATS_EXPANDED = 0 # int rooms taken out of the frontier
+T_PATH_STATS_SIZE     = 1
+
+def path_stats_create() -> PathStatsT:
+    stats = [None] * T_PATH_STATS_SIZE
+    stats[T_PATH_STATS_EXPANDED] = 0
+    return stats
+
+def _path_follow_distances(adjacency: bytearray, width: int, from_index: int, target_index: int, target_distances: array) -> MovementPathT:
+    """
+    goes down target_distances taking the first direction in BFS order (UP, RIGHT, DOWN, LEFT)
+    that gets 1 room closer, which is the move the BFS path would make
+    returns: path without from_index
+    """
+    index_deltas = (-width, 1, width, -1)
+
+    path = []
+    index = from_index
+    while index != target_index:
+        neighbor_mask = adjacency[index]
+        next_distance = target_distances[index] - 1
+        for direction in range(DOOR_COUNT):
+            if neighbor_mask & (1 << direction):
+                neighbor_index = index + index_deltas[direction]
+                if target_distances[neighbor_index] == next_distance:
+                    index = neighbor_index
+                    break
+        path.append(room_pos_create(col=index % width, row=index // width))
+
+    return path
+
+def _find_path_bfs(dungeon: DungeonT, start_index: int, target_index: int, stats: PathStatsT | NoneType) -> MovementPathT:
+    """
+    the queue only holds room indices, the path is rebuilt once from the parent array
+    """
+    width = dungeon_get_width(dungeon)
+    adjacency = dungeon_get_adjacency(dungeon)
+    index_deltas = (-width, 1, width, -1) # NEIGHBOR_DELTAS order
+
+    # parent of each discovered room, -1 for the start room, -2 for undiscovered
+    parents = array("i", [-2]) * (width * dungeon_get_height(dungeon))
+    parents[start_index] = -1
+
+    queue = [start_index]
+    head = 0
+    path = []
+    while head < len(queue):
+        index = queue[head]
+        head += 1
 
-    while len(queue) > 0:
-        current_pos, path = queue.pop(0)
-    
         # If arrived
-        if current_pos == target_room:
-            return path
-        
-        # Exploration of valid locations 
-        valid_neighbors = dungeon_get_valid_neighbor_rooms(dungeon, current_pos)
-        for neighbor in valid_neighbors:
-            if neighbor not in visited:
-                visited.add(neighbor)
-                # Add the neighbor and the new path to the queue
-                new_path = path + [neighbor]
-                queue.append((neighbor, new_path))
-                
-    return []
+        if index == target_index:
+            path = _path_from_parents(parents, width, target_index)
+            break
+
+        # Exploration of valid locations
+        neighbor_mask = adjacency[index]
+        for direction in range(DOOR_COUNT):
+            if neighbor_mask & (1 << direction):
+                neighbor_index = index + index_deltas[direction]
+                if parents[neighbor_index] == -2:
+                    parents[neighbor_index] = index
+                    queue.append(neighbor_index)
+
+    if stats != None:
+        stats[T_PATH_STATS_EXPANDED] += head
+    return path
+
+def _find_path_astar(dungeon: DungeonT, start_index: int, target_index: int, stats: PathStatsT | NoneType) -> MovementPathT:
+    """
+    A* with the dungeon_get_room_distance metric (manhattan) as heuristic, computed from indices here
+    the heuristic is consistent and rooms leave the heap in (f, g) order, so when the target
+    leaves it every room of every shortest path is closed with its final cost
+    the path is then rebuilt in BFS order from a backward BFS restricted to the closed rooms
+    """
+    width = dungeon_get_width(dungeon)
+    room_count = width * dungeon_get_height(dungeon)
+    adjacency = dungeon_get_adjacency(dungeon)
+    index_deltas = (-width, 1, width, -1)
+
+    target_col = target_index % width
+    target_row = target_index // width
+
+    costs = array("i", [-1]) * room_count
+    closed = bytearray(room_count)
+    costs[start_index] = 0
+
+    start_distance = abs(start_index % width - target_col) + abs(start_index // width - target_row)
+    heap = [(start_distance, 0, start_index)]
+    expanded = 0
+    found = False
+    while heap:
+        _, cost, index = heapq.heappop(heap)
+        if closed[index]:
+            continue
+        closed[index] = 1
+        expanded += 1
+
+        # If arrived
+        if index == target_index:
+            found = True
+            break
+
+        neighbor_mask = adjacency[index]
+        next_cost = cost + 1
+        for direction in range(DOOR_COUNT):
+            if neighbor_mask & (1 << direction):
+                neighbor_index = index + index_deltas[direction]
+                neighbor_cost = costs[neighbor_index]
+                if not closed[neighbor_index] and (neighbor_cost == -1 or next_cost < neighbor_cost):
+                    costs[neighbor_index] = next_cost
+                    distance = abs(neighbor_index % width - target_col) + abs(neighbor_index // width - target_row)
+                    heapq.heappush(heap, (next_cost + distance, next_cost, neighbor_index))
+
+    if stats != None:
+        stats[T_PATH_STATS_EXPANDED] += expanded
+
+    if not found:
+        return []
+
+    # distances to the target inside the closed rooms, exact for rooms on shortest paths
+    # since all their shortest continuations are closed too
+    target_distances = array("i", [-1]) * room_count
+    target_distances[target_index] = 0
+    queue = [target_index]
+    head = 0
+    while target_distances[start_index] == -1:
+        index = queue[head]
+        head += 1
+
+        neighbor_mask = adjacency[index]
+        for direction in range(DOOR_COUNT):
+            if neighbor_mask & (1 << direction):
+                neighbor_index = index + index_deltas[direction]
+                if closed[neighbor_index] and target_distances[neighbor_index] == -1:
+                    target_distances[neighbor_index] = target_distances[index] + 1
+                    queue.append(neighbor_index)
+
+    return _path_follow_distances(adjacency, width, start_index, target_index, target_distances)
+
+def _find_path_bidirectional(dungeon: DungeonT, start_index: int, target_index: int, stats: PathStatsT | NoneType) -> MovementPathT:
+    """
+    expands whole BFS levels from the smaller side until both sides meet,
+    then rebuilds the same path as the forward BFS:
+        - the prefix ends on the first forward discovered room of the shortest paths
+          at the deepest level the backward distances can finish
+        - the suffix takes the first direction (BFS order) getting 1 room closer to the target
+    """
+    width = dungeon_get_width(dungeon)
+    room_count = width * dungeon_get_height(dungeon)
+    adjacency = dungeon_get_adjacency(dungeon)
+    index_deltas = (-width, 1, width, -1)
+
+    forward_distances = array("i", [-1]) * room_count
+    forward_parents = array("i", [-1]) * room_count
+    backward_distances = array("i", [-1]) * room_count
+    forward_distances[start_index] = 0
+    backward_distances[target_index] = 0
 
-def find_random_path(dungeon: DungeonT, start_room: RoomPosT, target_room: RoomPosT) -> MovementPathT:
+    # queues keep every discovered room, level_begin is where the deepest level starts
+    forward_queue = [start_index]
+    forward_level_begin = 0
+    forward_depth = 0
+    backward_queue = [target_index]
+    backward_level_begin = 0
+    backward_depth = 0
+
+    expanded = 0
+    path_length = -1
+    while path_length == -1:
+        forward_level_size = len(forward_queue) - forward_level_begin
+        backward_level_size = len(backward_queue) - backward_level_begin
+
+        # one side is fully explored without meeting the other, unreachable
+        if forward_level_size == 0 or backward_level_size == 0:
+            break
+
+        expanded += min(forward_level_size, backward_level_size)
+        if forward_level_size <= backward_level_size:
+            level_end = len(forward_queue)
+            for i in range(forward_level_begin, level_end):
+                index = forward_queue[i]
+                neighbor_mask = adjacency[index]
+                for direction in range(DOOR_COUNT):
+                    if neighbor_mask & (1 << direction):
+                        neighbor_index = index + index_deltas[direction]
+                        if forward_distances[neighbor_index] == -1:
+                            forward_distances[neighbor_index] = forward_depth + 1
+                            forward_parents[neighbor_index] = index
+                            forward_queue.append(neighbor_index)
+
+                            if backward_distances[neighbor_index] != -1:
+                                length = forward_depth + 1 + backward_distances[neighbor_index]
+                                if path_length == -1 or length < path_length:
+                                    path_length = length
+            forward_level_begin = level_end
+            forward_depth += 1
+        else:
+            level_end = len(backward_queue)
+            for i in range(backward_level_begin, level_end):
+                index = backward_queue[i]
+                neighbor_mask = adjacency[index]
+                for direction in range(DOOR_COUNT):
+                    if neighbor_mask & (1 << direction):
+                        neighbor_index = index + index_deltas[direction]
+                        if backward_distances[neighbor_index] == -1:
+                            backward_distances[neighbor_index] = backward_depth + 1
+                            backward_queue.append(neighbor_index)
+
+                            if forward_distances[neighbor_index] != -1:
+                                length = backward_depth + 1 + forward_distances[neighbor_index]
+                                if path_length == -1 or length < path_length:
+                                    path_length = length
+            backward_level_begin = level_end
+            backward_depth += 1
+
+    if stats != None:
+        stats[T_PATH_STATS_EXPANDED] += expanded
+
+    if path_length == -1:
+        return []
+
+    # forward queue is in BFS order, so the first room of the level on a shortest path
+    # is the one the BFS path goes through
+    prefix_length = max(0, path_length - backward_depth)
+    suffix_length = path_length - prefix_length
+    middle_index = -1
+    for index in forward_queue:
+        if forward_distances[index] == prefix_length and backward_distances[index] == suffix_length:
+            middle_index = index
+            break
+
+    # backward distances are exact up to backward_depth, follow them down to the target
+    path = _path_from_parents(forward_parents, width, middle_index)
+    path += _path_follow_distances(adjacency, width, middle_index, target_index, backward_distances)
+    return path
+
+def _find_path_hierarchical(dungeon: DungeonT, start_index: int, target_index: int, stats: PathStatsT | NoneType) -> MovementPathT:
+    """
+    see hierarchical_pathfinding, abstract graph is kept in the dungeon caches between calls
+    stats is not filled, the search goes over cluster entrances and not rooms
+    """
+    width = dungeon_get_width(dungeon)
+    return [room_pos_create(col=index % width, row=index // width) for index in hierarchical_find_path(dungeon, start_index, target_index)]
+
+# ---------- PATH CACHE ----------
+
+# (dungeon version, start room, target room, strategy) -> path, least recently used first
+# versions change with every room change, so entries never need invalidating
+PathCacheT = list
+T_PATH_CACHE_ENTRIES = 0 # OrderedDict
+T_PATH_CACHE_HITS    = 1 # int
+T_PATH_CACHE_MISSES  = 2 # int
+T_PATH_CACHE_SIZE    = 3
+
+g_path_cache: PathCacheT = [OrderedDict(), 0, 0]
+
+def _path_cache_get(key: tuple) -> MovementPathT | NoneType:
+    """
+    returns: a copy of the cached path (callers pop from paths), None on miss
+    """
+    entries = g_path_cache[T_PATH_CACHE_ENTRIES]
+    path = entries.get(key)
+    if path == None:
+        g_path_cache[T_PATH_CACHE_MISSES] += 1
+        return None
+
+    entries.move_to_end(key)
+    g_path_cache[T_PATH_CACHE_HITS] += 1
+    return list(path)
+
+def _path_cache_put(key: tuple, path: MovementPathT):
+    entries = g_path_cache[T_PATH_CACHE_ENTRIES]
+    entries[key] = tuple(path)
+    entries.move_to_end(key)
+
+    while len(entries) > engine_config.PATH_CACHE_MAX_ENTRIES:
+        entries.popitem(last=False)
+
+def path_cache_find(dungeon: DungeonT, start_room: RoomPosT, target_room: RoomPosT, strategy: int, find_fn) -> MovementPathT:
+    """
+    returns: the cached path for this dungeon version, rooms and strategy,
+    on a miss the one find_fn() returns, cached under the same key
+    strategy: E_PATH_STRATEGY_x the path is the same as, searches giving the BFS path share E_PATH_STRATEGY_BFS
+
+    >>> d = dungeon_from_rooms([[(BLOCK_QUAD, 0), (BLOCK_QUAD, 0)]])
+    >>> path_cache_find(d, (0, 0), (1, 0), E_PATH_STRATEGY_BFS, lambda: [(1, 0)])
+    [(1, 0)]
+    >>> path_cache_find(d, (0, 0), (1, 0), E_PATH_STRATEGY_BFS, lambda: None) # not called, unchanged dungeon
+    [(1, 0)]
+    """
+    cache_key = (dungeon_get_version(dungeon), start_room, target_room, strategy)
+    path = _path_cache_get(cache_key)
+    if path == None:
+        path = find_fn()
+        _path_cache_put(cache_key, path)
+    return path
+
+def path_cache_get_stats() -> tuple[int, int]:
+    """
+    returns: (hits, misses) since start or last path_cache_clear
+    """
+    return g_path_cache[T_PATH_CACHE_HITS], g_path_cache[T_PATH_CACHE_MISSES]
+
+def path_cache_clear():
+    g_path_cache[T_PATH_CACHE_ENTRIES].clear()
+    g_path_cache[T_PATH_CACHE_HITS] = 0
+    g_path_cache[T_PATH_CACHE_MISSES] = 0
+
+_PATH_STRATEGIES = (
+    _find_path_bfs,           # E_PATH_STRATEGY_BFS
+    _find_path_astar,         # E_PATH_STRATEGY_ASTAR
+    _find_path_bidirectional, # E_PATH_STRATEGY_BIDIRECTIONAL
+    _find_path_hierarchical,  # E_PATH_STRATEGY_HIERARCHICAL
+)
+
+def find_path(dungeon: DungeonT, start_room: RoomPosT, target_room: RoomPosT, strategy: int | NoneType = None, stats: PathStatsT | NoneType = None) -> MovementPathT:
+    """
+    Calculates the shortest path via Breadth-First Search (BFS)
+    strategy: E_PATH_STRATEGY_x, A* and bidirectional return the same path as the BFS
+              and only explore less rooms on large dungeons, hierarchical is near optimal
+              None walks the all pairs table while it fits engine_config.ALL_PAIRS_MAX_BYTES,
+              then picks BFS, or hierarchical from engine_config.HIERARCHICAL_PATHFINDING_MIN_ROOMS rooms
+    stats: optional PathStatsT filled with the search counters (not filled by hierarchical nor the all pairs table)
+    """
+    use_all_pairs = False
+    if strategy == None:
+        # small dungeons walk the all pairs table, same paths as the BFS so they share its cache entries
+        use_all_pairs = all_pairs_fits(dungeon)
+        room_count = dungeon_get_width(dungeon) * dungeon_get_height(dungeon)
+        if use_all_pairs or room_count < engine_config.HIERARCHICAL_PATHFINDING_MIN_ROOMS:
+            strategy = E_PATH_STRATEGY_BFS
+        else:
+            strategy = E_PATH_STRATEGY_HIERARCHICAL
+
+    if strategy < 0 or strategy >= E_PATH_STRATEGY_COUNT:
+        log_error(f"[find_path] unknown path strategy {strategy}, using BFS")
+        strategy = E_PATH_STRATEGY_BFS
+
+    indices = _search_begin(dungeon, start_room, target_room)
+    if indices == None:
+        return []
+    start_index, target_index = indices
+
+    # unchanged dungeon, same question, same answer
+    if use_all_pairs:
+        return path_cache_find(dungeon, start_room, target_room, strategy,
+                               lambda: all_pairs_get_path(all_pairs_get(dungeon), dungeon, start_room, target_room))
+    return path_cache_find(dungeon, start_room, target_room, strategy,
+                           lambda: _PATH_STRATEGIES[strategy](dungeon, start_index, target_index, stats))
+
+def find_random_path(dungeon: DungeonT, start_room: RoomPosT, target_room: RoomPosT, rng: random.Random) -> MovementPathT:
     """
     Calculates a random path to the target room by randomly picking from the 
     available frontier of discovered rooms.
+    rng: generator the rooms are picked with
     """
-    if start_room == target_room:
+    indices = _search_begin(dungeon, start_room, target_room)
+    if indices == None:
         return []
+    start_index, target_index = indices
+
+    width = dungeon_get_width(dungeon)
+    adjacency = dungeon_get_adjacency(dungeon)
+    index_deltas = (-width, 1, width, -1)
 
-    # The frontier contains (current_pos, path_taken)
-    frontier = [(start_room, [])]
-    visited = {start_room}
+    parents = array("i", [-2]) * (width * dungeon_get_height(dungeon))
+    parents[start_index] = -1
 
+    frontier = [start_index]
     while len(frontier) > 0:
-        # Instead of pop(0) for BFS, we pick a random index
-        random_index = random.randrange(len(frontier))
-        current_pos, path = frontier.pop(random_index)
+        # pick a random room, the last one takes its place (O(1) removal)
+        random_index = rng.randrange(len(frontier))
+        index = frontier[random_index]
+        frontier[random_index] = frontier[-1]
+        frontier.pop()
 
         # If arrived
-        if current_pos == target_room:
-            return path
-        
-        # Exploration of valid locations 
-        valid_neighbors = dungeon_get_valid_neighbor_rooms(dungeon, current_pos)
-        
+        if index == target_index:
+            return _path_from_parents(parents, width, target_index)
+
+        neighbor_mask = adjacency[index]
+        valid_neighbors = [index + index_deltas[direction] for direction in range(DOOR_COUNT) if neighbor_mask & (1 << direction)]
+
         # Shuffle neighbors to add extra randomness to the discovery order
-        random.shuffle(valid_neighbors)
-        
-        for neighbor in valid_neighbors:
-            if neighbor not in visited:
-                visited.add(neighbor)
-                new_path = path + [neighbor]
-                frontier.append((neighbor, new_path))
-                
+        rng.shuffle(valid_neighbors)
+
+        for neighbor_index in valid_neighbors:
+            if parents[neighbor_index] == -2:
+                parents[neighbor_index] = index
+                frontier.append(neighbor_index)
+
     return []
 
 def is_valid_path(dungeon: DungeonT, start_pos: RoomPosT, path: MovementPathT) -> bool:
@@ -116,27 +990,39 @@ def is_valid_path(dungeon: DungeonT, start_pos: RoomPosT, path: MovementPathT) -
     return True
 
 def room_is_accessible(dungeon: DungeonT, adventurer: AdventurerT, target_room: RoomPosT):
-    path = find_path(dungeon, adventurer[T_BASE_ENTITY_ROOM_POS], target_room)
-    return len(path) != 0
+    """
+    returns True if there is a non empty path from the adventurer to target_room
+    O(1) lookup in the dungeon connected components, labeled lazily and only again
+    after a room change changed connectivity
+    """
+    start_room = adventurer[T_BASE_ENTITY_ROOM_POS]
+    if start_room == target_room:
+        return False
 
-def find_random_path_to_dragon(dungeon: DungeonT, adventurer: AdventurerT, dragon: DragonT) -> MovementPathT:
+    return dungeon_rooms_same_component(dungeon, start_room, target_room)
+
+def find_random_path_to_dragon(dungeon: DungeonT, adventurer: AdventurerT, dragon: DragonT, rng: random.Random) -> MovementPathT:
     """
     returns: path from adventurer room to dragons room, returns None if no valid path is found
     """
-    return find_random_path(dungeon, adventurer[T_BASE_ENTITY_ROOM_POS], dragon[T_BASE_ENTITY_ROOM_POS])
+    return find_random_path(dungeon, adventurer[T_BASE_ENTITY_ROOM_POS], dragon[T_BASE_ENTITY_ROOM_POS], rng)
 
-def find_meanest_dragon(dungeon: DungeonT, adventurer: AdventurerT, dragons: list[DragonT]) -> DragonT:
+def find_meanest_dragon(dungeon: DungeonT, adventurer: AdventurerT, dragons: list[DragonT], distance_field: DistanceFieldT | NoneType = None) -> DragonT:
     """
     returns: DragonT dragon with the highest level
+    distance_field: optional field from the adventurer room, reused for accessibility
     """
     meanest_dragon = dragons[0] 
 
     for dragon in dragons : 
         # skip unacessible dragons
-        if not room_is_accessible(dungeon, adventurer, dragon[T_BASE_ENTITY_ROOM_POS]): 
+        if distance_field != None:
+            if not distance_field_is_accessible(distance_field, dragon.room_pos):
+                continue
+        elif not room_is_accessible(dungeon, adventurer, dragon.room_pos): 
             continue
 
-        if meanest_dragon[T_ENTITY_LEVEL] < dragon[T_ENTITY_LEVEL] :
+        if meanest_dragon.level < dragon.level :
             meanest_dragon = dragon 
             
     return meanest_dragon
@@ -145,19 +1031,20 @@ def path_stop_at_collision(entity_system: EntitySystemT, path: MovementPathT) ->
     """
     returns: path stopped after first collisions with entity
     """
-    entity_system_positions: set = get_collision_entity_positions(entity_system)
-
     new_path = []
     for room_pos in path:
         new_path.append(room_pos)
 
         # if entity somewhere on path, then stop path there
-        if room_pos in entity_system_positions:
+        if room_has_collision_entity(entity_system, room_pos):
             return new_path
 
     return new_path
 
 def find_and_set_adventurer_path(game_data: GameDataT):
+    """
+    paths are near optimal from engine_config.HIERARCHICAL_PATHFINDING_MIN_ROOMS rooms (see find_path)
+    """
     dungeon: DungeonT = game_data[T_DUNGEON_DATA_DUNGEON]
     entity_system: EntitySystemT = game_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
 
@@ -168,35 +1055,55 @@ def find_and_set_adventurer_path(game_data: GameDataT):
 
     target_room = None
 
+    # small dungeons walk the all pairs table: its columns are per target, so the one of the target stays
+    # valid while the adventurer moves, a field from the adventurer is made again after each step,
+    # very large ones use the hierarchical search, a field would cover the whole dungeon,
+    # accessibility is then the connected components lookup
+    room_count = dungeon_get_width(dungeon) * dungeon_get_height(dungeon)
+    use_find_path = all_pairs_fits(dungeon) or room_count >= engine_config.HIERARCHICAL_PATHFINDING_MIN_ROOMS
+    distance_field = None
+    if use_find_path:
+        treasure_is_accessible = treasure_is_valid(treasure) and room_is_accessible(dungeon, adventurer, treasure.room_pos)
+    else:
+        # one BFS from the adventurer answers every accessibility and path query below,
+        # kept between frames and only repaired around the rooms rotated since last time
+        distance_field = distance_field_update(dungeon, adventurer.room_pos)
+        treasure_is_accessible = treasure_is_valid(treasure) and distance_field_is_accessible(distance_field, treasure.room_pos)
+
     # if treasure is in dungeon and accesible, then go to treasure
-    if treasure_is_valid(treasure) and room_is_accessible(dungeon, adventurer, treasure[T_BASE_ENTITY_ROOM_POS]):
-        target_room = treasure[T_BASE_ENTITY_ROOM_POS]
+    if treasure_is_accessible:
+        target_room = treasure.room_pos
     # otherwise go to dragon (if there are any left)
     elif len(dragons) > 0: 
-        target_dragon = find_meanest_dragon(dungeon, adventurer, dragons)
-        target_room = target_dragon[T_BASE_ENTITY_ROOM_POS]    
+        target_dragon = find_meanest_dragon(dungeon, adventurer, dragons, distance_field)
+        target_room = target_dragon.room_pos    
         
     # If a target is found, calculate the path
     if target_room != None:
-        path = find_path(dungeon, adventurer[T_BASE_ENTITY_ROOM_POS], target_room)
+        if use_find_path:
+            path = find_path(dungeon, adventurer.room_pos, target_room)
+        else:
+            # distance field paths are the BFS paths, so they share the find_path cache entries
+            path = path_cache_find(dungeon, adventurer.room_pos, target_room, E_PATH_STRATEGY_BFS,
+                                   lambda: distance_field_get_path(distance_field, target_room, dungeon))
 
         # if another entity on path, stop path there
         path = path_stop_at_collision(entity_system, path)
 
         # set new calculated path in adventurer
         if path:
-            adventurer[T_ADVENTURER_PATH] = path
+            adventurer.path = path
             return 
 
     # if dragon not found, or path not found, empty path
-    adventurer[T_ADVENTURER_PATH] = MovementPathT()
+    adventurer.path = MovementPathT()
 
 def do_adventurer_path(adventurer: AdventurerT, entity_system: EntitySystemT) -> bool:
     """
     moves just 1 room per call
     returns: True if no rooms to move to
     """
-    movement_path: list = adventurer[T_ADVENTURER_PATH]
+    movement_path: list = adventurer.path
     if not movement_path_is_valid(movement_path):
         log_error(f"[do_adventurer_path] trying to move adventurer with invalid path !")
         return False # error
@@ -205,7 +1112,7 @@ def do_adventurer_path(adventurer: AdventurerT, entity_system: EntitySystemT) ->
     next_room_pos = movement_path.pop(0)
 
     # update adventurer pos to next room
-    adventurer[T_BASE_ENTITY_ROOM_POS] = next_room_pos
+    entity_system_move_entity(entity_system, adventurer, next_room_pos)
 
     # if 0 rooms to move left then we finished moving the adventurer
     return len(movement_path) == 0
@@ -13,14 +13,20 @@ from src.utils.logging import *
 # player path, basicly a chain of room positions
 MovementPathT = list[RoomPosT]
 
+class Adventurer(Entity):
+    __slots__ = ("path", "inventory")
+    FIELDS = Entity.FIELDS + ("path", "inventory")
+
 # BaseEntityT -> EntityT -> AdventurerT
-AdventurerT = list[RoomPosT | int | MovementPathT | InventoryT]
+AdventurerT = Adventurer
 
 # enum for adventurer structure that inherits from entity
 T_ADVENTURER_PATH = T_ENTITY_COUNT
 T_ADVENTURER_INVENTORY = T_ENTITY_COUNT + 1
 T_ADVENTURER_COUNT = T_ENTITY_COUNT + 2
 
+base_entity_register_record(E_ENTITY_ADVENTURER, Adventurer)
+
 
 def movement_path_is_valid(movement_path: MovementPathT) -> bool:
     # is a list and has at least 1 room_pos in list
@@ -53,6 +59,19 @@ def adventurer_create(room_pos: RoomPosT = room_pos_create(0, 0), level: int = 1
 
     return adventurer
 
+def adventurer_clone(adventurer: AdventurerT) -> AdventurerT:
+    """
+    same as base_entity_clone but also copies the path and inventory lists
+    """
+    clone: AdventurerT = base_entity_clone(adventurer)
+
+    if adventurer.path != None:
+        clone.path = list(adventurer.path)
+    if adventurer.inventory != None:
+        clone.inventory = inventory_clone(adventurer.inventory)
+
+    return clone
+
 def adventurer_render(dungeon, adventurer: AdventurerT, assets: AssetsT):
     """
     Renders the adventurer on the screen.
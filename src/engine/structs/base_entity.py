@@ -4,25 +4,76 @@ from src.game.entity_definitions import *
 from src.game.globals import *
 
 
+class BaseEntity:
+    """
+    base class for all entity records, one slot per field instead of a padded list
+
+    ``entity[T_BASE_ENTITY_ROOM_POS]`` still reads and writes the field (FIELDS gives the attribute of each T_* index)
+    so code written for the old lists keeps working, but hot code should use the attributes (entity.room_pos)
+    records compare by identity: 2 dragons with the same level in the same room are still 2 dragons
+
+    >>> entity = BaseEntity(E_ENTITY_UNKNOWN, (1, 2))
+    >>> entity[T_BASE_ENTITY_ROOM_POS] = (3, 4)
+    >>> entity.room_pos, len(entity), list(entity) == [E_ENTITY_UNKNOWN, (3, 4)]
+    ((3, 4), 2, True)
+    """
+    __slots__ = ("type", "room_pos")
+    FIELDS = ("type", "room_pos") # attribute of each T_BASE_ENTITY_* index, child records append theirs
+
+    def __init__(self, *values):
+        for i, field in enumerate(self.FIELDS):
+            setattr(self, field, values[i] if i < len(values) else None)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def __getitem__(self, i: int):
+        return getattr(self, self.FIELDS[i])
+
+    def __setitem__(self, i: int, value):
+        setattr(self, self.FIELDS[i], value)
+
+    def __iter__(self):
+        for field in self.FIELDS:
+            yield getattr(self, field)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
 # base class for all entities
-BaseEntityT = list[RoomPosT | EntityE | NoneType]
+BaseEntityT = BaseEntity
 
 # enum for base entity struct
 T_BASE_ENTITY_TYPE = 0 # entity type like E_ENTITY_DRAGON
 T_BASE_ENTITY_ROOM_POS = 1
 T_BASE_ENTITY_COUNT = 2
 
+# entity type -> record class, filled by each entity struct module
+g_entity_records: dict[EntityE, type] = {}
+
+def base_entity_register_record(entity_type: EntityE, record_class: type):
+    g_entity_records[entity_type] = record_class
+
+def base_entity_from_values(values: list) -> BaseEntityT:
+    """
+    record of the right class for values[T_BASE_ENTITY_TYPE], like the old padded list values
+    """
+    record_class = g_entity_records.get(values[T_BASE_ENTITY_TYPE], BaseEntity)
+    return record_class(*values)
+
 def base_entity_create(entity_type: EntityE = E_ENTITY_UNKNOWN,
                        room_pos: RoomPosT = (0, 0),
                        size: int = T_BASE_ENTITY_COUNT) -> BaseEntityT:
     """
-    fills extra empty spaces with None
-    size: num of properties in entity to init
+    creates the record registered for entity_type, extra fields are None
+    size: num of properties in entity to init, has to match the record
     """
-    base_entity: BaseEntityT = [None] * size
+    record_class = g_entity_records.get(entity_type, BaseEntity)
+    if len(record_class.FIELDS) != size:
+        log_error(f"[base_entity_create] {record_class.__name__} has {len(record_class.FIELDS)} fields, not {size}")
 
-    base_entity[T_BASE_ENTITY_TYPE] = entity_type
-    base_entity[T_BASE_ENTITY_ROOM_POS] = room_pos
+    base_entity: BaseEntityT = record_class(entity_type, room_pos)
 
     if entity_type == E_ENTITY_UNKNOWN:
         log_warning(f"[base_entity_create] created unknown entity: {base_entity}")
@@ -31,8 +82,15 @@ def base_entity_create(entity_type: EntityE = E_ENTITY_UNKNOWN,
 
     return base_entity
 
+def base_entity_clone(base_entity: BaseEntityT) -> BaseEntityT:
+    """
+    new record with the same field values, for records whose fields are immutable (positions are tuples)
+    records with list fields (adventurer) need their own clone function
+    """
+    return type(base_entity)(*base_entity)
+
 def base_entity_is(base_entity, entity_type: EntityE) -> bool:
-    return base_entity[T_BASE_ENTITY_TYPE] == entity_type
+    return base_entity.type == entity_type
 
 def base_entity_render(dungeon, base_entity: BaseEntityT, image, image_size: tuple[int, int]) -> tuple[int, int]:
     """
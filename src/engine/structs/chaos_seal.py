@@ -1,17 +1,22 @@
 from src.engine.structs.base_entity import *
 
 
+class ChaosSeal(BaseEntity):
+    __slots__ = ()
+
 # ChaosSealT -> BaseEntityT
-ChaosSealT = BaseEntityT
+ChaosSealT = ChaosSeal
 
 T_CHAOS_SEAL_COUNT = T_BASE_ENTITY_COUNT
 
+base_entity_register_record(E_ENTITY_CHAOS_SEAL, ChaosSeal)
+
 
 def chaos_seal_create(room_pos: RoomPosT) -> ChaosSealT:
     return base_entity_create(entity_type=E_ENTITY_CHAOS_SEAL, room_pos=room_pos)
 
 def chaos_seal_is_valid(chaos_seal) -> bool:
-    return chaos_seal != None and isinstance(chaos_seal, list) and len(chaos_seal) == T_CHAOS_SEAL_COUNT
+    return isinstance(chaos_seal, ChaosSeal)
 
 def chaos_seal_render(dungeon, chaos_seal: ChaosSealT, assets: AssetsT):
     if not chaos_seal_is_valid(chaos_seal):
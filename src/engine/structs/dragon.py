@@ -1,4 +1,4 @@
-from random import randrange
+import random
 
 # engine stuff
 from src.engine.structs.dungeon import *
@@ -10,12 +10,17 @@ import src.utils.fltk_extensions as fltk_ext
 from src.utils.logging import *
 
 
+class Dragon(Entity):
+    __slots__ = ()
+
 # BaseEntityT -> EntityT -> DragonT
-DragonT = list[RoomPosT | int]
+DragonT = Dragon
 
 # enum for dragon struct
 T_DRAGON_COUNT = T_ENTITY_COUNT
 
+base_entity_register_record(E_ENTITY_DRAGON, Dragon)
+
 
 # def dragon_init(dragon: DragonT, level: int = 1, room_pos: RoomPosT = (0, 0)):
 #     """
@@ -60,7 +65,7 @@ def dragon_render(dungeon, dragon: DragonT, assets: AssetsT):
     entity_render(dungeon, dragon, dragon_image)
 
 # if no count set it will automatically calculate number of dragons
-def dragon_create_dragons(dragons: list[DragonT], dungeon_size: DungeonSizeT, count: int | NoneType = None):
+def dragon_create_dragons(dragons: list[DragonT], dungeon_size: DungeonSizeT, rng: random.Random, count: int | NoneType = None):
     """
     Generates and appends multiple dragons to the list, with random positions.
     
@@ -70,6 +75,7 @@ def dragon_create_dragons(dragons: list[DragonT], dungeon_size: DungeonSizeT, co
     Args:
         dragons (list[DragonT]): The main list of dragons in the game.
         dungeon_size (tuple[int, int]): The dimensions of the dungeon (width, height).
+        rng (random.Random): The generator the positions are picked with.
         count (int | NoneType, optional): A fixed number of dragons to create.
     
     Doctest :    
@@ -77,7 +83,7 @@ def dragon_create_dragons(dragons: list[DragonT], dungeon_size: DungeonSizeT, co
     >>> # Initialize an empty list
     >>> dragons_list = []
     >>> # Create 5 dragons for a 10x10 dungeon
-    >>> dragon_create_dragons(dragons_list, (10, 10), count=5)
+    >>> dragon_create_dragons(dragons_list, (10, 10), random.Random(0), count=5)
     >>> # Verify that exactly 5 dragons were added
     >>> len(dragons_list)
     5
@@ -95,8 +101,8 @@ def dragon_create_dragons(dragons: list[DragonT], dungeon_size: DungeonSizeT, co
     for i in range(count):
         # put dragon in random room
         # but start at 1 so it doesnt spawn on adventurer
-        random_col = randrange(1, dungeon_size[DUNGEON_SIZE_COL])
-        random_row = randrange(1, dungeon_size[DUNGEON_SIZE_ROW])
+        random_col = rng.randrange(1, dungeon_size[DUNGEON_SIZE_COL])
+        random_row = rng.randrange(1, dungeon_size[DUNGEON_SIZE_ROW])
         random_room = room_pos_create(col=random_col, row=random_row)
 
         d = dragon_create(room_pos=random_room, level=(i + 1))
@@ -1,6 +1,16 @@
+import itertools
 import random
+from array import array
+
 import libs.fltk as fltk
 
+try:
+    # optional, whole grid connectivity is computed with array operations when available
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 from src.engine.asset_manager import *
 
 from src.game.globals import *
@@ -16,7 +26,109 @@ ROOM_BLOCK_ID = 0
 ROOM_ROTATION_COUNT = 1
 ROOM_COUNT = 2
 
-DungeonT = list[list[RoomT]] # n x n matrix of rooms
+# packed room stored in a single byte: block id in the high bits, rotation in the 2 low bits
+PackedRoomT = int
+PACKED_ROOM_ROTATION_BITS = 2
+PACKED_ROOM_ROTATION_MASK = (1 << PACKED_ROOM_ROTATION_BITS) - 1
+PACKED_ROOM_COUNT = 256 # number of values a byte can hold
+
+# rooms whose connections changed are logged so incremental consumers (pathfinding) can catch up,
+# past this many entries the log is dropped and consumers rebuild from scratch
+DUNGEON_EDITS_MAX = 4096
+
+# every wholesale change (init, copy, log overflow) gets a new layout id, no 2 layouts share one
+g_dungeon_layout_ids = itertools.count(1)
+
+# every change of any room gets a new version, so a version always means the same rooms
+# (copies get a new version too, like any new layout, so caches keyed by version are not shared with the source)
+g_dungeon_versions = itertools.count(1)
+
+class DungeonGrid:
+    """
+    n x n matrix of rooms, stored row by row as one packed byte per room (see dungeon_room_pack)
+
+    ``dungeon[row][col]`` still reads and writes RoomT so code written for the old
+    list of lists keeps working, but hot code should use the dungeon_get_* accessors
+
+    adjacency: per room bitmask of connected neighbors (see dungeon_get_adjacency),
+               None until first needed, then patched on every room change
+    components: per room connected component label (see dungeon_get_components),
+                None when it needs to be relabeled
+    layout_id: changes when the rooms are replaced as a whole (see dungeon_get_edits)
+    edits: indices of the rooms whose connections changed since layout_id was set
+    caches: data derived from the rooms by other modules, cleared with the layout
+    version: changes on every room change (see dungeon_get_version)
+    overlay: top DungeonOverlayT pushed on the rooms, None when the rooms are the real ones (see dungeon_push_overlay)
+    """
+    __slots__ = ("width", "height", "cells", "adjacency", "components", "layout_id", "edits", "caches", "version", "overlay")
+
+    def __init__(self, rows: int = 0, cols: int = 0):
+        self.width: int = cols
+        self.height: int = rows
+        self.cells: bytearray = bytearray(rows * cols)
+        self.adjacency: bytearray | NoneType = None
+        self.components: array | NoneType = None
+        self.layout_id: int = next(g_dungeon_layout_ids)
+        self.edits: list[int] = []
+        self.caches: dict = {}
+        self.version: int = next(g_dungeon_versions)
+        self.overlay: list | NoneType = None
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __getitem__(self, row: int) -> "_DungeonRowView":
+        if row < 0 or row >= self.height:
+            raise IndexError(f"dungeon row {row} out of range")
+
+        return _DungeonRowView(self, row)
+
+    def __iter__(self):
+        for row in range(self.height):
+            yield _DungeonRowView(self, row)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, DungeonGrid):
+            return NotImplemented
+        return self.width == other.width and self.height == other.height and self.cells == other.cells
+
+    def __repr__(self) -> str:
+        return f"DungeonGrid({dungeon_to_rooms(self)})"
+
+class _DungeonRowView:
+    """
+    view on one row of a DungeonGrid, so ``dungeon[row][col]`` works like a list of lists
+    """
+    __slots__ = ("dungeon", "offset")
+
+    def __init__(self, dungeon: DungeonGrid, row: int):
+        self.dungeon: DungeonGrid = dungeon
+        self.offset: int = row * dungeon.width
+
+    def __len__(self) -> int:
+        return self.dungeon.width
+
+    def __getitem__(self, col: int) -> RoomT:
+        if col < 0 or col >= self.dungeon.width:
+            raise IndexError(f"dungeon col {col} out of range")
+
+        return _UNPACKED_ROOMS[self.dungeon.cells[self.offset + col]]
+
+    def __setitem__(self, col: int, room: RoomT):
+        if col < 0 or col >= self.dungeon.width:
+            raise IndexError(f"dungeon col {col} out of range")
+
+        dungeon_set_room(self.dungeon, col, self.offset // self.dungeon.width, room)
+
+    def __iter__(self):
+        width = self.dungeon.width
+        for packed_room in self.dungeon.cells[self.offset:self.offset + width]:
+            yield _UNPACKED_ROOMS[packed_room]
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+DungeonT = DungeonGrid # n x n matrix of rooms
 
 RoomConnectionsT = tuple[bool, bool, bool, bool]
 ROOM_CONNECTION_UP = 0
@@ -38,6 +150,23 @@ DUNGEON_SIZE_ROW = ROOM_POS_ROW
 
 DOOR_COUNT = 4
 
+# door bitmask of a room, bit ROOM_CONNECTION_x is set if the door is open
+RoomMaskT = int
+DOOR_MASK_NONE = 0
+DOOR_MASK_UP = 1 << ROOM_CONNECTION_UP
+DOOR_MASK_RIGHT = 1 << ROOM_CONNECTION_RIGHT
+DOOR_MASK_DOWN = 1 << ROOM_CONNECTION_DOWN
+DOOR_MASK_LEFT = 1 << ROOM_CONNECTION_LEFT
+DOOR_MASK_ALL = DOOR_MASK_UP | DOOR_MASK_RIGHT | DOOR_MASK_DOWN | DOOR_MASK_LEFT
+
+# (delta col, delta row, direction) of each neighbor, in ROOM_CONNECTION_x order
+NEIGHBOR_DELTAS = (
+    (0, -1, ROOM_CONNECTION_UP),
+    (1, 0, ROOM_CONNECTION_RIGHT),
+    (0, 1, ROOM_CONNECTION_DOWN),
+    (-1, 0, ROOM_CONNECTION_LEFT),
+)
+
 # ---------- MANIPULATION FUNCTIONS ----------
 
 def room_pos_create(col: int, row: int) -> RoomPosT:
@@ -77,20 +206,177 @@ def dungeon_room_create(block_id: int = 0, rotation_count: int = 0) -> RoomT:
 
     return RoomT(room)
 
+def dungeon_room_pack(room: RoomT) -> PackedRoomT:
+    """
+    packs a room into a single byte, rotation is kept modulo DOOR_COUNT
+
+    Doctest :
+
+    >>> dungeon_room_pack((BLOCK_TRIPLE, 2))
+    18
+    >>> dungeon_room_pack((BLOCK_TRIPLE, 6))
+    18
+    """
+    return (room[ROOM_BLOCK_ID] << PACKED_ROOM_ROTATION_BITS) | (room[ROOM_ROTATION_COUNT] % DOOR_COUNT)
+
+def dungeon_room_unpack(packed_room: PackedRoomT) -> RoomT:
+    """
+    opposite of dungeon_room_pack
+
+    Doctest :
+
+    >>> dungeon_room_unpack(18)
+    (4, 2)
+    """
+    return _UNPACKED_ROOMS[packed_room]
+
+# every packed value already unpacked, so reading a room never allocates a tuple
+_UNPACKED_ROOMS = tuple(dungeon_room_create(packed_room >> PACKED_ROOM_ROTATION_BITS, packed_room & PACKED_ROOM_ROTATION_MASK)
+                        for packed_room in range(PACKED_ROOM_COUNT))
+
+def dungeon_create(rows: int = 0, cols: int = 0) -> DungeonT:
+    """
+    creates a dungeon filled with empty rooms
+
+    Doctest :
+
+    >>> d = dungeon_create(2, 3)
+    >>> dungeon_get_size(d)
+    (3, 2)
+    >>> d[1][2]
+    (0, 0)
+    """
+    return DungeonT(rows, cols)
+
+def dungeon_from_rooms(rooms: list[list[RoomT]]) -> DungeonT:
+    """
+    creates a dungeon from a list of rows of rooms
+
+    Doctest :
+
+    >>> d = dungeon_from_rooms([[(BLOCK_QUAD, 0), (BLOCK_SINGLE, 1)]])
+    >>> d[0][1]
+    (1, 1)
+    >>> dungeon_to_rooms(d)
+    [[(5, 0), (1, 1)]]
+    """
+    rows = len(rooms)
+    cols = len(rooms[0]) if rows > 0 else 0
+
+    dungeon = dungeon_create(rows, cols)
+    for row in range(rows):
+        for col in range(cols):
+            dungeon.cells[row * cols + col] = dungeon_room_pack(rooms[row][col])
+
+    return dungeon
+
+def dungeon_to_rooms(dungeon: DungeonT) -> list[list[RoomT]]:
+    """
+    opposite of dungeon_from_rooms
+    """
+    return [dungeon_get_row_rooms(dungeon, row) for row in range(dungeon_get_height(dungeon))]
+
+def dungeon_copy_from(dungeon: DungeonT, other: DungeonT):
+    """
+    replaces ``dungeon`` rooms and size with the ones of ``other``, in place
+    """
+    dungeon.width = other.width
+    dungeon.height = other.height
+    dungeon.cells = bytearray(other.cells)
+    dungeon.adjacency = bytearray(other.adjacency) if other.adjacency != None else None
+    dungeon.components = array("i", other.components) if other.components != None else None
+    dungeon.overlay = None
+    _dungeon_new_layout(dungeon)
+
+def dungeon_clone(dungeon: DungeonT) -> DungeonT:
+    """
+    new dungeon with the same rooms, copies the packed cells instead of going through deepcopy
+    derived data kept in caches is not copied, the clone is a new layout
+
+    >>> d = dungeon_from_rooms([[[BLOCK_QUAD, 0], [BLOCK_SINGLE, 1]]])
+    >>> clone = dungeon_clone(d)
+    >>> dungeon_rotate_room(clone, 0, 1)
+    True
+    >>> clone == d, dungeon_get_room(d, 1, 0), dungeon_get_room(clone, 1, 0)
+    (False, (1, 1), (1, 2))
+    """
+    clone = DungeonGrid()
+    dungeon_copy_from(clone, dungeon)
+    return clone
+
+def dungeon_get_room(dungeon: DungeonT, col: int, row: int) -> RoomT:
+    """
+    same as dungeon[row][col] but without creating a row view
+    """
+    return _UNPACKED_ROOMS[dungeon.cells[row * dungeon.width + col]]
+
+def dungeon_set_room(dungeon: DungeonT, col: int, row: int, room: RoomT):
+    """
+    same as dungeon[row][col] = room but without creating a row view
+    """
+    index = row * dungeon.width + col
+    packed_room = dungeon_room_pack(room)
+    if dungeon.cells[index] == packed_room:
+        return
+
+    dungeon.cells[index] = packed_room
+    dungeon.version = next(g_dungeon_versions)
+
+    # only this room and its neighbors can change connections
+    if dungeon.adjacency != None:
+        _dungeon_adjacency_patch(dungeon, col, row)
+
+def dungeon_get_row_packed(dungeon: DungeonT, row: int) -> bytes:
+    """
+    returns packed rooms of a whole row (see dungeon_room_pack)
+    """
+    start = row * dungeon.width
+    return bytes(dungeon.cells[start:start + dungeon.width])
+
+def dungeon_get_row_rooms(dungeon: DungeonT, row: int) -> list[RoomT]:
+    """
+    returns rooms of a whole row
+
+    Doctest :
+
+    >>> d = dungeon_from_rooms([[(BLOCK_QUAD, 0), (BLOCK_SINGLE, 1)], [(BLOCK_SOLID, 0), (BLOCK_TRIPLE, 3)]])
+    >>> dungeon_get_row_rooms(d, 1)
+    [(0, 0), (4, 3)]
+    """
+    return [_UNPACKED_ROOMS[packed_room] for packed_room in dungeon_get_row_packed(dungeon, row)]
+
+def dungeon_get_row_masks(dungeon: DungeonT, row: int) -> bytes:
+    """
+    returns door masks of a whole row, one byte per room (see dungeon_room_get_mask)
+
+    Doctest :
+
+    >>> d = dungeon_from_rooms([[(BLOCK_QUAD, 0), (BLOCK_SINGLE, 1)]])
+    >>> list(dungeon_get_row_masks(d, 0))
+    [15, 2]
+    """
+    return dungeon_get_row_packed(dungeon, row).translate(_PACKED_ROOM_MASKS)
+
+def dungeon_get_room_mask(dungeon: DungeonT, col: int, row: int) -> RoomMaskT:
+    """
+    door mask of the room at col, row (see dungeon_room_get_mask)
+    """
+    return _PACKED_ROOM_MASKS[dungeon.cells[row * dungeon.width + col]]
+
 # initalizes dungeon in ``dungeon`` bcs its passed by reference
 def dungeon_init(dungeon: DungeonT, rows: int, cols: int) -> NoneType:
     """
     Initializes the dungeon grid with empty rooms.
     
-    The dungeon list is modified in-place.
+    The dungeon is modified in-place.
 
     Args:
-        dungeon (DungeonT): The dungeon list to initialize.
+        dungeon (DungeonT): The dungeon to initialize.
         rows (int): Number of rows.
         cols (int): Number of columns.
     
     Doctest :
-    >>> d = []
+    >>> d = DungeonT()
     >>> dungeon_init(d, 2, 3)
     >>> # Check dimensions (2 rows, 3 cols)
     >>> len(d)
@@ -101,11 +387,14 @@ def dungeon_init(dungeon: DungeonT, rows: int, cols: int) -> NoneType:
     >>> d[0][0]
     (0, 0)
     """
-    dungeon.clear()
-
-    # init each line with col amount of empty rooms
-    for _ in range(rows):
-        dungeon.append([dungeon_room_create()] * cols)
+    # every room is 0 once packed: solid block, no rotation
+    dungeon.width = cols
+    dungeon.height = rows
+    dungeon.cells = bytearray(rows * cols)
+    dungeon.adjacency = None
+    dungeon.components = None
+    dungeon.overlay = None
+    _dungeon_new_layout(dungeon)
 
 def _rotate_room_connections(room_connections: RoomConnectionsT, room_rotations: int) -> RoomConnectionsT:
     rotated_room_connections = [False] * DOOR_COUNT
@@ -117,6 +406,99 @@ def _rotate_room_connections(room_connections: RoomConnectionsT, room_rotations:
 
     return RoomConnectionsT(rotated_room_connections)
 
+def _connections_to_mask(room_connections: RoomConnectionsT) -> RoomMaskT:
+    mask = DOOR_MASK_NONE
+    for door in range(DOOR_COUNT):
+        if room_connections[door]:
+            mask |= 1 << door
+
+    return mask
+
+def _build_room_tables() -> tuple[list[list[RoomConnectionsT]], list[list[RoomMaskT]], dict[RoomMaskT, RoomT]]:
+    """
+    precompute connections and door mask of every (block id, rotation) once at import
+    """
+    connections_table = []
+    mask_table = []
+    room_from_mask = {}
+
+    for block_id in range(BLOCK_COUNT):
+        block_connections = []
+        block_masks = []
+        for rotation in range(DOOR_COUNT):
+            room_connections = _rotate_room_connections(_BLOCK_BASE_CONNECTIONS[block_id], rotation)
+            mask = _connections_to_mask(room_connections)
+            block_connections.append(room_connections)
+            block_masks.append(mask)
+
+            # keep first matching room, same search order as before (block id then rotation)
+            if mask not in room_from_mask:
+                room_from_mask[mask] = dungeon_room_create(block_id, rotation)
+
+        connections_table.append(block_connections)
+        mask_table.append(block_masks)
+
+    return connections_table, mask_table, room_from_mask
+
+# connections (up, right, down, left) of each block at rotation 0
+# background is never placed in the dungeon, treat it as solid
+_BLOCK_BASE_CONNECTIONS = (
+    (False, False, False, False), # BLOCK_SOLID
+    (True, False, False, False),  # BLOCK_SINGLE
+    (True, True, False, False),   # BLOCK_DOUBLE_ADJACENT
+    (True, False, True, False),   # BLOCK_DOUBLE_OPPOSITE
+    (True, True, True, False),    # BLOCK_TRIPLE
+    (True, True, True, True),     # BLOCK_QUAD
+    (False, False, False, False), # BLOCK_WALL_BACKGROUND
+)
+
+# [block_id][rotation % DOOR_COUNT] -> connections / door mask
+_ROOM_CONNECTIONS_TABLE, _ROOM_MASK_TABLE, _ROOM_FROM_MASK = _build_room_tables()
+
+def dungeon_room_get_mask(room: RoomT) -> RoomMaskT:
+    """
+    Returns the 4 bit door mask of a room, bit ``ROOM_CONNECTION_x`` is set if that door is open.
+    Invalid rooms have no doors.
+
+    Doctest :
+
+    >>> dungeon_room_get_mask((BLOCK_SINGLE, 0)) == DOOR_MASK_UP
+    True
+    >>> dungeon_room_get_mask((BLOCK_DOUBLE_ADJACENT, 1)) == DOOR_MASK_RIGHT | DOOR_MASK_DOWN
+    True
+    >>> dungeon_room_get_mask((BLOCK_QUAD, 7)) == DOOR_MASK_ALL
+    True
+    >>> dungeon_room_get_mask((BLOCK_COUNT, 0))
+    0
+    """
+    block_id = room[ROOM_BLOCK_ID]
+    if block_id >= BLOCK_COUNT:
+        return DOOR_MASK_NONE # invalid room_id
+
+    return _ROOM_MASK_TABLE[block_id][room[ROOM_ROTATION_COUNT] % DOOR_COUNT]
+
+# packed room -> door mask, usable with bytes.translate to get the masks of a whole row at once
+_PACKED_ROOM_MASKS = bytes(dungeon_room_get_mask(_UNPACKED_ROOMS[packed_room]) for packed_room in range(PACKED_ROOM_COUNT))
+
+def dungeon_masks_connected(mask1: RoomMaskT, mask2: RoomMaskT, direction: int) -> bool:
+    """
+    mask1, mask2: door masks of 2 adjacent rooms
+    direction: ROOM_CONNECTION_x direction going from room 1 to room 2
+
+    returns True if room 1 has a door towards room 2 and room 2 has the opposite door
+
+    Doctest :
+
+    >>> dungeon_masks_connected(DOOR_MASK_DOWN, DOOR_MASK_UP, ROOM_CONNECTION_DOWN)
+    True
+    >>> dungeon_masks_connected(DOOR_MASK_DOWN, DOOR_MASK_UP, ROOM_CONNECTION_UP)
+    False
+    >>> dungeon_masks_connected(DOOR_MASK_ALL, DOOR_MASK_UP | DOOR_MASK_DOWN, ROOM_CONNECTION_RIGHT)
+    False
+    """
+    opposite_direction = (direction + 2) % DOOR_COUNT
+    return bool(mask1 & (1 << direction)) and bool(mask2 & (1 << opposite_direction))
+
 def dungeon_room_get_connections(room: RoomT) -> RoomConnectionsT:
     """
     Calculates the open connections (doors) of a room based on its block type and rotation.
@@ -146,33 +528,12 @@ def dungeon_room_get_connections(room: RoomT) -> RoomConnectionsT:
     >>> dungeon_room_get_connections([BLOCK_QUAD, 1])
     (True, True, True, True)
     """
-    # init room connections that we will change and convert to tuple at end
-    room_connections: RoomConnectionsT = RoomConnectionsT()
-
     # check if room is invalid
     if room[ROOM_BLOCK_ID] >= BLOCK_COUNT:
-        return room_connections # invalid room_id
-
-    # get room basic door setup
-    room_id = room[ROOM_BLOCK_ID]
+        return RoomConnectionsT() # invalid room_id
 
-
-    if room_id == BLOCK_SOLID:
-        room_connections = (False, False, False, False)
-    elif room_id == BLOCK_SINGLE:
-        room_connections = (True, False, False, False)
-    elif room_id == BLOCK_DOUBLE_ADJACENT:
-        room_connections = (True, True, False, False)
-    elif room_id == BLOCK_DOUBLE_OPPOSITE:
-        room_connections = (True, False, True, False)
-    elif room_id == BLOCK_TRIPLE:
-        room_connections = (True, True, True, False)
-    elif room_id == BLOCK_QUAD:
-        room_connections = (True, True, True, True)
-
-    # rotate room
-    room_rotations = room[ROOM_ROTATION_COUNT]
-    return _rotate_room_connections(room_connections, room_rotations)
+    # rotated connections are precomputed
+    return _ROOM_CONNECTIONS_TABLE[room[ROOM_BLOCK_ID]][room[ROOM_ROTATION_COUNT] % DOOR_COUNT]
 
 def dungeon_room_from_connections(connections: RoomConnectionsT) -> RoomPosT:
     """
@@ -181,32 +542,17 @@ def dungeon_room_from_connections(connections: RoomConnectionsT) -> RoomPosT:
     
     If no exact match is found (which shouldn't happen with standard blocks), 
     it returns a Solid block.
+
+    Doctest :
+
+    >>> dungeon_room_from_connections((False, True, False, True))
+    (3, 1)
+    >>> dungeon_room_from_connections((False, False, False, False))
+    (0, 0)
     """
-    # Define the "base" connection pattern for each block type at rotation 0
-    # These must match the logic in dungeon_room_get_connections
-    base_patterns = {
-        BLOCK_SOLID:           (False, False, False, False),
-        BLOCK_SINGLE:          (True, False, False, False),
-        BLOCK_DOUBLE_ADJACENT: (True, True, False, False),
-        BLOCK_DOUBLE_OPPOSITE: (True, False, True, False),
-        BLOCK_TRIPLE:          (True, True, True, False),
-        BLOCK_QUAD:            (True, True, True, True),
-    }
-
-    # Iterate through every possible block type
-    for block_id, base_pattern in base_patterns.items():
-        # Try all 4 rotations (0, 1, 2, 3)
-        for r in range(DOOR_COUNT):
-            # Simulate the rotation of the base pattern
-            # This logic mimics the forward rotation in dungeon_room_get_connections
-            rotated_pattern = [False] * DOOR_COUNT
-            for i in range(DOOR_COUNT):
-                rotated_i = (i + r) % DOOR_COUNT
-                rotated_pattern[rotated_i] = base_pattern[i]
-            
-            # Check if this block + rotation matches our requirements
-            if tuple(rotated_pattern) == connections:
-                return dungeon_room_create(block_id, r)
+    mask = _connections_to_mask(connections)
+    if mask in _ROOM_FROM_MASK:
+        return _ROOM_FROM_MASK[mask]
 
     # Fallback to solid block if no match is found
     return dungeon_room_create(BLOCK_SOLID, 0)
@@ -281,24 +627,21 @@ def dungeon_rooms_connected(room1: RoomT, room1_pos: RoomPosT, room2: RoomT, roo
     if distance != 1:
         return False
 
-    # get up, right, down, left connections
-    room1_connections = dungeon_room_get_connections(room1)
-    room2_connections = dungeon_room_get_connections(room2)
-
     # calculate relative position
     # dx = col difference, dy = row difference
     dx = room2_pos[ROOM_POS_COL] - room1_pos[ROOM_POS_COL]
     dy = room2_pos[ROOM_POS_ROW] - room1_pos[ROOM_POS_ROW]
 
     # check aligned doors based on rel pos
+    direction = ROOM_CONNECTION_UP
     if dy == 1 and dx == 0:
-        return room1_connections[2] and room2_connections[0]
-    elif dy == -1 and dx == 0:
-        return room1_connections[0] and room2_connections[2]
+        direction = ROOM_CONNECTION_DOWN
     elif dx == 1 and dy == 0:
-        return room1_connections[1] and room2_connections[3]
+        direction = ROOM_CONNECTION_RIGHT
     elif dx == -1 and dy == 0:
-        return room1_connections[3] and room2_connections[1]
+        direction = ROOM_CONNECTION_LEFT
+
+    return dungeon_masks_connected(dungeon_room_get_mask(room1), dungeon_room_get_mask(room2), direction)
 
 def dungeon_room_pos_in_bounds(dungeon: DungeonT, room_pos: RoomPosT) -> bool:
     # check if negative values
@@ -339,7 +682,7 @@ def dungeon_get_valid_neighbor_rooms(dungeon: DungeonT, current_room_pos: RoomPo
 
     Doctest:
     >>> # Setup a 2x2 dungeon: All QUAD rooms (all connections possible)
-    >>> D = [[[BLOCK_QUAD, 0], [BLOCK_QUAD, 0]], [[BLOCK_QUAD, 0], [BLOCK_QUAD, 0]]]
+    >>> D = dungeon_from_rooms([[[BLOCK_QUAD, 0], [BLOCK_QUAD, 0]], [[BLOCK_QUAD, 0], [BLOCK_QUAD, 0]]])
     >>> # CASE 1: Center room (1, 0) should connect to (0, 0) Left, (1, 1) Down
     >>> # (0, 0) is Row 0, Col 0. (1, 0) is Row 0, Col 1.
     >>> dungeon_get_valid_neighbor_rooms(D, room_pos_create(col=0, row=0))
@@ -352,51 +695,457 @@ def dungeon_get_valid_neighbor_rooms(dungeon: DungeonT, current_room_pos: RoomPo
     
     >>> # CASE 3: Restrictive Room. Room at (0, 0) has only UP connection open.
     >>> # Neighbor at (1, 0) is Quad (all open).
-    >>> D2 = [[[BLOCK_SINGLE, 0], [BLOCK_QUAD, 0]], [[BLOCK_QUAD, 0], [BLOCK_QUAD, 0]]]
+    >>> D2 = dungeon_from_rooms([[[BLOCK_SINGLE, 0], [BLOCK_QUAD, 0]], [[BLOCK_QUAD, 0], [BLOCK_QUAD, 0]]])
     >>> # Room at (0, 0) only allows UP. Neighbor above is OOB.
     >>> dungeon_get_valid_neighbor_rooms(D2, room_pos_create(col=0, row=0))
     []
     """
     current_col = current_room_pos[ROOM_POS_COL]
     current_row = current_room_pos[ROOM_POS_ROW]
-    
-    current_room = dungeon[current_row][current_col]
-    valid_neighbors = []
 
-    possible_deltas = [
-        (0, -1, ROOM_CONNECTION_UP),
-        (1, 0, ROOM_CONNECTION_RIGHT),
-        (0, 1, ROOM_CONNECTION_DOWN),
-        (-1, 0, ROOM_CONNECTION_LEFT)
-    ]
-
-    for d_col, d_row, conn_index in possible_deltas:
-        new_col = current_col + d_col
-        new_row = current_row + d_row
-        new_pos = room_pos_create(new_col, new_row)
-        
-        # check dungeon limits
-        if not dungeon_room_pos_in_bounds(dungeon, room_pos_create(col=new_col, row=new_row)):
-            continue
-            
-        neighbor_room = dungeon[new_row][new_col]
+    # connected neighbors are cached, just read the bits
+    neighbor_mask = dungeon_get_neighbor_mask(dungeon, current_col, current_row)
 
-        # check if rooms are adjacent and doors connected
-        if dungeon_rooms_connected(current_room, current_room_pos, neighbor_room, new_pos):
-            valid_neighbors.append(new_pos)
+    valid_neighbors = []
+    for d_col, d_row, direction in NEIGHBOR_DELTAS:
+        if neighbor_mask & (1 << direction):
+            valid_neighbors.append(room_pos_create(current_col + d_col, current_row + d_row))
             
     return valid_neighbors
 
-def dungeon_pick_refined_room(dungeon, r, c, must_have: set[int]) -> RoomT:
+# ---------- ADJACENCY ----------
+
+def _dungeon_compute_neighbor_mask(dungeon: DungeonT, col: int, row: int) -> RoomMaskT:
+    """
+    bit ROOM_CONNECTION_x set if room at col, row is connected to its neighbor in that direction
+    """
+    width = dungeon.width
+    cells = dungeon.cells
+    index = row * width + col
+    room_mask = _PACKED_ROOM_MASKS[cells[index]]
+
+    neighbor_mask = DOOR_MASK_NONE
+    if row > 0 and room_mask & DOOR_MASK_UP and _PACKED_ROOM_MASKS[cells[index - width]] & DOOR_MASK_DOWN:
+        neighbor_mask |= DOOR_MASK_UP
+    if col < width - 1 and room_mask & DOOR_MASK_RIGHT and _PACKED_ROOM_MASKS[cells[index + 1]] & DOOR_MASK_LEFT:
+        neighbor_mask |= DOOR_MASK_RIGHT
+    if row < dungeon.height - 1 and room_mask & DOOR_MASK_DOWN and _PACKED_ROOM_MASKS[cells[index + width]] & DOOR_MASK_UP:
+        neighbor_mask |= DOOR_MASK_DOWN
+    if col > 0 and room_mask & DOOR_MASK_LEFT and _PACKED_ROOM_MASKS[cells[index - 1]] & DOOR_MASK_RIGHT:
+        neighbor_mask |= DOOR_MASK_LEFT
+
+    return neighbor_mask
+
+def _dungeon_open_edges_numpy(dungeon: DungeonT) -> tuple:
+    """
+    returns: (horizontal, vertical) uint8 arrays of shape (height, width), 1 if the room
+             is connected to its right / down neighbor
+    door masks come from _PACKED_ROOM_MASKS (rotation already applied), then the edges
+    are a shifted AND of the whole grid against itself
+    """
+    height, width = dungeon.height, dungeon.width
+    masks = np.frombuffer(bytes(dungeon.cells.translate(_PACKED_ROOM_MASKS)), dtype=np.uint8).reshape(height, width)
+
+    horizontal = np.zeros((height, width), dtype=np.uint8)
+    horizontal[:, :-1] = ((masks[:, :-1] & DOOR_MASK_RIGHT) != 0) & ((masks[:, 1:] & DOOR_MASK_LEFT) != 0)
+
+    vertical = np.zeros((height, width), dtype=np.uint8)
+    vertical[:-1, :] = ((masks[:-1, :] & DOOR_MASK_DOWN) != 0) & ((masks[1:, :] & DOOR_MASK_UP) != 0)
+
+    return horizontal, vertical
+
+def _dungeon_adjacency_build_numpy(dungeon: DungeonT) -> bytearray:
+    horizontal, vertical = _dungeon_open_edges_numpy(dungeon)
+
+    # each open edge sets a bit on both of its rooms
+    adjacency = horizontal * DOOR_MASK_RIGHT
+    adjacency[:, 1:] |= horizontal[:, :-1] * DOOR_MASK_LEFT
+    adjacency |= vertical * DOOR_MASK_DOWN
+    adjacency[1:, :] |= vertical[:-1, :] * DOOR_MASK_UP
+
+    return bytearray(adjacency.tobytes())
+
+def _dungeon_adjacency_build_python(dungeon: DungeonT) -> bytearray:
+    """
+    pure python fallback, room by room
+    """
+    width, height = dungeon.width, dungeon.height
+    adjacency = bytearray(width * height)
+
+    for row in range(height):
+        for col in range(width):
+            adjacency[row * width + col] = _dungeon_compute_neighbor_mask(dungeon, col, row)
+
+    return adjacency
+
+def _dungeon_adjacency_build(dungeon: DungeonT) -> bytearray:
+    """
+    with numpy (optional) the whole grid is built with array operations, same bytes as the pure python build
+
+    Doctest :
+
+    >>> rng = random.Random(0)
+    >>> d = dungeon_from_rooms([[(rng.randrange(BLOCK_COUNT), rng.randrange(DOOR_COUNT)) for col in range(7)] for row in range(5)])
+    >>> not NUMPY_AVAILABLE or _dungeon_adjacency_build_numpy(d) == _dungeon_adjacency_build_python(d) # skipped without numpy
+    True
+    """
+    if NUMPY_AVAILABLE:
+        return _dungeon_adjacency_build_numpy(dungeon)
+
+    return _dungeon_adjacency_build_python(dungeon)
+
+def _dungeon_adjacency_patch(dungeon: DungeonT, col: int, row: int):
+    """
+    updates adjacency of the room at col, row and the matching bit of its 4 neighbors
+    """
+    adjacency = dungeon.adjacency
+    index = row * dungeon.width + col
+    neighbor_mask = _dungeon_compute_neighbor_mask(dungeon, col, row)
+    changed_mask = adjacency[index] ^ neighbor_mask
+    adjacency[index] = neighbor_mask
+
+    # connectivity didnt change, labels stay valid
+    if changed_mask == DOOR_MASK_NONE:
+        return
+
+    _dungeon_components_patch(dungeon, index, neighbor_mask, changed_mask)
+    _dungeon_log_edit(dungeon, index)
+
+    for d_col, d_row, direction in NEIGHBOR_DELTAS:
+        new_col, new_row = col + d_col, row + d_row
+        if new_col < 0 or new_row < 0 or new_col >= dungeon.width or new_row >= dungeon.height:
+            continue
+
+        # neighbor sees us through the opposite door
+        neighbor_index = new_row * dungeon.width + new_col
+        opposite_bit = 1 << ((direction + 2) % DOOR_COUNT)
+        if neighbor_mask & (1 << direction):
+            adjacency[neighbor_index] |= opposite_bit
+        else:
+            adjacency[neighbor_index] &= ~opposite_bit
+
+def dungeon_get_adjacency(dungeon: DungeonT) -> bytearray:
+    """
+    returns one byte per room (index row * width + col), bit ROOM_CONNECTION_x is set
+    if the room is connected to its neighbor in that direction (doors aligned and in bounds)
+
+    built on first use, then kept up to date by dungeon_set_room / dungeon_rotate_room
+
+    Doctest :
+
+    >>> d = dungeon_from_rooms([[(BLOCK_DOUBLE_OPPOSITE, 1), (BLOCK_SINGLE, 3)]])
+    >>> list(dungeon_get_adjacency(d)) == [DOOR_MASK_RIGHT, DOOR_MASK_LEFT]
+    True
+    >>> dungeon_rotate_room(d, 0, 1)
+    True
+    >>> list(dungeon_get_adjacency(d))
+    [0, 0]
+    """
+    if dungeon.adjacency == None:
+        dungeon.adjacency = _dungeon_adjacency_build(dungeon)
+
+    return dungeon.adjacency
+
+def dungeon_get_neighbor_mask(dungeon: DungeonT, col: int, row: int) -> RoomMaskT:
+    """
+    bitmask of the connected neighbors of room at col, row (see dungeon_get_adjacency)
+    """
+    return dungeon_get_adjacency(dungeon)[row * dungeon.width + col]
+
+# ---------- EDIT LOG ----------
+
+def _dungeon_new_layout(dungeon: DungeonT):
+    """
+    rooms were replaced as a whole, consumers of the edit log have to start over
+    """
+    dungeon.version = next(g_dungeon_versions)
+    dungeon.layout_id = next(g_dungeon_layout_ids)
+    dungeon.edits = []
+    dungeon.caches = {}
+
+def _dungeon_log_edit(dungeon: DungeonT, index: int):
+    """
+    records that the connections of room ``index`` (and so of its neighbors) changed
+    """
+    if len(dungeon.edits) >= DUNGEON_EDITS_MAX:
+        # nobody kept up, cheaper to let consumers rebuild than to keep the log
+        dungeon.layout_id = next(g_dungeon_layout_ids)
+        dungeon.edits = []
+        return
+
+    dungeon.edits.append(index)
+
+def dungeon_get_version(dungeon: DungeonT) -> int:
+    """
+    returns: a number that changes with every room change (rotation, set, init, copy),
+             anything computed from the rooms stays valid while it is the same
+
+    Doctest :
+
+    >>> d = dungeon_from_rooms([[(BLOCK_QUAD, 0)]])
+    >>> version = dungeon_get_version(d)
+    >>> dungeon_set_room(d, 0, 0, (BLOCK_QUAD, 0)) # same room, nothing changes
+    >>> dungeon_get_version(d) == version
+    True
+    >>> dungeon_rotate_room(d, 0, 0)
+    True
+    >>> dungeon_get_version(d) == version
+    False
+    """
+    return dungeon.version
+
+def dungeon_get_edit_cursor(dungeon: DungeonT) -> tuple[int, int]:
+    """
+    returns: (layout_id, position in the edit log) to pass to dungeon_get_edits later
+    the adjacency is built first since edits are only logged once it exists
+    """
+    dungeon_get_adjacency(dungeon)
+    return dungeon.layout_id, len(dungeon.edits)
+
+def dungeon_get_edits(dungeon: DungeonT, cursor: tuple[int, int]) -> list[int] | NoneType:
+    """
+    returns: indices (row * width + col) of the rooms whose connections changed since cursor,
+             the neighbors of each room changed too,
+             None if the rooms were replaced since then and everything has to be rebuilt
+
+    Doctest :
+
+    >>> d = dungeon_from_rooms([[(BLOCK_DOUBLE_OPPOSITE, 1), (BLOCK_SINGLE, 3)]])
+    >>> cursor = dungeon_get_edit_cursor(d)
+    >>> dungeon_rotate_room(d, 0, 1)
+    True
+    >>> dungeon_get_edits(d, cursor)
+    [1]
+    >>> dungeon_init(d, 1, 2)
+    >>> dungeon_get_edits(d, cursor) == None
+    True
+    """
+    layout_id, position = cursor
+    if layout_id != dungeon.layout_id:
+        return None
+
+    return dungeon.edits[position:]
+
+# ---------- OVERLAYS ----------
+
+# temporary rooms pushed on top of the real ones (see dungeon_push_overlay)
+DungeonOverlayT = list
+T_DUNGEON_OVERLAY_FILL = 0   # RoomT every room not in T_DUNGEON_OVERLAY_ROOMS reads as, None to keep the real rooms
+T_DUNGEON_OVERLAY_ROOMS = 1  # dict[int, PackedRoomT] room index (row * width + col) -> room, the sparse layer
+T_DUNGEON_OVERLAY_BASE = 2   # DungeonGrid holding the rooms (and everything derived from them) from under the overlay
+T_DUNGEON_OVERLAY_COUNT = 3
+
+def _dungeon_move_layer(dungeon: DungeonT, other: DungeonT):
+    """
+    moves every slot of ``other`` into ``dungeon``, no copy
+    """
+    for slot in DungeonGrid.__slots__:
+        setattr(dungeon, slot, getattr(other, slot))
+
+def _dungeon_adjacency_fill(width: int, height: int, packed_room: PackedRoomT) -> bytearray:
+    """
+    adjacency of a dungeon where every room is ``packed_room``, built from 3 row templates
+    (first, middle and last row) since only the borders differ
+    """
+    room_mask = _PACKED_ROOM_MASKS[packed_room]
+    horizontal = room_mask & DOOR_MASK_RIGHT and room_mask & DOOR_MASK_LEFT
+    vertical = room_mask & DOOR_MASK_DOWN and room_mask & DOOR_MASK_UP
+
+    def row_template(row: int) -> bytes:
+        neighbor_mask = DOOR_MASK_NONE
+        if vertical and row > 0:
+            neighbor_mask |= DOOR_MASK_UP
+        if vertical and row < height - 1:
+            neighbor_mask |= DOOR_MASK_DOWN
+
+        template = bytearray([neighbor_mask]) * width
+        if horizontal:
+            for col in range(width):
+                template[col] |= (DOOR_MASK_RIGHT if col < width - 1 else 0) | (DOOR_MASK_LEFT if col > 0 else 0)
+        return bytes(template)
+
+    if height <= 1:
+        return bytearray(row_template(0)) * height
+
+    return bytearray(row_template(0) + row_template(1) * (height - 2) + row_template(height - 1))
+
+def dungeon_push_overlay(dungeon: DungeonT, rooms: dict[RoomPosT, RoomT], fill_room: RoomT | NoneType = None) -> DungeonOverlayT:
+    """
+    puts temporary rooms on top of the dungeon until dungeon_drop_overlay
+    rooms: room_pos -> room to show instead of the real one
+    fill_room: room every other room shows, None to keep the real ones
+
+    the real rooms are moved aside untouched with everything derived from them (adjacency, caches...),
+    the overlay rooms are written where lookups read so accessors cost the same,
+    pushing costs O(rooms): the cells and adjacency are copied (or filled from fill_room), then the overlay rooms are written
+    room changes while the overlay is pushed change the overlay, they are dropped with it
+
+    Doctest :
+
+    >>> d = dungeon_from_rooms([[(BLOCK_DOUBLE_OPPOSITE, 1), (BLOCK_SINGLE, 3), (BLOCK_SOLID, 0)]])
+    >>> version = dungeon_get_version(d)
+    >>> overlay = dungeon_push_overlay(d, {(1, 0): (BLOCK_SOLID, 0)}, fill_room=(BLOCK_QUAD, 0))
+    >>> dungeon_get_row_rooms(d, 0), list(dungeon_get_adjacency(d)) == [0, 0, 0]
+    ([(5, 0), (0, 0), (5, 0)], True)
+    >>> dungeon_drop_overlay(d, overlay)
+    True
+    >>> dungeon_get_row_rooms(d, 0), dungeon_get_version(d) == version
+    ([(3, 1), (1, 3), (0, 0)], True)
+    """
+    width, height = dungeon.width, dungeon.height
+
+    overlay = [None] * T_DUNGEON_OVERLAY_COUNT
+    overlay[T_DUNGEON_OVERLAY_FILL] = fill_room
+    overlay[T_DUNGEON_OVERLAY_ROOMS] = {room_pos[ROOM_POS_ROW] * width + room_pos[ROOM_POS_COL]: dungeon_room_pack(room)
+                                        for room_pos, room in rooms.items()}
+    overlay[T_DUNGEON_OVERLAY_BASE] = base = DungeonGrid()
+    _dungeon_move_layer(base, dungeon)
+
+    if fill_room != None:
+        packed_fill = dungeon_room_pack(fill_room)
+        dungeon.cells = bytearray([packed_fill]) * (width * height)
+        dungeon.adjacency = _dungeon_adjacency_fill(width, height, packed_fill)
+    else:
+        dungeon.cells = bytearray(base.cells)
+        dungeon.adjacency = bytearray(base.adjacency) if base.adjacency != None else None
+    dungeon.components = None
+    dungeon.overlay = overlay
+
+    for index, packed_room in overlay[T_DUNGEON_OVERLAY_ROOMS].items():
+        dungeon.cells[index] = packed_room
+    if dungeon.adjacency != None:
+        for index in overlay[T_DUNGEON_OVERLAY_ROOMS]:
+            _dungeon_adjacency_patch(dungeon, index % width, index // width)
+
+    # starts with an empty edit log and caches, the real ones are kept in base
+    _dungeon_new_layout(dungeon)
+    return overlay
+
+def dungeon_drop_overlay(dungeon: DungeonT, overlay: DungeonOverlayT) -> bool:
+    """
+    puts back the rooms from under ``overlay`` with their version, edit log and caches, in O(1)
+    returns: False if ``overlay`` is not the top overlay of the dungeon (already dropped, or the rooms were replaced since)
+    """
+    if dungeon.overlay is not overlay:
+        log_warning(f"[dungeon_drop_overlay] overlay is not on top of the dungeon, nothing dropped")
+        return False
+
+    _dungeon_move_layer(dungeon, overlay[T_DUNGEON_OVERLAY_BASE])
+    return True
+
+def dungeon_has_overlay(dungeon: DungeonT) -> bool:
+    return dungeon.overlay != None
+
+def dungeon_get_overlay(dungeon: DungeonT) -> DungeonOverlayT | NoneType:
+    return dungeon.overlay
+
+# ---------- CONNECTED COMPONENTS ----------
+
+def _dungeon_components_build(dungeon: DungeonT) -> array:
+    """
+    flood fill each group of connected rooms with the same label
+    """
+    width = dungeon.width
+    room_count = width * dungeon.height
+    adjacency = dungeon_get_adjacency(dungeon)
+    index_deltas = (-width, 1, width, -1) # ROOM_CONNECTION_x order
+
+    labels = array("i", [-1]) * room_count
+    label = 0
+    for first_index in range(room_count):
+        if labels[first_index] != -1:
+            continue
+
+        labels[first_index] = label
+        stack = [first_index]
+        while stack:
+            index = stack.pop()
+            neighbor_mask = adjacency[index]
+            for direction in range(DOOR_COUNT):
+                if neighbor_mask & (1 << direction):
+                    neighbor_index = index + index_deltas[direction]
+                    if labels[neighbor_index] == -1:
+                        labels[neighbor_index] = label
+                        stack.append(neighbor_index)
+
+        label += 1
+
+    return labels
+
+def _dungeon_components_patch(dungeon: DungeonT, index: int, neighbor_mask: RoomMaskT, changed_mask: RoomMaskT):
+    """
+    called when connections of room ``index`` changed, drops the labels only if they can be wrong
+    """
+    labels = dungeon.components
+    if labels == None:
+        return
+
+    index_deltas = (-dungeon.width, 1, dungeon.width, -1)
+    for direction in range(DOOR_COUNT):
+        if not changed_mask & (1 << direction):
+            continue
+
+        # a new connection inside the same component changes nothing,
+        # removed connections or merged components need a relabel
+        added = bool(neighbor_mask & (1 << direction))
+        if not added or labels[index] != labels[index + index_deltas[direction]]:
+            dungeon.components = None
+            return
+
+def dungeon_get_components(dungeon: DungeonT) -> array:
+    """
+    returns the connected component label of each room (index row * width + col),
+    2 rooms have the same label if there is a path between them
+
+    relabeled lazily, only after a room change actually changed connectivity
+
+    Doctest :
+
+    >>> d = dungeon_from_rooms([[(BLOCK_DOUBLE_OPPOSITE, 1), (BLOCK_SINGLE, 3), (BLOCK_QUAD, 0)]])
+    >>> list(dungeon_get_components(d))
+    [0, 0, 1]
+    """
+    if dungeon.components == None:
+        dungeon.components = _dungeon_components_build(dungeon)
+
+    return dungeon.components
+
+def dungeon_rooms_same_component(dungeon: DungeonT, room1_pos: RoomPosT, room2_pos: RoomPosT) -> bool:
+    """
+    returns True if there is a path between the 2 rooms, in O(1) once labeled
+
+    Doctest :
+
+    >>> d = dungeon_from_rooms([[(BLOCK_DOUBLE_OPPOSITE, 1), (BLOCK_SINGLE, 3), (BLOCK_QUAD, 0)]])
+    >>> dungeon_rooms_same_component(d, (0, 0), (1, 0))
+    True
+    >>> dungeon_rooms_same_component(d, (0, 0), (2, 0))
+    False
+    >>> dungeon_rotate_room(d, 0, 0)
+    True
+    >>> dungeon_rooms_same_component(d, (0, 0), (1, 0))
+    False
+    """
+    if not dungeon_room_pos_in_bounds(dungeon, room1_pos) or not dungeon_room_pos_in_bounds(dungeon, room2_pos):
+        return False
+
+    labels = dungeon_get_components(dungeon)
+    width = dungeon.width
+    index1 = room1_pos[ROOM_POS_ROW] * width + room1_pos[ROOM_POS_COL]
+    index2 = room2_pos[ROOM_POS_ROW] * width + room2_pos[ROOM_POS_COL]
+    return labels[index1] == labels[index2]
+
+def dungeon_pick_refined_room(dungeon, r, c, must_have: set[int], rng: random.Random) -> RoomT:
     """
     Refined selection logic to allow QUADS while maintaining layout structure.
+    rng: generator the room is picked with, same rng state gives the same room
     """
     # Rule 1: No adjacent QUAD blocks
     has_quad_neighbor = False
     for dr, dc in [(-1, 0), (0, -1)]:
         nr, nc = r + dr, c + dc
-        if 0 <= nr < len(dungeon) and 0 <= nc < len(dungeon[0]):
-            if dungeon[nr][nc][ROOM_BLOCK_ID] == BLOCK_QUAD:
+        if 0 <= nr < dungeon_get_height(dungeon) and 0 <= nc < dungeon_get_width(dungeon):
+            if dungeon_get_room(dungeon, nc, nr)[ROOM_BLOCK_ID] == BLOCK_QUAD:
                 has_quad_neighbor = True
                 break
 
@@ -404,15 +1153,19 @@ def dungeon_pick_refined_room(dungeon, r, c, must_have: set[int]) -> RoomT:
     secondary_options = []
     
     # 25% chance to "prefer" a Quad if neighbors allow it
-    prefer_quad = random.random() < 0.25 and not has_quad_neighbor
+    prefer_quad = rng.random() < 0.25 and not has_quad_neighbor
+
+    must_have_mask = DOOR_MASK_NONE
+    for door in must_have:
+        must_have_mask |= 1 << door
 
     for b_id in [BLOCK_SINGLE, BLOCK_DOUBLE_ADJACENT, BLOCK_DOUBLE_OPPOSITE, BLOCK_TRIPLE, BLOCK_QUAD]:
         for rot in range(4):
-            room = dungeon_room_create(b_id, rot)
-            conns = dungeon_room_get_connections(room)
-            
-            if not all(conns[door] for door in must_have):
+            # skip rooms missing a required door
+            if _ROOM_MASK_TABLE[b_id][rot] & must_have_mask != must_have_mask:
                 continue
+
+            room = dungeon_room_create(b_id, rot)
             
             if b_id == BLOCK_QUAD:
                 if not has_quad_neighbor:
@@ -425,11 +1178,11 @@ def dungeon_pick_refined_room(dungeon, r, c, must_have: set[int]) -> RoomT:
 
     # 1. Try Triples/Doubles first (standard maze feel)
     if primary_options:
-        return random.choice(primary_options)
+        return rng.choice(primary_options)
     
     # 2. If no complex blocks fit, use a Quad (if neighbor isn't one)
     if secondary_options:
-        return random.choice(secondary_options)
+        return rng.choice(secondary_options)
         
     # 3. Ultimate fallback to Quad (even if neighbor is one) to prevent solid walls
     return dungeon_room_create(BLOCK_QUAD, 0)
@@ -449,7 +1202,7 @@ def dungeon_rotate_room(dungeon: DungeonT, row: int, col: int) -> bool:
 
     Doctest :
 
-    >>> d = []
+    >>> d = DungeonT()
     >>> dungeon_init(d, 1, 1)
     >>> # Initial state: rotation 0
     >>> d[0][0]
@@ -468,22 +1221,17 @@ def dungeon_rotate_room(dungeon: DungeonT, row: int, col: int) -> bool:
     if not dungeon_room_pos_in_bounds(dungeon, room_pos_create(col=col, row=row)):
         return False
 
-    room: RoomT = dungeon[row][col]
-    dungeon[row][col] = dungeon_room_create(room[ROOM_BLOCK_ID], room[ROOM_ROTATION_COUNT] + 1)
+    room: RoomT = dungeon_get_room(dungeon, col, row)
+    dungeon_set_room(dungeon, col, row, dungeon_room_create(room[ROOM_BLOCK_ID], room[ROOM_ROTATION_COUNT] + 1))
     return True
 
 # returns number of rooms horizontally
 def dungeon_get_width(dungeon: DungeonT) -> int:
-    # dungeon empty
-    if len(dungeon) == 0:
-        return 0
-    
-    # each room is same size so return size of first column
-    return len(dungeon[0])
+    return dungeon.width
 
 # returns number of rooms vertically
 def dungeon_get_height(dungeon: DungeonT) -> int:
-    return len(dungeon)
+    return dungeon.height
 
 def dungeon_get_size(dungeon: DungeonT) -> tuple[int, int]:
     return (dungeon_get_width(dungeon), dungeon_get_height(dungeon))
@@ -492,8 +1240,8 @@ def dungeon_print_values(dungeon: DungeonT):
     """
     Prints the raw values of the dungeon structure to the console for debugging.
     """
-    for row in dungeon:
-        print(row)
+    for row in range(dungeon_get_height(dungeon)):
+        print(dungeon_get_row_rooms(dungeon, row))
 
 def dungeon_get_screen_pos(dungeon) -> ScreenPosT:
     dungeon_screen_size = (BLOCK_SCALED_SIZE[0] * dungeon_get_width(dungeon), BLOCK_SCALED_SIZE[1] * dungeon_get_height(dungeon))
@@ -542,8 +1290,8 @@ def dungeon_render(dungeon: DungeonT, assets: AssetsT):
     # render black background
     fltk.rectangle(0, 0, g_window_size[0], g_window_size[1], remplissage="black")
 
-    for i, row in enumerate(dungeon): # draw rows
-        for j, room in enumerate(row): # draw each individual room
+    for i in range(dungeon_get_height(dungeon)): # draw rows
+        for j, room in enumerate(dungeon_get_row_rooms(dungeon, i)): # draw each individual room
             x, y = dungeon_get_room_screen_coords(dungeon, room_pos_create(row=i, col=j))
 
             # draw room
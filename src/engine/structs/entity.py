@@ -8,8 +8,15 @@ from src.engine.asset_manager import *
 from src.utils.logging import *
 
 
+class Entity(BaseEntity):
+    """
+    entity with a level (adventurer, dragons)
+    """
+    __slots__ = ("level",)
+    FIELDS = BaseEntity.FIELDS + ("level",)
+
 # BaseEntityT -> EntityT
-EntityT = list[RoomPosT | int]
+EntityT = Entity
 
 # enum for entity struct
 T_ENTITY_LEVEL = T_BASE_ENTITY_COUNT
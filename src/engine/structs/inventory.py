@@ -30,6 +30,12 @@ def inventory_item_create(item_type: InventoryItemE, item_data: Any, consume_cal
 
     return item
 
+def inventory_clone(inventory: InventoryT) -> InventoryT:
+    """
+    copies each item list, item data and callbacks are shared
+    """
+    return [list(item) for item in inventory]
+
 def inventory_add_item(inventory: InventoryT, item: InventoryItemT):
     inventory.append(item)
     log_debug_full(f"added item to inventory: {item[T_INVENTORY_ITEM_TYPE]}")
@@ -1,11 +1,17 @@
 from src.engine.structs.dungeon import *
 from src.engine.structs.entity import *
 
+class Treasure(BaseEntity):
+    __slots__ = ("image_id",)
+    FIELDS = BaseEntity.FIELDS + ("image_id",)
+
 # BaseEntityT -> TreasureT
-TreasureT = BaseEntityT | list[int]
+TreasureT = Treasure
 T_TREASURE_IMAGE_ID = T_BASE_ENTITY_COUNT # image id, for different images for treasure
 T_TREASURE_COUNT = T_BASE_ENTITY_COUNT + 1
 
+base_entity_register_record(E_ENTITY_TREASURE, Treasure)
+
 def treasure_create(room_pos: RoomPosT, image_id: int) -> TreasureT:
     treasure: TreasureT = base_entity_create(entity_type=E_ENTITY_TREASURE, room_pos=room_pos, size=T_TREASURE_COUNT)
 
@@ -14,7 +20,7 @@ def treasure_create(room_pos: RoomPosT, image_id: int) -> TreasureT:
     return treasure
 
 def treasure_is_valid(treasure) -> bool:
-    return treasure != None and isinstance(treasure, list) and len(treasure) == T_TREASURE_COUNT
+    return isinstance(treasure, Treasure)
 
 def treasure_render(dungeon, treasure: TreasureT, assets: AssetsT):
     if not treasure_is_valid(treasure):
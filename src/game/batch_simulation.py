@@ -0,0 +1,393 @@
+"""
+monte carlo batch simulator, plays thousands of headless games (see src/game/simulation.py)
+on every core to estimate how hard a dungeon is
+
+each game gets its own seed drawn from the batch seed, so a batch is reproducible
+and any single game can be replayed alone with batch_simulation_play_game
+
+the player is a script (see SimulationScriptT), none by default: without rotations the adventurer
+of most dungeon files never reaches a dragon, the greedy script rotates rooms for it (slower)
+
+run from the project root:
+    python -m src.game.batch_simulation <dungeon file | generated dungeon size> [games] [seed] [game mode] [none | greedy]
+"""
+import itertools
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import src.utils.logging as logging_mod
+import src.engine.engine_config as engine_config
+import src.engine.dungeon_generator as dungeon_generator
+import src.engine.pathfinding as pathfinding
+from src.engine.dungeon_generator import DungeonSettingsT, SettingT
+from src.engine.parsing import game_data_parse_file
+from src.engine.entity_system import *
+from src.engine.structs.dungeon import *
+from src.engine.ui_framework.ui import SizeT
+
+from src.game.game_definitions import *
+from src.game.simulation import *
+
+
+# games sent to a worker at once, fewer round trips between processes
+BATCH_SIMULATION_CHUNK_SIZE = 16
+
+# workers only log errors, logs of every move would be most of the time spent
+BATCH_SIMULATION_LOG_LEVEL = logging_mod.LOG_LEVEL_ERROR
+
+# what the games are made from: a dungeon file path (same dungeon each game)
+# or DungeonSettingsT (new generated dungeon each game)
+BatchSourceT = str | DungeonSettingsT
+
+# rooms the greedy script rotates per dungeon turn at most, each try is a BFS
+BATCH_SIMULATION_GREEDY_MAX_ROTATIONS = 32
+# BFS the greedy script runs per dungeon turn at most, keeps a stuck script as cheap as a good one
+BATCH_SIMULATION_GREEDY_MAX_REACHES = 160
+
+# dungeon files parsed once per worker process, path -> GameDataT
+g_parsed_dungeon_files: dict[str, GameDataT] = {}
+
+# last state the greedy script found no rotation for, a stuck game asks the same every dungeon turn
+g_greedy_stuck_state: tuple | NoneType = None
+
+
+def _batch_simulation_init_worker():
+    logging_mod.LOG_LEVEL = BATCH_SIMULATION_LOG_LEVEL
+
+def _batch_simulation_load(source: BatchSourceT, rng: GameRngT) -> GameDataT:
+    """
+    game data of a game from ``source``, generated dungeons are made with ``rng``
+    """
+    if isinstance(source, DungeonSettingsT):
+        game_data = game_data_init()
+        game_data_set_dungeon_data(game_data, dungeon_generator.generate_dungeon_data(source, rng))
+        return game_data
+
+    # simulation_run_game copies game data, the parsed one can be shared by every game
+    if source not in g_parsed_dungeon_files:
+        game_data = game_data_init()
+        game_data_parse_file(game_data, source)
+        g_parsed_dungeon_files[source] = game_data
+
+    return g_parsed_dungeon_files[source]
+
+def _greedy_reach(dungeon: DungeonT, start_room: RoomPosT, target_room: RoomPosT, strong_rooms: set[RoomPosT]) -> tuple[tuple, list[RoomPosT]]:
+    """
+    returns: (score, candidate rooms) of the rooms reached from start_room
+             score: (open doors into the strong_rooms reached, rooms between them and target_room, minus their count),
+                    lower is better, one rotation can close one door while cutting a room takes several,
+                    the score starts with (0, 0) once only the target is reached
+             candidate rooms: the ones a rotation can connect or cut, reached rooms next to one not reached
+                    and those rooms, reached strong_rooms and their neighbors
+    """
+    distance_field = pathfinding.distance_field_create(dungeon, start_room)
+    distances = distance_field[pathfinding.T_DISTANCE_FIELD_DISTANCES]
+    width = dungeon_get_width(dungeon)
+    height = dungeon_get_height(dungeon)
+    unreachable = width * height
+    adjacency = dungeon_get_adjacency(dungeon)
+
+    target_col, target_row = target_room[ROOM_POS_COL], target_room[ROOM_POS_ROW]
+    closest = unreachable
+    reached = 0
+    strong_doors = 0
+    candidate_indices = set()
+    for index, distance in enumerate(distances):
+        if distance == unreachable:
+            continue
+
+        col, row = index % width, index // width
+        reached += 1
+        closest = min(closest, abs(col - target_col) + abs(row - target_row))
+
+        is_strong_room = room_pos_create(col=col, row=row) in strong_rooms
+        if is_strong_room:
+            strong_doors += bin(adjacency[index]).count("1")
+            candidate_indices.add(index)
+
+        for d_col, d_row in ((0, -1), (1, 0), (0, 1), (-1, 0)):
+            neighbor_col, neighbor_row = col + d_col, row + d_row
+            if not (0 <= neighbor_col < width and 0 <= neighbor_row < height):
+                continue
+
+            neighbor_index = neighbor_row * width + neighbor_col
+            if is_strong_room or distances[neighbor_index] == unreachable:
+                candidate_indices.add(index)
+                candidate_indices.add(neighbor_index)
+
+    candidate_rooms = [room_pos_create(col=index % width, row=index // width) for index in sorted(candidate_indices)]
+    return (strong_doors, closest, -reached), candidate_rooms
+
+def _greedy_neighbor_pairs(rooms: list[RoomPosT]) -> list[tuple[RoomPosT, RoomPosT]]:
+    """
+    >>> _greedy_neighbor_pairs([(0, 0), (1, 0), (1, 1), (3, 3)])
+    [((0, 0), (1, 0)), ((1, 0), (1, 1))]
+    """
+    room_set = set(rooms)
+    return [(room_pos, neighbor_pos) for room_pos in rooms
+            for neighbor_pos in ((room_pos[ROOM_POS_COL] + 1, room_pos[ROOM_POS_ROW]), (room_pos[ROOM_POS_COL], room_pos[ROOM_POS_ROW] + 1))
+            if neighbor_pos in room_set]
+
+def _greedy_best_rotations(dungeon: DungeonT,
+                           room_groups: list[tuple[RoomPosT, ...]],
+                           start_room: RoomPosT,
+                           target_room: RoomPosT,
+                           strong_rooms: set[RoomPosT],
+                           score: tuple,
+                           reaches_left: int) -> tuple[list[tuple[RoomPosT, int]], int]:
+    """
+    tries every rotation of the rooms of a group together, one BFS each, the dungeon is left as it was
+    a group is tried whole or not at all, the groups after the BFS budget runs out are skipped
+    returns: ([(room, rotations), ...] of the group that does best, none if no group beats score), BFS left
+    """
+    best_score, best_rotations = score, []
+    for rooms in room_groups:
+        group_rotations = list(itertools.product(range(1, DOOR_COUNT), repeat=len(rooms)))
+        if reaches_left < len(group_rotations):
+            break
+        reaches_left -= len(group_rotations)
+
+        for rotations in group_rotations:
+            for room_pos, room_rotations in zip(rooms, rotations):
+                for _ in range(room_rotations):
+                    dungeon_rotate_room(dungeon, row=room_pos[ROOM_POS_ROW], col=room_pos[ROOM_POS_COL])
+
+            rotated_score = _greedy_reach(dungeon, start_room, target_room, strong_rooms)[0]
+            if rotated_score < best_score:
+                best_score, best_rotations = rotated_score, list(zip(rooms, rotations))
+
+            # DOOR_COUNT rotations put a room back
+            for room_pos, room_rotations in zip(rooms, rotations):
+                for _ in range(DOOR_COUNT - room_rotations):
+                    dungeon_rotate_room(dungeon, row=room_pos[ROOM_POS_ROW], col=room_pos[ROOM_POS_COL])
+
+    return best_rotations, reaches_left
+
+def batch_simulation_greedy_script(game_context: GameContextT) -> list[SimulationActionT]:
+    """
+    greedy player: rotates one room at a time, the rotation that first cuts the adventurer from the dragons
+    it cant beat (it goes to the strongest one it reaches), then gets closest to the first dragon,
+    until only that one is reached, no rotation does better or BATCH_SIMULATION_GREEDY_MAX_REACHES BFS were run
+    two next rooms are turned together when no single one does better
+    the adventurer falls back to the first dragon when it reaches none stronger (see pathfinding.find_meanest_dragon),
+    cut off from it the adventurer never moves again, so when it cant beat that one the game is lost and
+    the script only leads it there
+    """
+    global g_greedy_stuck_state
+
+    game_data = game_context[T_GAME_CTX_GAME_DATA]
+    entity_system: EntitySystemT = game_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
+    adventurer = entity_system_get_first_and_only(entity_system, E_ENTITY_ADVENTURER)
+    dragons = entity_system_get_all(entity_system, E_ENTITY_DRAGON)
+    if adventurer == None or len(dragons) == 0:
+        return []
+
+    has_strong_sword = inventory_has_item(adventurer.inventory, E_INVENTORY_ITEM_STRONG_SWORD)
+    target_dragon = dragons[0]
+
+    # versions are never reused, same version same rooms
+    state = (dungeon_get_version(game_data[T_DUNGEON_DATA_DUNGEON]), adventurer.room_pos, adventurer.level, has_strong_sword,
+             tuple((dragon.room_pos, dragon.level) for dragon in dragons))
+    if state == g_greedy_stuck_state:
+        return []
+
+    # rotations are tried on a copy, the game gets them as actions
+    dungeon = dungeon_clone(game_data[T_DUNGEON_DATA_DUNGEON])
+    start_room = adventurer.room_pos
+    target_room = target_dragon.room_pos
+    strong_rooms = set()
+    if target_dragon.level <= adventurer.level or has_strong_sword:
+        strong_rooms = {dragon.room_pos for dragon in dragons
+                        if dragon is not target_dragon and dragon.level > adventurer.level and not has_strong_sword}
+
+    actions = []
+    score, candidate_rooms = _greedy_reach(dungeon, start_room, target_room, strong_rooms)
+    reaches_left = BATCH_SIMULATION_GREEDY_MAX_REACHES - 1
+    while score[:2] != (0, 0) and len(actions) < BATCH_SIMULATION_GREEDY_MAX_ROTATIONS:
+        room_groups = [(room_pos,) for room_pos in candidate_rooms]
+        best_rotations, reaches_left = _greedy_best_rotations(dungeon, room_groups, start_room, target_room,
+                                                              strong_rooms, score, reaches_left)
+        # a door can face a room no rotation opens toward it, then both rooms have to turn
+        if len(best_rotations) == 0:
+            best_rotations, reaches_left = _greedy_best_rotations(dungeon, _greedy_neighbor_pairs(candidate_rooms),
+                                                                  start_room, target_room, strong_rooms, score, reaches_left)
+        if len(best_rotations) == 0:
+            break
+
+        for room_pos, rotations in best_rotations:
+            for _ in range(rotations):
+                dungeon_rotate_room(dungeon, row=room_pos[ROOM_POS_ROW], col=room_pos[ROOM_POS_COL])
+                actions.append(simulation_action_create(E_SIMULATION_ACTION_ROTATE_ROOM, room_pos))
+
+        if reaches_left == 0:
+            break
+        score, candidate_rooms = _greedy_reach(dungeon, start_room, target_room, strong_rooms)
+        reaches_left -= 1
+
+    if len(actions) == 0:
+        g_greedy_stuck_state = state
+    return actions
+
+# script names of the command line
+BATCH_SIMULATION_SCRIPTS: dict[str, SimulationScriptT | NoneType] = {
+    "greedy": batch_simulation_greedy_script,
+    "none": None,
+}
+
+def batch_simulation_play_game(source: BatchSourceT,
+                                seed: int,
+                                game_mode: GameModeE | NoneType = None,
+                                script: SimulationScriptT | NoneType = None,
+                                max_rounds: int = engine_config.SIMULATION_MAX_ROUNDS) -> SimulationResultT:
+    """
+    plays one game of a batch, the same seed always plays the same game
+    game_mode: None to keep the game mode of the dungeon
+    """
+    rng = game_rng_create(seed)
+
+    game_data = _batch_simulation_load(source, rng)
+    if game_mode != None:
+        game_data = list(game_data)
+        game_data[T_DUNGEON_DATA_GAME_MODE] = game_mode
+
+    return simulation_run_game(game_data, script, max_rounds, rng=rng)
+
+def _batch_simulation_play(args: tuple) -> SimulationResultT:
+    # one argument so it works with executor.map
+    return batch_simulation_play_game(*args)
+
+def batch_simulation_seeds(seed: int, games: int) -> list[int]:
+    """
+    independent seed of each game of a batch
+
+    >>> batch_simulation_seeds(0, 3) == batch_simulation_seeds(0, 3)
+    True
+    >>> len(set(batch_simulation_seeds(0, 1000)))
+    1000
+    """
+    rng = game_rng_create(seed)
+    return [rng.getrandbits(63) for _ in range(games)]
+
+def batch_simulation_run(source: BatchSourceT,
+                         games: int,
+                         seed: int = 0,
+                         game_mode: GameModeE | NoneType = None,
+                         script: SimulationScriptT | NoneType = None,
+                         max_rounds: int = engine_config.SIMULATION_MAX_ROUNDS,
+                         workers: int | NoneType = None,
+                         on_result: Callable[[SimulationStatsT, SimulationResultT], NoneType] | NoneType = None) -> SimulationStatsT:
+    """
+    plays ``games`` games from ``source`` across ``workers`` processes (None: one per core)
+    results are added to the stats as they come back, on_result(stats, result) is called after each one
+    script: must be a module level function so it can be sent to the workers
+    """
+    stats = simulation_stats_create()
+    tasks = [(source, game_seed, game_mode, script, max_rounds) for game_seed in batch_simulation_seeds(seed, games)]
+
+    begin_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_batch_simulation_init_worker) as executor:
+        for result in executor.map(_batch_simulation_play, tasks, chunksize=BATCH_SIMULATION_CHUNK_SIZE):
+            simulation_stats_add_result(stats, result)
+            stats[T_SIMULATION_STATS_ELAPSED] = time.perf_counter() - begin_time
+
+            if on_result != None:
+                on_result(stats, result)
+
+    return stats
+
+def batch_simulation_win_rate(stats: SimulationStatsT) -> tuple[float, float]:
+    """
+    returns: (win rate, half width of its 95% confidence interval) of the finished games,
+             unfinished games say nothing about the dungeon, only that max_rounds was too low
+
+    >>> stats = simulation_stats_create()
+    >>> stats[T_SIMULATION_STATS_GAMES], stats[T_SIMULATION_STATS_WON], stats[T_SIMULATION_STATS_LOST] = 120, 50, 50
+    >>> batch_simulation_win_rate(stats)
+    (0.5, 0.098)
+    """
+    games = stats[T_SIMULATION_STATS_WON] + stats[T_SIMULATION_STATS_LOST]
+    if games == 0:
+        return 0.0, 0.0
+
+    win_rate = stats[T_SIMULATION_STATS_WON] / games
+    return win_rate, round(1.96 * math.sqrt(win_rate * (1 - win_rate) / games), 3)
+
+def batch_simulation_stats_to_str(stats: SimulationStatsT) -> str:
+    """
+    >>> stats = simulation_stats_create()
+    >>> for result in ([F_GAME_GAME_FINISHED | F_GAME_GAME_WON, 4, 50, 5.0, 2, 1], [F_GAME_GAME_FINISHED | F_GAME_GAME_LOST, 2, 30, 3.0, 0, 0]):
+    ...     simulation_stats_add_result(stats, result)
+    >>> print(batch_simulation_stats_to_str(stats))
+    win rate 50.0% (+- 69.3%) of 2 finished games, 1 lost
+    0 unfinished games
+    per game: 3.0 rounds, 1.0 dragons slain, 0.5 items used
+    """
+    games = max(stats[T_SIMULATION_STATS_GAMES], 1)
+    win_rate, margin = batch_simulation_win_rate(stats)
+
+    finished = stats[T_SIMULATION_STATS_WON] + stats[T_SIMULATION_STATS_LOST]
+
+    return f"win rate {win_rate * 100:.1f}% (+- {margin * 100:.1f}%) of {finished} finished games, " \
+           f"{stats[T_SIMULATION_STATS_LOST]} lost\n" \
+           f"{stats[T_SIMULATION_STATS_UNFINISHED]} unfinished games\n" \
+           f"per game: {stats[T_SIMULATION_STATS_ROUNDS] / games:.1f} rounds, " \
+           f"{stats[T_SIMULATION_STATS_DRAGONS_SLAIN] / games:.1f} dragons slain, " \
+           f"{stats[T_SIMULATION_STATS_ITEMS_USED] / games:.1f} items used"
+
+def _settings_for_size(size: int) -> DungeonSettingsT:
+    return DungeonSettingsT(
+            SettingT("Dungeon dimensions", SizeT(size, size), SizeT(0, 0), SizeT(size, size)),
+            SettingT("Number of dragons", max(1, size // 2), 0, size * size),
+            SettingT("Number of treasures", 2, 0, 10),
+            SettingT("Number of strong swords", 1, 0, 10),
+            SettingT("Number of chaos seals", 1, 0, 10)
+    )
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    source: BatchSourceT = sys.argv[1] if not sys.argv[1].isdigit() else _settings_for_size(int(sys.argv[1]))
+    number_args = sys.argv[2:5]
+    if not all(arg.isdigit() for arg in number_args):
+        print(__doc__)
+        return
+
+    games = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    game_mode = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    script_name = sys.argv[5] if len(sys.argv) > 5 else "none"
+
+    if game_mode != None and game_mode >= E_GAME_MODE_COUNT:
+        print(f"unknown game mode: {game_mode}, one of: {', '.join(str(mode) for mode in range(E_GAME_MODE_COUNT))}")
+        return
+
+    if isinstance(source, str) and not os.path.exists(source):
+        print(f"dungeon file not found: {source}")
+        return
+
+    if script_name not in BATCH_SIMULATION_SCRIPTS:
+        print(f"unknown script: {script_name}, one of: {', '.join(BATCH_SIMULATION_SCRIPTS)}")
+        return
+    script = BATCH_SIMULATION_SCRIPTS[script_name]
+
+    if script == None and isinstance(source, str):
+        log_warning("[batch_simulation] no script on a dungeon file, the adventurer only moves if the dungeon starts with a path to a dragon")
+
+    def print_progress(stats: SimulationStatsT, result: SimulationResultT):
+        if stats[T_SIMULATION_STATS_GAMES] % max(1, games // 10) == 0:
+            print(f"{stats[T_SIMULATION_STATS_GAMES]}/{games} games, {simulation_stats_games_per_second(stats):.0f} games/s")
+
+    logging_mod.LOG_LEVEL = BATCH_SIMULATION_LOG_LEVEL
+    stats = batch_simulation_run(source, games, seed, game_mode, script, on_result=print_progress)
+    print(batch_simulation_stats_to_str(stats))
+    print(simulation_stats_to_str(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,9 @@ import libs.fltk as fltk
 from libs.fltk import FltkEvent, TkEvent
 
 import src.game.logic as logic
+import src.game.replay as replay
 import src.engine.parsing as parsing
+import src.engine.engine_config as engine_config
 from src.engine.entity_system import *
 from src.engine.structs.dungeon import *
 from src.engine.structs.adventurer import *
@@ -42,6 +44,7 @@ def handle_exit_key(input_event: InputEventT, game_context):
         return
 
     game_mode = game_context[T_GAME_CTX_GAME_DATA][T_DUNGEON_DATA_GAME_MODE]
+    replay.replay_recorder_stop(game_context)
     logic.reset_game_context(game_context)
     game_context[T_GAME_CTX_GAME_DATA][T_DUNGEON_DATA_GAME_MODE] = game_mode
 
@@ -68,6 +71,7 @@ def handle_event_start_menu(input_event: InputEventT, game_context: GameContextT
         # log_trace(f"loaded game, adve: {loaded_game[T_GAME_DATA_ENTITY_SYSTEM][T_ENTITIES_ADVENTURER]=}")
         # log_trace(f"loaded game, dragons: {loaded_game[T_GAME_DATA_ENTITY_SYSTEM][T_ENTITIES_DRAGONS]=}")
         logic.load_game_data(game_context, loaded_game)
+        replay.replay_recorder_start(game_context)
 
         game_context[T_GAME_CTX_GAME_FLAGS] = GAME_FLAGS_GAME_START
         game_context[T_GAME_CTX_ACTIVE_WINDOW] = E_WINDOW_GAME
@@ -79,18 +83,43 @@ def handle_event_game(input_event: InputEventT, game_context: GameContextT):
 
     # reset dungeon
     if event_info[INPUT_EVENT_INFO_IS_KEY] and event_info[INPUT_EVENT_INFO_KEY_PRESSED] == KEY_R:
+        # recorded before, the reset wakes the game up
+        replay.replay_recorder_add(game_context, replay.E_REPLAY_ACTION_RESET)
         logic.reset_game_data(game_context)
 
         # reset all game flags
         game_context[T_GAME_CTX_GAME_FLAGS] = GAME_FLAGS_GAME_START
     # save game
     elif event_info[INPUT_EVENT_INFO_IS_KEY] and event_info[INPUT_EVENT_INFO_KEY_PRESSED] == KEY_S:
-        parsing.save_game(game_context)
+        saved_game = parsing.save_game(game_context)
+        replay.replay_recorder_add(game_context, replay.E_REPLAY_ACTION_SAVE, saved_game)
     # load saved game
     elif event_info[INPUT_EVENT_INFO_IS_KEY] and event_info[INPUT_EVENT_INFO_KEY_PRESSED] == KEY_I:
         # clear all temp events
         
-        parsing.load_saved_game(game_context)
+        loaded_game = parsing.load_saved_game(game_context)
+        if loaded_game != None:
+            replay.replay_recorder_add(game_context, replay.E_REPLAY_ACTION_LOAD, loaded_game)
+    # single turn mode autoplay
+    elif game_context[T_GAME_CTX_GAME_DATA][T_DUNGEON_DATA_GAME_MODE] == E_GAME_MODE_SINGLE_TURN:
+        handle_event_game_autoplay(input_event, game_context)
+
+def handle_event_game_autoplay(input_event: InputEventT, game_context: GameContextT):
+    """
+    Handles the single turn mode autoplay keys: speed and resolving until the end.
+    """
+    event_info = input_event_get_info(input_event)
+
+    # next autoplay speed
+    if event_info[INPUT_EVENT_INFO_IS_KEY] and event_info[INPUT_EVENT_INFO_KEY_PRESSED] == KEY_T:
+        speeds = engine_config.AUTOPLAY_SPEEDS
+        speed = game_context[T_GAME_CTX_AUTOPLAY_SPEED]
+        game_context[T_GAME_CTX_AUTOPLAY_SPEED] = speeds[(speeds.index(speed) + 1) % len(speeds)] if speed in speeds else speeds[0]
+        replay.replay_recorder_add(game_context, replay.E_REPLAY_ACTION_AUTOPLAY_SPEED, game_context[T_GAME_CTX_AUTOPLAY_SPEED])
+    # resolve until the end, the main loop does it (see simulation_resolve_game)
+    elif event_info[INPUT_EVENT_INFO_IS_KEY] and event_info[INPUT_EVENT_INFO_KEY_PRESSED] == KEY_F:
+        if not game_context[T_GAME_CTX_GAME_FLAGS] & F_GAME_GAME_FINISHED:
+            game_context[T_GAME_CTX_GAME_FLAGS] |= F_GAME_RESOLVE
 
 def handle_event_game_dungeon(input_event: InputEventT, game_context: GameContextT):
     """
@@ -110,17 +139,20 @@ def handle_event_game_dungeon(input_event: InputEventT, game_context: GameContex
     log_debug_full(f"key pressed: {event_info[INPUT_EVENT_INFO_KEY_PRESSED]}")
     # rotate room
     if event_info[INPUT_EVENT_INFO_TYPE] == KEY_X1:
-        success = logic.rotate_room(event_info, game_context)
-        if success:
+        room_pos = logic.rotate_room(event_info, game_context)
+        if room_pos != None:
             logic.invalidate_adventurer_path(game_context)
+            replay.replay_recorder_add(game_context, replay.E_REPLAY_ACTION_ROTATE_ROOM, room_pos)
     # place treasure
     elif event_info[INPUT_EVENT_INFO_TYPE] == KEY_X2:
-        success = logic.place_treasure(event_info, game_context)
-        if success:
+        room_pos = logic.place_treasure(event_info, game_context)
+        if room_pos != None:
             logic.invalidate_adventurer_path(game_context)
+            replay.replay_recorder_add(game_context, replay.E_REPLAY_ACTION_PLACE_TREASURE, room_pos)
     # finished turning rooms and stuff
     elif event_info[INPUT_EVENT_INFO_IS_KEY] and event_info[INPUT_EVENT_INFO_KEY_PRESSED] == KEY_SPACE:
         logic.start_moving_adventurer(game_context)
+        replay.replay_recorder_add(game_context, replay.E_REPLAY_ACTION_START_MOVING)
 
 def handle_event_game_player(input_event: InputEventT, game_context: GameContextT):
     """
@@ -157,6 +189,7 @@ def handle_event_random_dungeon(input_event: InputEventT, game_context: GameCont
 
         # load game data into game context properly
         logic.load_game_data(game_context, game_data)
+        replay.replay_recorder_start(game_context)
         
         # go to game window
         game_context[T_GAME_CTX_ACTIVE_WINDOW] = E_WINDOW_GAME
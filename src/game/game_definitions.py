@@ -23,6 +23,7 @@ Event Indices (Pseudo-Enums):
     Used to access `InputEventT` list elements.
     GAME_EVENT_TYPE, GAME_EVENT_DATA.
 """
+import random
 from types import NoneType
 from typing import Any
 
@@ -53,13 +54,19 @@ T_GAME_CTX_EVENT                = 3 # fltk event if there is one
 T_GAME_CTX_GAME_DATA            = 4 # stores dungeon, entities etc
 T_GAME_CTX_ORIGINAL_GAME_DATA   = 5 # store original game state so we can restore it
 T_GAME_CTX_FPS_MANAGER          = 6 # see use case in engine/fps_manager.py
-T_GAME_CTX_COUNT                = 7
+T_GAME_CTX_RNG                  = 7 # GameRngT, every random choice of the game comes from it
+T_GAME_CTX_REPLAY_RECORDER      = 8 # ReplayRecorderT of the game being recorded, None if not recording (see game/replay.py)
+T_GAME_CTX_AUTOPLAY_SPEED       = 9 # int, single turn mode autoplay speed multiplier (see AUTOPLAY_SPEEDS)
+T_GAME_CTX_COUNT                = 10
 
 # enum for game event
 T_INPUT_EVENT_TYPE = 0 # event type, FltkEvent
 T_INPUT_EVENT_DATA = 1 # event data
 T_INPUT_EVENT_COUNT = 2
 
+# random generator of a game, seeded to replay the same game
+GameRngT = random.Random
+
 # game mode enums
 GameModeE = int
 E_GAME_MODE_NORMAL = 0
@@ -79,7 +86,8 @@ T_DUNGEON_DATA_COUNT = 4
 GameDataT = list
 T_GAME_DATA_EVENT_SYSTEM = T_DUNGEON_DATA_COUNT + 0 # GameEventSystemT
 T_GAME_DATA_ROUND = T_DUNGEON_DATA_COUNT + 1 # round counter (starts at 1)
-T_GAME_DATA_COUNT = T_DUNGEON_DATA_COUNT + 2
+T_GAME_DATA_DRAGON_BATCH = T_DUNGEON_DATA_COUNT + 2 # DragonBatchT kept between frames (see src/engine/dragon_system.py), None until the dragons first move, never saved
+T_GAME_DATA_COUNT = T_DUNGEON_DATA_COUNT + 3
 
 def dungeon_data_init(size = T_DUNGEON_DATA_COUNT) -> DungeonDataT:
     # dungeon
@@ -102,6 +110,36 @@ def game_data_init() -> GameDataT:
 
     return game_data
 
+def game_data_clone(game_data: GameDataT) -> GameDataT:
+    """
+    copy of game data (or dungeon data) that knows its structure, instead of deepcopy:
+    dungeon and entities are cloned, the rest are ints
+    the game event system is not copied, its events point to the game context,
+    the clone gets an empty one (or None) and needs game_systems_setup like after a deepcopy
+    the dragon batch is not copied either, it is rebuilt from the cloned entities when the dragons move
+    """
+    clone = list(game_data)
+
+    clone[T_DUNGEON_DATA_DUNGEON] = dungeon_mod.dungeon_clone(game_data[T_DUNGEON_DATA_DUNGEON])
+    clone[T_DUNGEON_DATA_ENTITY_SYSTEM] = entity_system_mod.entity_system_clone(game_data[T_DUNGEON_DATA_ENTITY_SYSTEM])
+
+    if len(game_data) > T_GAME_DATA_EVENT_SYSTEM and game_data[T_GAME_DATA_EVENT_SYSTEM] != None:
+        clone[T_GAME_DATA_EVENT_SYSTEM] = game_event_system_mod.game_event_system_create()
+
+    if len(game_data) > T_GAME_DATA_DRAGON_BATCH:
+        clone[T_GAME_DATA_DRAGON_BATCH] = None
+
+    return clone
+
+def game_rng_create(seed: int | NoneType = None) -> GameRngT:
+    """
+    seed: None for a different game each time
+
+    >>> game_rng_create(42).random() == game_rng_create(42).random()
+    True
+    """
+    return GameRngT(seed)
+
 def game_data_set_dungeon_data(game_data, dungeon_data):
     for i in range(T_DUNGEON_DATA_COUNT):
         game_data[i] = dungeon_data[i]
@@ -120,7 +158,8 @@ def game_context_create(assets,
                         event, # InputEventT
                         game_data,
                         original_game_data,
-                        fps_manager) -> GameContextT:
+                        fps_manager,
+                        rng: GameRngT | NoneType = None) -> GameContextT:
     game_context = [None] * T_GAME_CTX_COUNT
 
     game_context[T_GAME_CTX_ASSETS] = assets
@@ -130,6 +169,8 @@ def game_context_create(assets,
     game_context[T_GAME_CTX_GAME_DATA] = game_data
     game_context[T_GAME_CTX_ORIGINAL_GAME_DATA] = original_game_data
     game_context[T_GAME_CTX_FPS_MANAGER] = fps_manager
+    game_context[T_GAME_CTX_RNG] = rng if rng != None else game_rng_create()
+    game_context[T_GAME_CTX_AUTOPLAY_SPEED] = 1
 
     return game_context
 
@@ -143,6 +184,16 @@ def get_game_mode_text(game_mode: GameModeE):
     else:
         return "unknown"
 
+def get_game_mode_dragon_chase_probability(game_mode: GameModeE) -> float:
+    """
+    chance that a dragon moves one room closer to the adventurer (flow field) instead of a random room,
+    extreme mode moves dragons every frame so they chase there
+    """
+    if game_mode == E_GAME_MODE_EXTREME:
+        return 0.25
+    else:
+        return 0.0
+
 def get_game_mode_text_color(game_mode: GameModeE):
     if game_mode == E_GAME_MODE_NORMAL:
         return "white"
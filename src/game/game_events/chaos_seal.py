@@ -1,5 +1,3 @@
-from copy import deepcopy
-
 from src.engine.game_event_system import *
 from src.engine.structs.dungeon import *
 from src.engine.structs.adventurer import *
@@ -15,7 +13,7 @@ from src.utils.entity_utils import get_dragon_positions
 # ChaosSealT -> GameEventT -> TemporaryGameEventT
 ChaosSealEventT = TemporaryGameEventT
 
-T_CHAOS_SEAL_EVENT_ORIGINAL_DUNGEON   = T_TEMP_GAME_EVENT_COUNT
+T_CHAOS_SEAL_EVENT_OVERLAY            = T_TEMP_GAME_EVENT_COUNT # DungeonOverlayT over the real rooms
 T_CHAOS_SEAL_EVENT_COUNT              = T_TEMP_GAME_EVENT_COUNT + 1
 
 CHAOS_SEAL_DURATION = 1 # lasts 1 round
@@ -30,9 +28,6 @@ def _chaos_seal_activate(chaos_seal_event: ChaosSealEventT):
     entity_system: EntitySystemT = game_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
     dungeon: DungeonT = game_data[T_DUNGEON_DATA_DUNGEON]
 
-    # create copy of current dungeon to restore it when destroyed
-    chaos_seal_event[T_CHAOS_SEAL_EVENT_ORIGINAL_DUNGEON] = deepcopy(dungeon)
-
     rooms_to_block = get_dragon_positions(entity_system)
 
     # find lowest level dragon
@@ -41,24 +36,35 @@ def _chaos_seal_activate(chaos_seal_event: ChaosSealEventT):
     # remove lower dragon pos from other dragon pos
     rooms_to_block.remove(dragon_lowest_level[T_BASE_ENTITY_ROOM_POS])
 
-    # replace rooms
-    for i, row in enumerate(dungeon):
-        for j, col in enumerate(row):
-            if room_pos_create(row=i, col=j) in rooms_to_block:
-                block_id = BLOCK_SOLID
-                rotation_count = 0
-                dungeon[i][j] = (block_id, rotation_count)
-            else:
-                block_id = BLOCK_QUAD
-                rotation_count = 0
-                dungeon[i][j] = (block_id, rotation_count)
+    # every room becomes open except the blocked ones, the real rooms come back when the overlay is dropped
+    blocked_room = dungeon_room_create(BLOCK_SOLID, 0)
+    chaos_seal_event[T_CHAOS_SEAL_EVENT_OVERLAY] = dungeon_push_overlay(dungeon,
+                                                                        {room_pos: blocked_room for room_pos in rooms_to_block},
+                                                                        fill_room=dungeon_room_create(BLOCK_QUAD, 0))
 
 def _chaos_seal_on_destroy(chaos_seal_event: ChaosSealEventT):
+    """
+    restores the original dungeon, also after a save and load while the seal was active
+
+    >>> d = dungeon_from_rooms([[(BLOCK_SINGLE, 1), (BLOCK_SOLID, 0)]])
+    >>> chaos_seal_event = [None] * T_CHAOS_SEAL_EVENT_COUNT
+    >>> chaos_seal_event[T_CHAOS_SEAL_EVENT_OVERLAY] = dungeon_push_overlay(d, {}, fill_room=(BLOCK_QUAD, 0))
+    >>> chaos_seal_event[T_GAME_EVENT_GAME_CTX] = [None] * T_GAME_CTX_COUNT
+    >>> chaos_seal_event[T_GAME_EVENT_GAME_CTX][T_GAME_CTX_GAME_DATA] = [dungeon_clone(d)] # loaded, sealed rooms and no overlay
+    >>> _chaos_seal_on_destroy(chaos_seal_event)
+    >>> dungeon_get_row_rooms(chaos_seal_event[T_GAME_EVENT_GAME_CTX][T_GAME_CTX_GAME_DATA][T_DUNGEON_DATA_DUNGEON], 0)
+    [(1, 1), (0, 0)]
+    """
     game_data = chaos_seal_event[T_GAME_EVENT_GAME_CTX][T_GAME_CTX_GAME_DATA]
+    dungeon: DungeonT = game_data[T_DUNGEON_DATA_DUNGEON]
+    overlay: DungeonOverlayT = chaos_seal_event[T_CHAOS_SEAL_EVENT_OVERLAY]
 
     # restore original dungeon
-    original_dungeon = chaos_seal_event[T_CHAOS_SEAL_EVENT_ORIGINAL_DUNGEON]
-    game_data[T_DUNGEON_DATA_DUNGEON][:] = original_dungeon.copy()
+    if dungeon_get_overlay(dungeon) is overlay:
+        dungeon_drop_overlay(dungeon, overlay)
+    # a loaded dungeon has the sealed rooms without their overlay, the saved overlay still has the original rooms under it
+    else:
+        dungeon_copy_from(dungeon, overlay[T_DUNGEON_OVERLAY_BASE])
 
 def _chaos_seal_on_round_end(chaos_seal_event: ChaosSealEventT):
     log_debug(f"[_chaos_seal_on_round_end] duration left: {chaos_seal_event[T_GAME_EVENT_DURATION]}")
@@ -60,6 +60,12 @@ def get_hud_elements(game_context: GameContextT) -> list[HudElementT]:
     el_height = _add_hud_element(hud_elements, gui_geom.E_UI_ANCHOR_BOTTOM_LEFT, text, color, bottom_left_offset_y)
     bottom_left_offset_y -= el_height - Y_PAD
 
+    # autoplay speed and keys in single turn mode
+    if game_mode == E_GAME_MODE_SINGLE_TURN:
+        text = f"Vitesse: x{game_context[T_GAME_CTX_AUTOPLAY_SPEED]} ({KEY_T}: vitesse, {KEY_F}: jusqu'à la fin)"
+        el_height = _add_hud_element(hud_elements, gui_geom.E_UI_ANCHOR_BOTTOM_LEFT, text, "white", bottom_left_offset_y)
+        bottom_left_offset_y -= el_height - Y_PAD
+
     # indicate which round we're on
     text = f"Tour: {game_data[T_GAME_DATA_ROUND]}"
     el_height = _add_hud_element(hud_elements, gui_geom.E_UI_ANCHOR_TOP_LEFT, text, "white", top_left_offset_y)
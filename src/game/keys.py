@@ -8,6 +8,8 @@ KEY_ESCAPE = "Escape"
 KEY_R = "r"
 KEY_S = "s"
 KEY_I = "i"
+KEY_T = "t"
+KEY_F = "f"
 KEY_SPACE = "space"
 
 
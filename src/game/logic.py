@@ -1,8 +1,5 @@
-import random
-from copy import deepcopy
-from random import randrange
-
 import src.engine.pathfinding as pathfinding
+from src.engine.dragon_system import *
 from src.engine.fps_manager import *
 from src.engine.game_event_system import *
 from src.engine.structs.dungeon import *
@@ -42,96 +39,92 @@ def _get_clicked_room(event_info: InputEventInfoT, dungeon: DungeonT) -> RoomPos
 
     return clicked_room_pos
 
-def _move_dragons_randomly(game_context: GameContextT):
+def _move_dragons(game_context: GameContextT):
     """
-    Moves each dragon one step in a randomly chosen accessible direction,
-    and updates its position in the game state.
+    Moves each dragon one step, towards the adventurer with the chance of the game mode (get_game_mode_dragon_chase_probability)
+    (read from the adventurer distance field, one BFS for all dragons, so not from
+    HIERARCHICAL_PATHFINDING_MIN_ROOMS rooms where it would cover the whole dungeon),
+    otherwise in a randomly chosen accessible direction, and updates its position in the game state.
+    all dragons are moved in one batched pass, see dragon_batch_move,
+    the batch is kept in game data between frames and only rebuilt when the dragons changed without it (new game, load)
     """
     game_data = game_context[T_GAME_CTX_GAME_DATA]
     dungeon: DungeonT = game_data[T_DUNGEON_DATA_DUNGEON]
     entity_system: EntitySystemT = game_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
 
     adventurer: AdventurerT = entity_system_get_first_and_only(entity_system, E_ENTITY_ADVENTURER)
-    dragons: list = entity_system_get_all(entity_system, E_ENTITY_DRAGON)
-    
-    entities_positions = get_all_entity_positions(entity_system)
 
-    # remove adventure pos bcs dragon can move towards the adventurer
-    entities_positions.remove(adventurer[T_BASE_ENTITY_ROOM_POS])
+    batch: DragonBatchT = game_data[T_GAME_DATA_DRAGON_BATCH]
+    if not dragon_batch_is_valid(batch, dungeon, entity_system):
+        batch = dragon_batch_create(dungeon, entity_system)
+        game_data[T_GAME_DATA_DRAGON_BATCH] = batch
 
-    for dragon in dragons:
-        dragon_pos: RoomPosT = dragon[T_BASE_ENTITY_ROOM_POS]
-        
-        # get list of all valid, connected rooms the dragon can move to
-        available_moves = dungeon_get_valid_neighbor_rooms(dungeon, dragon_pos)
+    # rooms of the items, not the adventurer one bcs dragon can move towards the adventurer
+    width = dungeon_get_width(dungeon)
+    adventurer_pos: RoomPosT = adventurer.room_pos
+    blocked = [base_entity.room_pos[ROOM_POS_ROW] * width + base_entity.room_pos[ROOM_POS_COL]
+               for base_entity in entity_system_get_all_types(entity_system, ENTITY_ITEMS)
+               if base_entity.room_pos != adventurer_pos]
 
-        # remove rooms that already have entities
-        filter_func = lambda room: not room in entities_positions
-        available_moves = list(filter(filter_func, available_moves))
+    # flow field towards the adventurer, shared by all dragons (repaired, not recomputed, between frames)
+    chase_probability: float = get_game_mode_dragon_chase_probability(game_data[T_DUNGEON_DATA_GAME_MODE])
+    if width * dungeon_get_height(dungeon) >= HIERARCHICAL_PATHFINDING_MIN_ROOMS:
+        chase_probability = 0.0
 
-        # pick a random move if any are available
-        if available_moves:
-            # random_available_move_i = randrange(0, len(available_moves))
-            # new_pos = available_moves[random_available_move_i]
-            new_pos = random.choice(available_moves)
+    distance_field = None
+    if chase_probability > 0:
+        distance_field = pathfinding.distance_field_update(dungeon, adventurer_pos)
 
-            # update entities_positions to update dragon position so dragons dont overlap
-            entities_positions.remove(dragon[T_BASE_ENTITY_ROOM_POS])
-            entities_positions.add(new_pos)
+    dragon_batch_move(batch, dungeon, blocked, game_context[T_GAME_CTX_RNG], distance_field, chase_probability)
 
-            dragon[T_BASE_ENTITY_ROOM_POS] = new_pos
-
-def _do_dragon_collisions(entity_system: EntitySystemT) -> GameFlags | NoneType:
+def _do_dragon_collisions(game_data: GameDataT) -> GameFlags | NoneType:
+    dungeon: DungeonT = game_data[T_DUNGEON_DATA_DUNGEON]
+    entity_system: EntitySystemT = game_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
     adventurer = entity_system_get_first_and_only(entity_system, E_ENTITY_ADVENTURER)
     dragons: list = entity_system_get_all(entity_system, E_ENTITY_DRAGON)
 
-    adventurer_room_pos: RoomPosT = adventurer[T_BASE_ENTITY_ROOM_POS]
-    adventurer_level: int = adventurer[T_ENTITY_LEVEL]
+    adventurer_room_pos: RoomPosT = adventurer.room_pos
+    adventurer_level: int = adventurer.level
 
-    # segregate dragons
-    strong_dragons: list[DragonT] = []
-    weak_dragons: list[DragonT] = []
-    for dragon in dragons:
-        # player loses against dragons who have a STRICTLY BIGGER level
-        if dragon[T_ENTITY_LEVEL] > adventurer_level:
-            strong_dragons.append(dragon)
-        # player wins against dragons who have a LOWER OR EQUAL level
-        else:
-            weak_dragons.append(dragon)
+    log_debug_full(f"dungeon has {sum(1 for dragon in dragons if dragon.level <= adventurer_level)} weak dragons")
 
-    log_debug_full(f"dungeon has {len(weak_dragons)} weak dragons")
-
-    # check dragon collisions
-    for dragon in dragons:
-        # ignore dragons not in same room
-        if adventurer_room_pos != dragon[T_BASE_ENTITY_ROOM_POS]:
+    # check dragon collisions, only the dragons in the adventurer room
+    for dragon in entity_system_get_in_room(entity_system, adventurer_room_pos):
+        if not base_entity_is(dragon, E_ENTITY_DRAGON):
             continue
 
+        # player loses against dragons who have a STRICTLY BIGGER level
+        # player wins against dragons who have a LOWER OR EQUAL level
+        is_strong_dragon = dragon.level > adventurer_level
+
         # refresh each time cuz we can use it
-        adventurer_has_strong_sword = inventory_has_item(adventurer[T_ADVENTURER_INVENTORY], E_INVENTORY_ITEM_STRONG_SWORD)
-        beat_stronger_dragon = dragon in strong_dragons and adventurer_has_strong_sword
+        adventurer_has_strong_sword = inventory_has_item(adventurer.inventory, E_INVENTORY_ITEM_STRONG_SWORD)
+        beat_stronger_dragon = is_strong_dragon and adventurer_has_strong_sword
 
         # regular weak dragon
         # or stronger dragon, but player has strong sword
-        if dragon in weak_dragons or beat_stronger_dragon:
+        if not is_strong_dragon or beat_stronger_dragon:
             log_debug("dragon slained")
 
-            # remove dragon from dragons list
-            # dragons.remove(dragon)
-            entity_system_remove_entity(entity_system, dragon)
+            # remove dragon from dragons list, and from the dragon batch so it is not rebuilt next frame
+            batch: DragonBatchT = game_data[T_GAME_DATA_DRAGON_BATCH]
+            if dragon_batch_is_valid(batch, dungeon, entity_system):
+                dragon_batch_remove_dragon(batch, dragon)
+            else:
+                entity_system_remove_entity(entity_system, dragon)
 
             # add 1 to player level
-            adventurer[T_ENTITY_LEVEL] += 1
+            adventurer.level += 1
 
             # if used stronger sword then consume it (remove it from inventory)
             if beat_stronger_dragon:
-                inventory_remove_item(adventurer[T_ADVENTURER_INVENTORY], E_INVENTORY_ITEM_STRONG_SWORD)
-        elif dragon in strong_dragons: # player loses against stronger dragon (doesnt have strong sword)
+                inventory_remove_item(adventurer.inventory, E_INVENTORY_ITEM_STRONG_SWORD)
+        else: # player loses against stronger dragon (doesnt have strong sword)
             # finish game
             return F_GAME_GAME_FINISHED | F_GAME_GAME_LOST
 
-    # handle game win if last dragon slain
-    if len(dragons) == 0:
+    # handle game win if last dragon slain, dragons slain above are already out of the entity system
+    if len(entity_system_get_all(entity_system, E_ENTITY_DRAGON)) == 0:
         return F_GAME_GAME_FINISHED | F_GAME_GAME_WON
 
     return None
@@ -149,19 +142,22 @@ def load_game_data(game_context, game_data: GameDataT):
     """
     function to load a new game
     """
-    # just in case, reset event system so we dont deep copy it
+    # just in case, reset event system so we dont copy it
     game_data[T_GAME_DATA_EVENT_SYSTEM] = game_event_system_create()
 
     # if game_data is not litterally game_context[T_GAME_CTX_GAME_DATA]
     if not game_context[T_GAME_CTX_GAME_DATA] is game_data:
-        game_context[T_GAME_CTX_GAME_DATA][:] = deepcopy(game_data)
+        game_context[T_GAME_CTX_GAME_DATA][:] = game_data_clone(game_data)
+
+    # a new game doesnt wait for the end of a sleep of the last one
+    fps_manager_wake_up(game_context[T_GAME_CTX_FPS_MANAGER])
 
     # init game systems
     game_systems_setup(game_context)
 
     # save original game data
-    # purposefully dont copy game_event_system bcs then we cant deepcopy it
-    game_context[T_GAME_CTX_ORIGINAL_GAME_DATA][:] = deepcopy(game_data)
+    # game_data_clone doesnt copy game_event_system, it cant be copied
+    game_context[T_GAME_CTX_ORIGINAL_GAME_DATA][:] = game_data_clone(game_data)
 
 def reset_game_context(game_context):
     # recreate new game context from scratch basicly
@@ -175,9 +171,12 @@ def reset_game_context(game_context):
 
 def reset_game_data(game_context):
     # reset to originals by copying orignals, copy inplace
-    game_context[T_GAME_CTX_GAME_DATA][:] = deepcopy(game_context[T_GAME_CTX_ORIGINAL_GAME_DATA])
+    game_context[T_GAME_CTX_GAME_DATA][:] = game_data_clone(game_context[T_GAME_CTX_ORIGINAL_GAME_DATA])
 
-    # setup again game event system manually, bcs cant deepcopy it
+    # the new systems arent paused, so dont wait for the end of the sleep
+    fps_manager_wake_up(game_context[T_GAME_CTX_FPS_MANAGER])
+
+    # setup again game event system manually, bcs cant copy it
     game_systems_setup(game_context)
 
 def invalidate_adventurer_path(game_context):
@@ -228,12 +227,15 @@ def should_finish_round(game_context: GameContextT) -> bool:
     adventurer: AdventurerT = entity_system_get_first_and_only(entity_system, E_ENTITY_ADVENTURER)
     game_flags: int = game_context[T_GAME_CTX_GAME_FLAGS]
 
-    return not movement_path_is_valid(adventurer[T_ADVENTURER_PATH]) and game_flags & F_GAME_ADVENTURER_MOVING
+    return not movement_path_is_valid(adventurer.path) and game_flags & F_GAME_ADVENTURER_MOVING
 
 
 # -------------------- do stuff
 
-def rotate_room(event_info: InputEventInfoT, game_context: GameContextT) -> bool:
+def rotate_room_at(game_context: GameContextT, room_pos: RoomPosT) -> bool:
+    """
+    same as rotate_room but with the room position instead of a click
+    """
     game_data = game_context[T_GAME_CTX_GAME_DATA]
     dungeon: DungeonT = game_data[T_DUNGEON_DATA_DUNGEON]
 
@@ -241,17 +243,24 @@ def rotate_room(event_info: InputEventInfoT, game_context: GameContextT) -> bool
     if single_turn_mode_past_first_round(game_context):
         return False
 
+    # rotate room, returns False if room out of bounds
+    return dungeon_rotate_room(dungeon, row=room_pos[ROOM_POS_ROW], col=room_pos[ROOM_POS_COL])
+
+def rotate_room(event_info: InputEventInfoT, game_context: GameContextT) -> RoomPosT | NoneType:
+    """
+    returns: the rotated room, None if no room was rotated
+    """
+    dungeon: DungeonT = game_context[T_GAME_CTX_GAME_DATA][T_DUNGEON_DATA_DUNGEON]
+
     clicked_room: RoomPosT | NoneType = _get_clicked_room(event_info, dungeon)
 
     # clicked invalid room
     if clicked_room == None:
-        return False
+        return None
 
-    # rotate room and invalidate adventurer path
-    dungeon_rotate_room(dungeon, row=clicked_room[ROOM_POS_ROW], col=clicked_room[ROOM_POS_COL])
-    return True
+    return clicked_room if rotate_room_at(game_context, clicked_room) else None
 
-def place_treasure(event_info: InputEventInfoT, game_context: GameContextT) -> bool:
+def place_treasure_at(game_context: GameContextT, room_pos: RoomPosT) -> bool:
     """
     room_pos: room position in which to place the treasure
     """
@@ -275,26 +284,37 @@ def place_treasure(event_info: InputEventInfoT, game_context: GameContextT) -> b
         log_error(f"cant place treasure, a treasure is already in the dungeon: {existing_treasure}")
         return False
 
-    # get clicked room pos
-    room_pos: RoomPosT | NoneType = _get_clicked_room(event_info, dungeon)
-    if room_pos == None: # clicked outside of dungeon
-        log_error("failed to place treasure, invalid room clicked")
+    if not dungeon_room_pos_in_bounds(dungeon, room_pos):
+        log_error(f"failed to place treasure, room out of dungeon: {room_pos}")
         return False
 
     # check if there is already an entity in that room
-    entities_positions = get_all_entity_positions(entity_system)
-    if room_pos in entities_positions: # clicked room already contains an entity
+    if entity_system_get_in_room(entity_system, room_pos): # clicked room already contains an entity
         log_error("can't place treasure, there is already an entity in that room")
         return False
 
     # create treasure entity
-    treasure: TreasureT = treasure_create(room_pos=room_pos, image_id=randrange(T_TREASURES_IMAGE_COUNT))
+    treasure: TreasureT = treasure_create(room_pos=room_pos, image_id=game_context[T_GAME_CTX_RNG].randrange(T_TREASURES_IMAGE_COUNT))
     entity_system_add_entity(entity_system, treasure)
 
     # decrease treasure count since we placed a treasure
     game_data[T_DUNGEON_DATA_TREASURE_COUNT] -= 1
     return True
 
+def place_treasure(event_info: InputEventInfoT, game_context: GameContextT) -> RoomPosT | NoneType:
+    """
+    returns: the room the treasure was placed in, None if no treasure was placed
+    """
+    dungeon: DungeonT = game_context[T_GAME_CTX_GAME_DATA][T_DUNGEON_DATA_DUNGEON]
+
+    # get clicked room pos
+    room_pos: RoomPosT | NoneType = _get_clicked_room(event_info, dungeon)
+    if room_pos == None: # clicked outside of dungeon
+        log_error("failed to place treasure, invalid room clicked")
+        return None
+
+    return room_pos if place_treasure_at(game_context, room_pos) else None
+
 def manually_update_player_path(event_info: InputEventInfoT, game_context: GameContextT):
     ev: FltkEvent = event_info[INPUT_EVENT_INFO_EV]
     click_postion = fltk_ext.position_souris(ev)
@@ -312,13 +332,13 @@ def manually_update_player_path(event_info: InputEventInfoT, game_context: GameC
     adventurer: AdventurerT = game_context[T_GAME_CTX_GAME_DATA][T_DUNGEON_DATA_ENTITY_SYSTEM][T_ENTITIES_ADVENTURER]
 
     # init adventurer path if its None
-    if adventurer[T_ADVENTURER_PATH] == None:
-        adventurer[T_ADVENTURER_PATH] = MovementPathT()
+    if adventurer.path == None:
+        adventurer.path = MovementPathT()
 
     # ensure previous room adjacent and connected to clicked pos
     dungeon: DungeonT = game_context[T_GAME_CTX_GAME_DATA][T_DUNGEON_DATA_DUNGEON]
-    movement_path: MovementPathT = adventurer[T_ADVENTURER_PATH]
-    previous_clicked_room_pos: RoomPosT = adventurer[T_BASE_ENTITY_ROOM_POS] # set last click room to player pos if 0 clicks
+    movement_path: MovementPathT = adventurer.path
+    previous_clicked_room_pos: RoomPosT = adventurer.room_pos # set last click room to player pos if 0 clicks
     if len(movement_path) > 0: # if not first click then set previous click room to last click pos
         # get previous clicked room positon
         previous_clicked_room_pos = movement_path[-1]
@@ -362,7 +382,7 @@ def update_player_path(game_event: GameEventT):
         auto_update_player_path(game_context)
         validate_adventurer_path(game_context)
     # invalidate adventurer path if its not set
-    elif not movement_path_is_valid(adventurer[T_ADVENTURER_PATH]):
+    elif not movement_path_is_valid(adventurer.path):
         invalidate_adventurer_path(game_context)
 
 def do_collisions(game_context: GameContextT):
@@ -379,7 +399,7 @@ def do_collisions(game_context: GameContextT):
         return
 
     # handle dragon collisions
-    new_flags_to_add = _do_dragon_collisions(entity_system)
+    new_flags_to_add = _do_dragon_collisions(game_context[T_GAME_CTX_GAME_DATA])
     if new_flags_to_add != None:
         game_context[T_GAME_CTX_GAME_FLAGS] |= new_flags_to_add
         return
@@ -398,7 +418,7 @@ def move_adventurer_along_path(game_event: GameEventT):
     adventurer: AdventurerT = entity_system_get_first_and_only(entity_system, E_ENTITY_ADVENTURER)
 
     # if in single turn mode and cant move then lost
-    adventurer_path = adventurer[T_ADVENTURER_PATH]
+    adventurer_path = adventurer.path
     if not movement_path_is_valid(adventurer_path) and single_turn_mode_past_first_round(game_ctx):
         game_ctx[T_GAME_CTX_GAME_FLAGS] |= F_GAME_GAME_FINISHED | F_GAME_GAME_LOST
         game_ctx[T_GAME_CTX_GAME_FLAGS] &= ~F_GAME_ADVENTURER_MOVING
@@ -409,7 +429,7 @@ def move_adventurer_along_path(game_event: GameEventT):
     #   ADVENTURER_MOVING flag is not set
     #   or path is empty
     game_flags: int = game_ctx[T_GAME_CTX_GAME_FLAGS]
-    if not (game_flags & F_GAME_ADVENTURER_MOVING) or not movement_path_is_valid(adventurer[T_ADVENTURER_PATH]):
+    if not (game_flags & F_GAME_ADVENTURER_MOVING) or not movement_path_is_valid(adventurer.path):
         return
 
     # move adventurer to next room
@@ -428,11 +448,11 @@ def adventurer_sleep_between_steps(game_event: GameEventT):
     #   ADVENTURER_MOVING flag is not set
     #   or adventurer path is empty
     game_flags: int = game_context[T_GAME_CTX_GAME_FLAGS]
-    if not (game_flags & F_GAME_ADVENTURER_MOVING) or not movement_path_is_valid(adventurer[T_ADVENTURER_PATH]):
+    if not (game_flags & F_GAME_ADVENTURER_MOVING) or not movement_path_is_valid(adventurer.path):
         return
 
     # sleep if there are still moves left
-    game_sleep(game_context, INTERVAL_BETWEEN_PATH_STEPS)
+    game_sleep(game_context, INTERVAL_BETWEEN_PATH_STEPS / game_context[T_GAME_CTX_AUTOPLAY_SPEED])
 
 def adventurer_sleep_between_rounds(game_event: GameEventT):
     """
@@ -452,7 +472,7 @@ def adventurer_sleep_between_rounds(game_event: GameEventT):
         return
 
     # sleep
-    game_sleep(game_context, INTERVAL_BETWEEN_ROUNDS)
+    game_sleep(game_context, INTERVAL_BETWEEN_ROUNDS / game_context[T_GAME_CTX_AUTOPLAY_SPEED])
 
 def pickup_items(game_event: GameEventT):
     """
@@ -463,26 +483,27 @@ def pickup_items(game_event: GameEventT):
     entity_system: EntitySystemT = game_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
     adventurer: AdventurerT = entity_system_get_first_and_only(entity_system, E_ENTITY_ADVENTURER)
 
-    entity_items = entity_system_get_all_types(entity_system, ENTITY_ITEMS)
+    # only the entities in the adventurer room can be picked up
+    room_entities = entity_system_get_in_room(entity_system, adventurer.room_pos)
 
-    for i in range(len(entity_items)):
-        base_entity: list = entity_items[i]
-        if base_entity[T_BASE_ENTITY_ROOM_POS] == adventurer[T_BASE_ENTITY_ROOM_POS]:
-            log_debug_full(f"found item in current room: {adventurer[T_BASE_ENTITY_ROOM_POS]}")
+    for i in range(len(room_entities)):
+        base_entity: list = room_entities[i]
+        if base_entity.type in ENTITY_ITEMS:
+            log_debug_full(f"found item in current room: {adventurer.room_pos}")
 
             # get consume callback for item
             consume_callback = None
-            entity_type = base_entity[T_BASE_ENTITY_TYPE]
+            entity_type = base_entity.type
             if entity_type == E_ENTITY_CHAOS_SEAL:
                 consume_callback = chaos_seal_event_register
             
             # no data for now, we just know that we have that item, no item specific info
-            inventory_item = inventory_item_create(item_type=base_entity[T_BASE_ENTITY_TYPE],
+            inventory_item = inventory_item_create(item_type=base_entity.type,
                                                    item_data=None,
                                                    consume_callback=consume_callback)
 
             # add item to inventory
-            inventory_add_item(adventurer[T_ADVENTURER_INVENTORY], inventory_item)
+            inventory_add_item(adventurer.inventory, inventory_item)
 
             # remove picked up items from entities
             entity_system_remove_entity(entity_system, base_entity)
@@ -498,7 +519,7 @@ def instaconsume_items(game_event: GameEventT):
     entity_system: EntitySystemT = game_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
     adventurer: AdventurerT = entity_system_get_first_and_only(entity_system, E_ENTITY_ADVENTURER)
 
-    inventory: InventoryT = adventurer[T_ADVENTURER_INVENTORY]
+    inventory: InventoryT = adventurer.inventory
 
     for inventory_item in inventory:
         # check if is instanconsume item
@@ -536,7 +557,7 @@ def move_dragons_randomly(game_event: GameEventT):
         return
 
     log_debug("[event system] moving dragons")
-    _move_dragons_randomly(game_context)
+    _move_dragons(game_context)
     game_sleep(game_context, 1)
 
 def single_turn_mode_autoplay_adventurer(game_event: GameEventT):
@@ -22,6 +22,7 @@ from src.engine.parsing import *
 import src.game.gui as gui
 import src.game.event_handler as event_handler
 import src.game.logic as logic
+import src.game.replay as replay
 from src.game.state_manager import *
 from src.game.game_definitions import *
 
@@ -65,10 +66,13 @@ def main_loop():
             event_type: FltkEvent | NoneType = fltk.donne_ev()
             game_context[T_GAME_CTX_EVENT] = input_event_create(event_type=event_type)    
 
-        # render
+        # render, skipped while resolving the game until the end, only its final state is drawn
         # pass event to render function so it can send back event_data
-        gui.start_render()
-        event_data: GameEventDataT = renderer.render(game_context)
+        resolving = bool(game_context[T_GAME_CTX_GAME_FLAGS] & F_GAME_RESOLVE)
+        event_data: GameEventDataT = None
+        if not resolving:
+            gui.start_render()
+            event_data = renderer.render(game_context)
         gui.render()
 
         # handle event if there is one
@@ -79,9 +83,16 @@ def main_loop():
         event_handler.handle_event(game_context)
 
         # handle specific game logic every frame
-        logic.handle_logic(game_context)
+        # or whole rounds back to back inside the frame budget while resolving, it isnt a frame of the game
+        if game_context[T_GAME_CTX_GAME_FLAGS] & F_GAME_RESOLVE:
+            replay.replay_recorder_resolve_game(game_context, engine_config.AUTOPLAY_RESOLVE_BUDGET_S)
+        else:
+            replay.replay_recorder_frame(game_context)
+            logic.handle_logic(game_context)
 
         # fps
         fps_mgr[T_FPS_MANAGER_LAST_FRAME_TIME] = fps_mgr[T_FPS_MANAGER_CURRENT_FRAME_TIME]
         fps_manager.sleep_to_cap_fps(dt)
         log_fps(f"fps: {fps_manager.calculate_fps(dt)}")
+
+    replay.replay_recorder_stop(game_context)
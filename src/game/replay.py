@@ -0,0 +1,460 @@
+"""
+replays, every action of the player that changes a game recorded to a file,
+then played again headless (see src/game/simulation.py) as fast as the logic runs
+
+a replay only needs the state of the game generator, the game data it started from and the actions:
+the game is deterministic for a given generator state, so doing the same actions on the same frames plays the same game
+recording is off unless engine_config.REPLAY_RECORDING, the actions are written buffered and flushed each round
+
+actions are placed before the logic frame that follows them, counted in awake frames (frames where the game
+is not sleeping) then in sleep frames: the frames of a sleep give the same result every frame, so only
+the first one and the ones right after an action count, the real game (that waits) and the replayer
+(that skips the sleep) count the same frames
+a single turn mode autoplay resolved until the end runs outside of the frames, it is recorded as an action
+with the number of simulation steps it did
+
+file format, one line each:
+    REPLAY_FILE_HEADER
+    game generator state (see replay_rng_state_to_str)
+    game data (see serialize_game_data)
+    actions: <frame> <sleep frame> <action type> [room col] [room row] or [saved game data] or [number]
+
+run from the project root:
+    python -m src.game.replay [replay file] [runs]
+"""
+import os
+import sys
+import time
+
+from src.config import *
+import src.utils.logging as logging_mod
+import src.engine.engine_config as engine_config
+import src.engine.parsing as parsing
+from src.engine.fps_manager import *
+from src.engine.structs.dungeon import *
+
+import src.game.logic as logic
+from src.game.game_definitions import *
+from src.game.simulation import *
+from src.game.state_manager import *
+
+from src.utils.logging import *
+
+
+REPLAY_FILE_HEADER = "wall-is-you-replay 2"
+
+# replay action type enum
+E_REPLAY_ACTION_ROTATE_ROOM = 0     # data: RoomPosT
+E_REPLAY_ACTION_PLACE_TREASURE = 1  # data: RoomPosT
+E_REPLAY_ACTION_START_MOVING = 2
+E_REPLAY_ACTION_SAVE = 3
+E_REPLAY_ACTION_LOAD = 4            # data: loaded game context, None if it is the last one saved in the replay
+E_REPLAY_ACTION_RESET = 5
+E_REPLAY_ACTION_END = 6             # the recording stopped, missing if the game crashed
+E_REPLAY_ACTION_AUTOPLAY_SPEED = 7  # data: int, new autoplay speed
+E_REPLAY_ACTION_RESOLVE = 8         # data: int, simulation_resolve_game steps done
+E_REPLAY_ACTION_COUNT = 9
+
+# one action of the player
+ReplayActionT = list
+T_REPLAY_ACTION_FRAME = 0       # int, awake frame the action is done before
+T_REPLAY_ACTION_SLEEP_FRAME = 1 # int, sleep frame after that awake frame the action is done before, 0 for the awake frame
+T_REPLAY_ACTION_TYPE = 2        # ReplayActionE
+T_REPLAY_ACTION_DATA = 3
+T_REPLAY_ACTION_COUNT = 4
+
+# everything needed to play a game again
+ReplayT = list
+T_REPLAY_RNG_STATE = 0      # GameRngT.getstate() of the game generator when the game started
+T_REPLAY_GAME_DATA = 1      # GameDataT the game started from
+T_REPLAY_ACTIONS = 2        # list[ReplayActionT], in frame order
+T_REPLAY_COUNT = 3
+
+# recording of the game being played, kept in T_GAME_CTX_REPLAY_RECORDER
+ReplayRecorderT = list
+T_REPLAY_RECORDER_FILE = 0          # open replay file, written buffered
+T_REPLAY_RECORDER_FRAME = 1         # int, last awake frame run
+T_REPLAY_RECORDER_SLEEP_FRAME = 2   # int, last sleep frame run since that awake frame
+T_REPLAY_RECORDER_ACTION_DONE = 3   # bool, an action was recorded since the last frame
+T_REPLAY_RECORDER_LAST_SAVE = 4     # str | NoneType, last game saved while recording
+T_REPLAY_RECORDER_ROUND = 5         # int, round the file was last flushed in
+T_REPLAY_RECORDER_COUNT = 6
+
+# result of a replay
+ReplayResultT = list
+T_REPLAY_RESULT_SIMULATION = 0      # SimulationResultT
+T_REPLAY_RESULT_ROUND_TIMES = 1     # list[float], seconds spent in the logic of each finished round
+T_REPLAY_RESULT_ELAPSED = 2         # float, seconds spent replaying
+T_REPLAY_RESULT_ACTIONS_DONE = 3    # int
+T_REPLAY_RESULT_COUNT = 4
+
+
+def _replay_frame_is_awake(fps_manager: FpsManagerT) -> bool:
+    return not fps_manager_is_sleeping(fps_manager) or fps_manager_sleep_is_over(fps_manager)
+
+def _replay_next_frame(fps_manager: FpsManagerT, frame: int, sleep_frame: int) -> tuple[int, int]:
+    """
+    returns: (frame, sleep frame) of the logic frame about to run
+    """
+    if _replay_frame_is_awake(fps_manager):
+        return frame + 1, 0
+    return frame, sleep_frame + 1
+
+def replay_action_to_str(action: ReplayActionT) -> str:
+    """
+    >>> replay_action_to_str([12, 0, E_REPLAY_ACTION_ROTATE_ROOM, (3, 4)])
+    '12 0 0 3 4'
+    >>> replay_action_to_str([40, 1, E_REPLAY_ACTION_START_MOVING, None])
+    '40 1 2'
+    >>> replay_action_to_str([41, 0, E_REPLAY_ACTION_RESOLVE, 350])
+    '41 0 8 350'
+    """
+    action_type = action[T_REPLAY_ACTION_TYPE]
+    data = action[T_REPLAY_ACTION_DATA]
+
+    line = f"{action[T_REPLAY_ACTION_FRAME]} {action[T_REPLAY_ACTION_SLEEP_FRAME]} {action_type}"
+    if action_type in (E_REPLAY_ACTION_ROTATE_ROOM, E_REPLAY_ACTION_PLACE_TREASURE):
+        line += f" {data[ROOM_POS_COL]} {data[ROOM_POS_ROW]}"
+    elif action_type in (E_REPLAY_ACTION_AUTOPLAY_SPEED, E_REPLAY_ACTION_RESOLVE) or (action_type == E_REPLAY_ACTION_LOAD and data != None):
+        line += f" {data}"
+
+    return line
+
+def replay_action_from_str(line: str) -> ReplayActionT | NoneType:
+    """
+    returns: None if the line is not an action
+
+    >>> replay_action_from_str("12 0 0 3 4")
+    [12, 0, 0, (3, 4)]
+    >>> replay_action_from_str("7 2 4 {}")
+    [7, 2, 4, '{}']
+    """
+    fields = line.split(" ", 3)
+    if len(fields) < 3 or not all(field.isdigit() for field in fields[:3]):
+        return None
+
+    action_type = int(fields[2])
+    if action_type in (E_REPLAY_ACTION_ROTATE_ROOM, E_REPLAY_ACTION_PLACE_TREASURE, E_REPLAY_ACTION_AUTOPLAY_SPEED, E_REPLAY_ACTION_RESOLVE) and len(fields) < 4:
+        return None
+
+    data = None
+    if action_type in (E_REPLAY_ACTION_ROTATE_ROOM, E_REPLAY_ACTION_PLACE_TREASURE):
+        col, row = fields[3].split(" ")
+        data = room_pos_create(col=int(col), row=int(row))
+    elif action_type == E_REPLAY_ACTION_LOAD and len(fields) > 3:
+        data = fields[3]
+    elif action_type in (E_REPLAY_ACTION_AUTOPLAY_SPEED, E_REPLAY_ACTION_RESOLVE):
+        data = int(fields[3])
+    elif action_type >= E_REPLAY_ACTION_COUNT:
+        return None
+
+    return [int(fields[0]), int(fields[1]), action_type, data]
+
+def replay_rng_state_to_str(rng_state: tuple) -> str:
+    """
+    >>> rng = game_rng_create(42)
+    >>> rng_state = replay_rng_state_from_str(replay_rng_state_to_str(rng.getstate()))
+    >>> copy = game_rng_create()
+    >>> copy.setstate(rng_state)
+    >>> copy.random() == rng.random()
+    True
+    """
+    version, internal_state, gauss_next = rng_state
+    return f"{version} {' '.join(str(value) for value in internal_state)} {gauss_next!r}"
+
+def replay_rng_state_from_str(line: str) -> tuple | NoneType:
+    """
+    returns: None if the line is not a generator state
+    """
+    fields = line.split(" ")
+    if len(fields) < 3 or not all(field.isdigit() for field in fields[:-1]):
+        return None
+
+    gauss_next = None if fields[-1] == "None" else float(fields[-1])
+    return int(fields[0]), tuple(int(field) for field in fields[1:-1]), gauss_next
+
+# -------------------- recording
+
+def replay_recorder_start(game_context: GameContextT, file_path: str = REPLAY_FILE_PATH):
+    """
+    starts recording the game just loaded in game_context if engine_config.REPLAY_RECORDING,
+    the state of the game generator is stored as is, recording does not draw from it
+    """
+    if not engine_config.REPLAY_RECORDING:
+        return
+
+    # the previous recording is not done if the game went on without going back to the menu
+    replay_recorder_stop(game_context)
+
+    recorder: ReplayRecorderT = [None] * T_REPLAY_RECORDER_COUNT
+    recorder[T_REPLAY_RECORDER_FILE] = open(file_path, "w")
+    recorder[T_REPLAY_RECORDER_FRAME] = 0
+    recorder[T_REPLAY_RECORDER_SLEEP_FRAME] = 0
+    recorder[T_REPLAY_RECORDER_ACTION_DONE] = False
+    recorder[T_REPLAY_RECORDER_LAST_SAVE] = None
+    recorder[T_REPLAY_RECORDER_ROUND] = game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_ROUND]
+    game_context[T_GAME_CTX_REPLAY_RECORDER] = recorder
+
+    rng_state = game_context[T_GAME_CTX_RNG].getstate()
+    recorder[T_REPLAY_RECORDER_FILE].write(f"{REPLAY_FILE_HEADER}\n{replay_rng_state_to_str(rng_state)}\n"
+                                           f"{parsing.serialize_game_data(game_context[T_GAME_CTX_ORIGINAL_GAME_DATA])}\n")
+
+    log_debug(f"[replay_recorder_start] recording to {file_path}")
+
+def replay_recorder_add(game_context: GameContextT, action_type: int, data=None):
+    """
+    records an action done this frame, does nothing if the game is not recorded
+    data: RoomPosT for rooms actions, the saved or loaded game for SAVE and LOAD
+    """
+    recorder: ReplayRecorderT | NoneType = game_context[T_GAME_CTX_REPLAY_RECORDER]
+    if recorder == None:
+        return
+
+    # a load of the last save only needs to say so, the replayer saved it too
+    if action_type == E_REPLAY_ACTION_SAVE:
+        recorder[T_REPLAY_RECORDER_LAST_SAVE] = data
+        data = None
+    elif action_type == E_REPLAY_ACTION_LOAD and data == recorder[T_REPLAY_RECORDER_LAST_SAVE]:
+        data = None
+
+    _replay_recorder_write(recorder, game_context, action_type, data)
+
+def _replay_recorder_write(recorder: ReplayRecorderT, game_context: GameContextT, action_type: int, data, frame: tuple[int, int] | NoneType = None):
+    """
+    frame: (frame, sleep frame) of the action, None for the frame about to run
+    """
+    # actions are done before the logic of the frame, so they are placed at it
+    if frame == None:
+        frame = _replay_next_frame(game_context[T_GAME_CTX_FPS_MANAGER], recorder[T_REPLAY_RECORDER_FRAME], recorder[T_REPLAY_RECORDER_SLEEP_FRAME])
+    action: ReplayActionT = [frame[0], frame[1], action_type, data]
+    recorder[T_REPLAY_RECORDER_ACTION_DONE] = True
+
+    recorder[T_REPLAY_RECORDER_FILE].write(replay_action_to_str(action) + "\n")
+
+def replay_recorder_resolve_game(game_context: GameContextT, time_budget: float | NoneType = None) -> int:
+    """
+    simulation_resolve_game for the main loop, recorded as an action if the game is recorded
+    returns: number of simulation_step_frame done
+    """
+    recorder: ReplayRecorderT | NoneType = game_context[T_GAME_CTX_REPLAY_RECORDER]
+    if recorder == None:
+        return simulation_resolve_game(game_context, time_budget)
+
+    # placed at the frame it runs before, the clock moves while resolving
+    frame = _replay_next_frame(game_context[T_GAME_CTX_FPS_MANAGER], recorder[T_REPLAY_RECORDER_FRAME], recorder[T_REPLAY_RECORDER_SLEEP_FRAME])
+    steps = simulation_resolve_game(game_context, time_budget)
+    _replay_recorder_write(recorder, game_context, E_REPLAY_ACTION_RESOLVE, steps, frame)
+
+    return steps
+
+def replay_recorder_stop(game_context: GameContextT):
+    """
+    ends the recording, the replay stops at this frame
+    """
+    recorder: ReplayRecorderT | NoneType = game_context[T_GAME_CTX_REPLAY_RECORDER]
+    if recorder == None:
+        return
+
+    replay_recorder_add(game_context, E_REPLAY_ACTION_END)
+    recorder[T_REPLAY_RECORDER_FILE].close()
+    game_context[T_GAME_CTX_REPLAY_RECORDER] = None
+
+def replay_recorder_frame(game_context: GameContextT):
+    """
+    call before handle_logic each frame, counts the frames of the game that can change it
+    """
+    recorder: ReplayRecorderT | NoneType = game_context[T_GAME_CTX_REPLAY_RECORDER]
+    if recorder == None:
+        return
+
+    if game_context[T_GAME_CTX_GAME_FLAGS] & F_GAME_GAME_FINISHED:
+        replay_recorder_stop(game_context)
+        return
+
+    # handle_logic does nothing outside of a running game
+    if game_context[T_GAME_CTX_ACTIVE_WINDOW] != E_WINDOW_GAME:
+        return
+
+    if _replay_frame_is_awake(game_context[T_GAME_CTX_FPS_MANAGER]):
+        recorder[T_REPLAY_RECORDER_FRAME] += 1
+        recorder[T_REPLAY_RECORDER_SLEEP_FRAME] = 0
+    # the other frames of a sleep do the same as the first one, unless an action changed the game
+    elif recorder[T_REPLAY_RECORDER_SLEEP_FRAME] == 0 or recorder[T_REPLAY_RECORDER_ACTION_DONE]:
+        recorder[T_REPLAY_RECORDER_SLEEP_FRAME] += 1
+
+    recorder[T_REPLAY_RECORDER_ACTION_DONE] = False
+
+    # a crash only loses the actions of the round it happened in
+    game_round = game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_ROUND]
+    if game_round != recorder[T_REPLAY_RECORDER_ROUND]:
+        recorder[T_REPLAY_RECORDER_ROUND] = game_round
+        recorder[T_REPLAY_RECORDER_FILE].flush()
+
+# -------------------- replaying
+
+def replay_load(file_path: str) -> ReplayT | NoneType:
+    """
+    returns: None if the file is not a replay
+    """
+    if not os.path.exists(file_path):
+        log_error(f"[replay_load] replay file not found: {file_path}")
+        return None
+
+    with open(file_path, "r") as f:
+        lines = f.read().splitlines()
+
+    if len(lines) < 3 or lines[0] != REPLAY_FILE_HEADER:
+        log_error(f"[replay_load] not a replay file: {file_path}")
+        return None
+
+    rng_state = replay_rng_state_from_str(lines[1])
+    if rng_state == None:
+        log_error(f"[replay_load] invalid game generator state: {file_path}")
+        return None
+
+    replay: ReplayT = [None] * T_REPLAY_COUNT
+    replay[T_REPLAY_RNG_STATE] = rng_state
+    replay[T_REPLAY_GAME_DATA] = parsing.deserialize_game_data(lines[2])
+    replay[T_REPLAY_ACTIONS] = []
+
+    for line in lines[3:]:
+        action = replay_action_from_str(line)
+        if action == None:
+            log_warning(f"[replay_load] skipped invalid action: {line[:80]}")
+            continue
+        replay[T_REPLAY_ACTIONS].append(action)
+
+    return replay
+
+def _replay_do_action(game_context: GameContextT, action: ReplayActionT, last_save: str | NoneType) -> str | NoneType:
+    """
+    does an action like the event handler does
+    returns: the last game saved
+    """
+    action_type = action[T_REPLAY_ACTION_TYPE]
+    data = action[T_REPLAY_ACTION_DATA]
+
+    if action_type == E_REPLAY_ACTION_ROTATE_ROOM:
+        if logic.rotate_room_at(game_context, data):
+            logic.invalidate_adventurer_path(game_context)
+    elif action_type == E_REPLAY_ACTION_PLACE_TREASURE:
+        if logic.place_treasure_at(game_context, data):
+            logic.invalidate_adventurer_path(game_context)
+    elif action_type == E_REPLAY_ACTION_START_MOVING:
+        logic.start_moving_adventurer(game_context)
+    elif action_type == E_REPLAY_ACTION_SAVE:
+        last_save = parsing.serialize_game_context(game_context)
+    elif action_type == E_REPLAY_ACTION_LOAD:
+        loaded_game = data if data != None else last_save
+        if loaded_game == None:
+            log_error("[_replay_do_action] load of a save that is not in the replay")
+        else:
+            parsing.deserialize_game_context(game_context, loaded_game)
+    elif action_type == E_REPLAY_ACTION_RESET:
+        logic.reset_game_data(game_context)
+        game_context[T_GAME_CTX_GAME_FLAGS] = GAME_FLAGS_GAME_START
+    elif action_type == E_REPLAY_ACTION_AUTOPLAY_SPEED:
+        game_context[T_GAME_CTX_AUTOPLAY_SPEED] = data
+    elif action_type == E_REPLAY_ACTION_RESOLVE:
+        simulation_resolve_game(game_context, max_steps=data)
+
+    return last_save
+
+def replay_run(replay: ReplayT, max_frames: int = engine_config.SIMULATION_MAX_FRAMES) -> ReplayResultT:
+    """
+    plays the replay headless until the game is finished or the recording ended,
+    replays of a game that crashed stop once the actions ran out and the game waits for the player
+    """
+    rng = game_rng_create()
+    rng.setstate(replay[T_REPLAY_RNG_STATE])
+    game_context = simulation_context_create(replay[T_REPLAY_GAME_DATA], rng)
+    game_data = game_context[T_GAME_CTX_GAME_DATA]
+    fps_manager: FpsManagerT = game_context[T_GAME_CTX_FPS_MANAGER]
+    start_time = fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME]
+    actions: list[ReplayActionT] = replay[T_REPLAY_ACTIONS]
+
+    round_times = []
+    last_save = None
+    ended = False
+    next_action = 0
+    awake_frames = 0
+    sleep_frames = 0
+    frames = 0
+
+    begin_time = time.perf_counter()
+    round_begin_time = begin_time
+    while not game_context[T_GAME_CTX_GAME_FLAGS] & F_GAME_GAME_FINISHED and frames < max_frames:
+        # actions placed up to this frame are done before its logic, like in the main loop,
+        # the frame is looked for again after each of them as resolving moves the clock
+        next_frame = _replay_next_frame(fps_manager, awake_frames, sleep_frames)
+        while next_action < len(actions) and \
+              (actions[next_action][T_REPLAY_ACTION_FRAME], actions[next_action][T_REPLAY_ACTION_SLEEP_FRAME]) <= next_frame:
+            ended = actions[next_action][T_REPLAY_ACTION_TYPE] == E_REPLAY_ACTION_END
+            last_save = _replay_do_action(game_context, actions[next_action], last_save)
+            next_action += 1
+            next_frame = _replay_next_frame(fps_manager, awake_frames, sleep_frames)
+
+        if ended or game_context[T_GAME_CTX_GAME_FLAGS] & F_GAME_GAME_FINISHED or \
+           (next_action == len(actions) and simulation_waits_for_player(game_context)):
+            break
+
+        awake_frames, sleep_frames = next_frame
+
+        # the sleep is run frame by frame while some of its actions are left
+        sleep_has_actions = next_action < len(actions) and actions[next_action][T_REPLAY_ACTION_FRAME] == awake_frames
+        current_round = game_data[T_GAME_DATA_ROUND]
+        simulation_step_frame(game_context, skip_sleep=not sleep_has_actions)
+        frames += 1
+
+        if game_data[T_GAME_DATA_ROUND] != current_round:
+            end_time = time.perf_counter()
+            round_times.append(end_time - round_begin_time)
+            round_begin_time = end_time
+
+    result: ReplayResultT = [None] * T_REPLAY_RESULT_COUNT
+    result[T_REPLAY_RESULT_SIMULATION] = simulation_result_create(game_context, frames, start_time)
+    result[T_REPLAY_RESULT_ROUND_TIMES] = round_times
+    result[T_REPLAY_RESULT_ELAPSED] = time.perf_counter() - begin_time
+    result[T_REPLAY_RESULT_ACTIONS_DONE] = next_action
+
+    return result
+
+def replay_result_to_str(result: ReplayResultT) -> str:
+    """
+    >>> print(replay_result_to_str([[F_GAME_GAME_FINISHED | F_GAME_GAME_WON, 3, 40, 2.5, 1, 0], [0.002, 0.004], 0.01, 5]))
+    won in 3 rounds, 40 frames (2.5s of game) replayed in 10.00ms, 5 actions
+    round logic: 3.00ms average, 4.00ms max
+    """
+    simulation_result: SimulationResultT = result[T_REPLAY_RESULT_SIMULATION]
+    game_flags = simulation_result[T_SIMULATION_RESULT_GAME_FLAGS]
+    round_times: list[float] = result[T_REPLAY_RESULT_ROUND_TIMES]
+
+    outcome = "unfinished"
+    if game_flags & F_GAME_GAME_FINISHED:
+        outcome = "won" if game_flags & F_GAME_GAME_WON else "lost"
+
+    text = f"{outcome} in {simulation_result[T_SIMULATION_RESULT_ROUNDS]} rounds, {simulation_result[T_SIMULATION_RESULT_FRAMES]} frames " \
+           f"({simulation_result[T_SIMULATION_RESULT_VIRTUAL_TIME]:.1f}s of game) replayed in {result[T_REPLAY_RESULT_ELAPSED] * 1000:.2f}ms, " \
+           f"{result[T_REPLAY_RESULT_ACTIONS_DONE]} actions"
+    if round_times:
+        text += f"\nround logic: {sum(round_times) / len(round_times) * 1000:.2f}ms average, {max(round_times) * 1000:.2f}ms max"
+
+    return text
+
+def main():
+    file_path = sys.argv[1] if len(sys.argv) > 1 else REPLAY_FILE_PATH
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    # logs of every move would be most of the time spent
+    logging_mod.LOG_LEVEL = logging_mod.LOG_LEVEL_ERROR
+
+    replay = replay_load(file_path)
+    if replay == None:
+        return
+
+    for _ in range(runs):
+        print(replay_result_to_str(replay_run(replay)))
+
+
+if __name__ == "__main__":
+    main()
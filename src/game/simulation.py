@@ -0,0 +1,344 @@
+"""
+headless game runner, plays games without a window, rendering or sleeping
+
+the same game systems as the main loop run (game_systems_setup, handle_logic),
+but the frame time comes from a virtual clock: when the game sleeps (game_sleep between
+adventurer steps, dragon moves and rounds) the clock jumps to the end of the sleep
+instead of waiting, so a game runs as fast as its logic
+
+the player is replaced by a script that gives the actions of each dungeon turn,
+the adventurer starts moving once they are done (like pressing space)
+
+the main loop uses it too, to resolve a single turn mode autoplay until the end (see simulation_resolve_game)
+"""
+import time
+from typing import Callable
+
+import src.engine.engine_config as engine_config
+from src.engine.fps_manager import *
+from src.engine.entity_system import *
+from src.engine.structs.dungeon import *
+from src.engine.structs.adventurer import *
+
+import src.game.logic as logic
+from src.game.game_definitions import *
+from src.game.state_manager import *
+
+
+# action of the dungeon turn
+SimulationActionT = tuple[int, RoomPosT]
+T_SIMULATION_ACTION_TYPE = 0
+T_SIMULATION_ACTION_ROOM_POS = 1
+T_SIMULATION_ACTION_COUNT = 2
+
+# simulation action type enum
+E_SIMULATION_ACTION_ROTATE_ROOM = 0
+E_SIMULATION_ACTION_PLACE_TREASURE = 1
+E_SIMULATION_ACTION_COUNT = 2
+
+# called at the start of each dungeon turn, returns the actions to do before the adventurer moves
+SimulationScriptT = Callable[[GameContextT], list[SimulationActionT]]
+
+# result of one game
+SimulationResultT = list
+T_SIMULATION_RESULT_GAME_FLAGS = 0    # game flags at the end, F_GAME_GAME_FINISHED not set if the game was given up
+T_SIMULATION_RESULT_ROUNDS = 1        # round counter at the end
+T_SIMULATION_RESULT_FRAMES = 2        # frames that ran game logic
+T_SIMULATION_RESULT_VIRTUAL_TIME = 3  # seconds the game would have lasted in the main loop
+T_SIMULATION_RESULT_DRAGONS_SLAIN = 4
+T_SIMULATION_RESULT_ITEMS_USED = 5    # items picked up and consumed (placed treasures included)
+T_SIMULATION_RESULT_COUNT = 6
+
+# results of several games
+SimulationStatsT = list
+T_SIMULATION_STATS_GAMES = 0
+T_SIMULATION_STATS_WON = 1
+T_SIMULATION_STATS_LOST = 2
+T_SIMULATION_STATS_UNFINISHED = 3
+T_SIMULATION_STATS_ROUNDS = 4         # sum over all games
+T_SIMULATION_STATS_FRAMES = 5         # sum over all games
+T_SIMULATION_STATS_VIRTUAL_TIME = 6   # sum over all games
+T_SIMULATION_STATS_ELAPSED = 7        # real seconds spent running the games
+T_SIMULATION_STATS_DRAGONS_SLAIN = 8  # sum over all games
+T_SIMULATION_STATS_ITEMS_USED = 9     # sum over all games
+T_SIMULATION_STATS_COUNT = 10
+
+
+def simulation_action_create(action_type: int, room_pos: RoomPosT) -> SimulationActionT:
+    action = [None] * T_SIMULATION_ACTION_COUNT
+    action[T_SIMULATION_ACTION_TYPE] = action_type
+    action[T_SIMULATION_ACTION_ROOM_POS] = room_pos
+
+    return SimulationActionT(action)
+
+def simulation_script_from_turns(turns: list[list[SimulationActionT]]) -> SimulationScriptT:
+    """
+    script doing turns[0] on round 1, turns[1] on round 2... and nothing once turns run out
+
+    >>> script = simulation_script_from_turns([[simulation_action_create(E_SIMULATION_ACTION_ROTATE_ROOM, (0, 0))]])
+    >>> game_context = [None] * T_GAME_CTX_COUNT
+    >>> game_context[T_GAME_CTX_GAME_DATA] = [None] * T_GAME_DATA_COUNT
+    >>> game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_ROUND] = 1
+    >>> script(game_context)
+    [(0, (0, 0))]
+    >>> game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_ROUND] = 2
+    >>> script(game_context)
+    []
+    """
+    def script(game_context: GameContextT) -> list[SimulationActionT]:
+        turn = game_context[T_GAME_CTX_GAME_DATA][T_GAME_DATA_ROUND] - 1
+        return turns[turn] if turn < len(turns) else []
+
+    return script
+
+def _count_items(game_data: GameDataT) -> int:
+    """
+    items left in the dungeon, in the adventurer inventory and treasures left to place
+    """
+    entity_system: EntitySystemT = game_data[T_DUNGEON_DATA_ENTITY_SYSTEM]
+    adventurer: AdventurerT = entity_system_get_first_and_only(entity_system, E_ENTITY_ADVENTURER)
+
+    item_count = sum(len(entity_system_get_all(entity_system, item_type)) for item_type in ENTITY_ITEMS)
+    if adventurer != None and adventurer.inventory != None:
+        item_count += len(adventurer.inventory)
+
+    return item_count + game_data[T_DUNGEON_DATA_TREASURE_COUNT]
+
+def simulation_context_create(game_data: GameDataT, rng: GameRngT | NoneType = None) -> GameContextT:
+    """
+    game context in the game window with ``game_data`` loaded, like after picking a dungeon in the menu,
+    with no assets and an fps manager on a virtual clock starting at 1 second
+    rng: generator of the game, None for a new unseeded one
+    """
+    game_context = game_context_create(assets=None,
+                                       game_flags=GAME_FLAGS_GAME_START,
+                                       active_window=E_WINDOW_GAME,
+                                       event=input_event_create(),
+                                       game_data=game_data_init(),
+                                       original_game_data=game_data_init(),
+                                       fps_manager=fps_manager_create(current_frame_time=1.0),
+                                       rng=rng)
+
+    logic.load_game_data(game_context, game_data)
+    return game_context
+
+def simulation_do_action(game_context: GameContextT, action: SimulationActionT) -> bool:
+    """
+    does a dungeon turn action like handle_event_game_dungeon does for a click
+    returns: True if the action changed the game
+    """
+    action_type = action[T_SIMULATION_ACTION_TYPE]
+    room_pos = action[T_SIMULATION_ACTION_ROOM_POS]
+
+    success = False
+    if action_type == E_SIMULATION_ACTION_ROTATE_ROOM:
+        success = logic.rotate_room_at(game_context, room_pos)
+    elif action_type == E_SIMULATION_ACTION_PLACE_TREASURE:
+        success = logic.place_treasure_at(game_context, room_pos)
+    else:
+        log_error(f"[simulation_do_action] unknown action type: {action_type}")
+
+    if success:
+        logic.invalidate_adventurer_path(game_context)
+
+    return success
+
+def simulation_step_frame(game_context: GameContextT, skip_sleep: bool = True) -> int:
+    """
+    runs the game logic of one frame, then moves the virtual clock to the next frame,
+    past the end of the sleep if the game already slept this frame: a sleep runs one frame
+    then the rest is not run (while sleeping only the path update, collisions and pickups run,
+    they give the same result every frame until the adventurer or the dragons move again)
+    skip_sleep: False to run every frame of the sleep, when actions are done while sleeping
+    returns: number of frames the clock moved
+    """
+    fps_manager: FpsManagerT = game_context[T_GAME_CTX_FPS_MANAGER]
+    frame_time = engine_config.TARGET_FRAME_TIME_S
+    was_sleeping = fps_manager_is_sleeping(fps_manager) and not fps_manager_sleep_is_over(fps_manager)
+
+    logic.handle_logic(game_context)
+    fps_manager[T_FPS_MANAGER_LAST_FRAME_TIME] = fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME]
+
+    frames = 1
+    if skip_sleep and was_sleeping and fps_manager_is_sleeping(fps_manager):
+        # first frame strictly after the end of the sleep, see fps_manager_slept_enough
+        wake_time = fps_manager[T_FPS_MANAGER_LAST_HANDLED_FRAME] + fps_manager[T_FPS_MANAGER_SLEEP_TARGET]
+        frames += max(0, int((wake_time - fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME]) / frame_time))
+
+    fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME] += frames * frame_time
+    return frames
+
+def simulation_waits_for_player(game_context: GameContextT) -> bool:
+    """
+    returns: True if nothing happens until the player does the dungeon turn
+    """
+    game_flags: int = game_context[T_GAME_CTX_GAME_FLAGS]
+    if game_flags & F_GAME_ADVENTURER_MOVING or logic.single_turn_mode_past_first_round(game_context):
+        return False
+
+    return bool(game_flags & F_GAME_TURN_DUNGEON)
+
+def simulation_resolve_game(game_context: GameContextT,
+                            time_budget: float | NoneType = None,
+                            max_steps: int = engine_config.SIMULATION_MAX_FRAMES) -> int:
+    """
+    runs the game of a live game context on the virtual clock, whole rounds back to back, until it is finished
+    or waits for the player, F_GAME_RESOLVE is then cleared
+    stops earlier after time_budget real seconds (None: no limit) or max_steps simulation_step_frame,
+    the clock is moved back to the frame time after, the sleep in progress keeps its time left
+    returns: number of simulation_step_frame done
+    """
+    fps_manager: FpsManagerT = game_context[T_GAME_CTX_FPS_MANAGER]
+    frame_time = fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME]
+    begin_time = time.perf_counter()
+
+    steps = 0
+    while True:
+        if game_context[T_GAME_CTX_GAME_FLAGS] & F_GAME_GAME_FINISHED or simulation_waits_for_player(game_context):
+            game_context[T_GAME_CTX_GAME_FLAGS] &= ~F_GAME_RESOLVE
+            break
+
+        if steps >= max_steps or (time_budget != None and time.perf_counter() - begin_time >= time_budget):
+            break
+
+        simulation_step_frame(game_context)
+        steps += 1
+
+    # the main loop keeps its clock, times of the fps manager are moved back with it
+    shift = fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME] - frame_time
+    fps_manager[T_FPS_MANAGER_LAST_FRAME_TIME] -= shift
+    fps_manager[T_FPS_MANAGER_LAST_HANDLED_FRAME] -= shift
+    fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME] = frame_time
+
+    return steps
+
+def simulation_result_create(game_context: GameContextT, frames: int, start_time: float) -> SimulationResultT:
+    """
+    result of the game of ``game_context`` after ``frames`` frames, the virtual clock started at start_time
+    dragons slain and items used are counted from the original game data
+    """
+    game_data = game_context[T_GAME_CTX_GAME_DATA]
+    original_game_data = game_context[T_GAME_CTX_ORIGINAL_GAME_DATA]
+    fps_manager: FpsManagerT = game_context[T_GAME_CTX_FPS_MANAGER]
+
+    def count_dragons(game_data: GameDataT) -> int:
+        return len(entity_system_get_all(game_data[T_DUNGEON_DATA_ENTITY_SYSTEM], E_ENTITY_DRAGON))
+
+    result = [None] * T_SIMULATION_RESULT_COUNT
+    result[T_SIMULATION_RESULT_GAME_FLAGS] = game_context[T_GAME_CTX_GAME_FLAGS]
+    result[T_SIMULATION_RESULT_ROUNDS] = game_data[T_GAME_DATA_ROUND]
+    result[T_SIMULATION_RESULT_FRAMES] = frames
+    result[T_SIMULATION_RESULT_VIRTUAL_TIME] = fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME] - start_time
+    result[T_SIMULATION_RESULT_DRAGONS_SLAIN] = count_dragons(original_game_data) - count_dragons(game_data)
+    result[T_SIMULATION_RESULT_ITEMS_USED] = _count_items(original_game_data) - _count_items(game_data)
+
+    return result
+
+def simulation_run_game(game_data: GameDataT,
+                        script: SimulationScriptT | NoneType = None,
+                        max_rounds: int = engine_config.SIMULATION_MAX_ROUNDS,
+                        max_frames: int = engine_config.SIMULATION_MAX_FRAMES,
+                        rng: GameRngT | NoneType = None) -> SimulationResultT:
+    """
+    plays ``game_data`` until it is finished, or given up after max_rounds rounds or max_frames frames
+    game_data is copied, it is left as is
+    script: actions of each dungeon turn, None to only let the adventurer move
+    rng: generator of the game, the same seeded generator plays the same game
+    """
+    game_context = simulation_context_create(game_data, rng)
+    game_data = game_context[T_GAME_CTX_GAME_DATA]
+    fps_manager: FpsManagerT = game_context[T_GAME_CTX_FPS_MANAGER]
+    start_time = fps_manager[T_FPS_MANAGER_CURRENT_FRAME_TIME]
+
+    frames = 0
+    scripted_round = 0
+    while not game_context[T_GAME_CTX_GAME_FLAGS] & F_GAME_GAME_FINISHED:
+        if game_data[T_GAME_DATA_ROUND] > max_rounds or frames >= max_frames:
+            break
+
+        # dungeon turn, once per round: do the script actions then start moving like pressing space
+        game_flags: int = game_context[T_GAME_CTX_GAME_FLAGS]
+        if not game_flags & F_GAME_ADVENTURER_MOVING and scripted_round != game_data[T_GAME_DATA_ROUND]:
+            scripted_round = game_data[T_GAME_DATA_ROUND]
+            if script != None:
+                for action in script(game_context):
+                    simulation_do_action(game_context, action)
+            logic.start_moving_adventurer(game_context)
+
+        simulation_step_frame(game_context)
+        frames += 1
+
+    return simulation_result_create(game_context, frames, start_time)
+
+def simulation_stats_create() -> SimulationStatsT:
+    stats = [0] * T_SIMULATION_STATS_COUNT
+    stats[T_SIMULATION_STATS_VIRTUAL_TIME] = 0.0
+    stats[T_SIMULATION_STATS_ELAPSED] = 0.0
+
+    return stats
+
+def simulation_stats_add_result(stats: SimulationStatsT, result: SimulationResultT):
+    """
+    >>> stats = simulation_stats_create()
+    >>> simulation_stats_add_result(stats, [F_GAME_GAME_FINISHED | F_GAME_GAME_WON, 3, 40, 2.5, 2, 1])
+    >>> simulation_stats_add_result(stats, [GAME_FLAGS_GAME_START, 1000, 9000, 900.0, 0, 0])
+    >>> stats[T_SIMULATION_STATS_GAMES], stats[T_SIMULATION_STATS_WON], stats[T_SIMULATION_STATS_UNFINISHED], stats[T_SIMULATION_STATS_ROUNDS]
+    (2, 1, 1, 1003)
+    """
+    game_flags: int = result[T_SIMULATION_RESULT_GAME_FLAGS]
+
+    stats[T_SIMULATION_STATS_GAMES] += 1
+    if not game_flags & F_GAME_GAME_FINISHED:
+        stats[T_SIMULATION_STATS_UNFINISHED] += 1
+    elif game_flags & F_GAME_GAME_WON:
+        stats[T_SIMULATION_STATS_WON] += 1
+    else:
+        stats[T_SIMULATION_STATS_LOST] += 1
+
+    stats[T_SIMULATION_STATS_ROUNDS] += result[T_SIMULATION_RESULT_ROUNDS]
+    stats[T_SIMULATION_STATS_FRAMES] += result[T_SIMULATION_RESULT_FRAMES]
+    stats[T_SIMULATION_STATS_VIRTUAL_TIME] += result[T_SIMULATION_RESULT_VIRTUAL_TIME]
+    stats[T_SIMULATION_STATS_DRAGONS_SLAIN] += result[T_SIMULATION_RESULT_DRAGONS_SLAIN]
+    stats[T_SIMULATION_STATS_ITEMS_USED] += result[T_SIMULATION_RESULT_ITEMS_USED]
+
+def simulation_stats_games_per_second(stats: SimulationStatsT) -> float:
+    if stats[T_SIMULATION_STATS_ELAPSED] <= 0:
+        return 0.0
+    return stats[T_SIMULATION_STATS_GAMES] / stats[T_SIMULATION_STATS_ELAPSED]
+
+def simulation_stats_to_str(stats: SimulationStatsT) -> str:
+    """
+    >>> stats = simulation_stats_create()
+    >>> simulation_stats_add_result(stats, [F_GAME_GAME_FINISHED | F_GAME_GAME_LOST, 2, 30, 3.0, 0, 1])
+    >>> stats[T_SIMULATION_STATS_ELAPSED] = 0.5
+    >>> simulation_stats_to_str(stats)
+    '1 games (0 won, 1 lost, 0 unfinished), 2.0 games/s, 60 frames/s, 6x faster than real time'
+    """
+    elapsed = stats[T_SIMULATION_STATS_ELAPSED]
+    frames_per_second = stats[T_SIMULATION_STATS_FRAMES] / elapsed if elapsed > 0 else 0.0
+    speedup = stats[T_SIMULATION_STATS_VIRTUAL_TIME] / elapsed if elapsed > 0 else 0.0
+
+    return f"{stats[T_SIMULATION_STATS_GAMES]} games " \
+           f"({stats[T_SIMULATION_STATS_WON]} won, {stats[T_SIMULATION_STATS_LOST]} lost, {stats[T_SIMULATION_STATS_UNFINISHED]} unfinished), " \
+           f"{simulation_stats_games_per_second(stats):.1f} games/s, {frames_per_second:.0f} frames/s, {speedup:.0f}x faster than real time"
+
+def simulation_run_games(games: list[GameDataT],
+                         script: SimulationScriptT | NoneType = None,
+                         max_rounds: int = engine_config.SIMULATION_MAX_ROUNDS,
+                         max_frames: int = engine_config.SIMULATION_MAX_FRAMES,
+                         rng: GameRngT | NoneType = None) -> SimulationStatsT:
+    """
+    plays every game of ``games`` one after the other (see simulation_run_game)
+    rng: generator shared by the games, None for a new unseeded one
+    """
+    if rng == None:
+        rng = game_rng_create()
+
+    stats = simulation_stats_create()
+
+    begin_time = time.perf_counter()
+    for game_data in games:
+        simulation_stats_add_result(stats, simulation_run_game(game_data, script, max_rounds, max_frames, rng))
+    stats[T_SIMULATION_STATS_ELAPSED] = time.perf_counter() - begin_time
+
+    return stats
@@ -13,6 +13,7 @@ F_GAME_ADVENTURER_MOVING =   1 << 5  # adventurer is currently moving
 F_GAME_HANDLE_EVENTS =       1 << 6  # dont handle game input events
 F_GAME_UPDATE_PATH =         1 << 7  # if set means we need to recalculate the adventurer path
 F_GAME_RANDOM_DUNGEON =      1 << 8  # random dungeon menu selector
+F_GAME_RESOLVE =             1 << 9  # single turn mode autoplay resolved until the end without rendering
 F_GAME_EXIT_PROGRAM =        1 << 16 # exit program after we finish the current main loop iteration
 
 GAME_FLAGS_STARTUP = F_GAME_HANDLE_EVENTS
@@ -4,18 +4,14 @@ from src.engine.entity_system import *
 from src.engine.structs.treasure import *
 
 def _get_entity_system_positions(entity_system, entity_types_to_skip: set[EntityE]) -> set[RoomPosT]:
-    # init with dragons positions first
-    # entity_system_positions = [dragon[T_BASE_ENTITY_ROOM_POS] for dragon in entity_system[T_ENTITY_SYSTEM_DRAGONS]]
+    # read the rooms from the entity system room index, no need to look at every entity
     positions = set()
 
-    # other single ents
-    for entity in entity_system:
-        if entity[T_BASE_ENTITY_TYPE] in entity_types_to_skip:
-            continue
-
-        # check if valid ent and not just empty ent
-        if isinstance(entity, list) and len(entity) >= T_BASE_ENTITY_COUNT:
-            positions.add(entity[T_BASE_ENTITY_ROOM_POS])
+    for room_pos, room_entities in entity_system.rooms.items():
+        for entity in room_entities:
+            if entity.type not in entity_types_to_skip:
+                positions.add(room_pos)
+                break
 
     return positions
 
@@ -26,14 +22,23 @@ def get_collision_entity_positions(entity_system: EntitySystemT) -> set[RoomPosT
     # skip items bcs they cant interupt movement path
     return _get_entity_system_positions(entity_system, ENTITY_ITEMS)
 
+def room_has_collision_entity(entity_system: EntitySystemT, room_pos: RoomPosT) -> bool:
+    """
+    same as room_pos in get_collision_entity_positions(entity_system), but only looks in room_pos
+    """
+    for entity in entity_system.rooms.get(room_pos, ()):
+        if entity.type not in ENTITY_ITEMS:
+            return True
+
+    return False
+
 def get_dragon_positions(entity_system) -> set[DragonT]:
     dragon_positions = set()
 
-    for base_entity in entity_system:
-        if base_entity[T_BASE_ENTITY_TYPE] == E_ENTITY_DRAGON:
-            dragon_positions.add(base_entity[T_BASE_ENTITY_ROOM_POS])
+    for base_entity in entity_system.types.get(E_ENTITY_DRAGON, ()):
+        dragon_positions.add(base_entity.room_pos)
 
     return dragon_positions
 
 def get_all_entity_positions(entity_system: EntitySystemT) -> set[RoomPosT]:
-    return _get_entity_system_positions(entity_system, set())
+    return entity_system_get_positions(entity_system)